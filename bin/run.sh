@@ -3,18 +3,44 @@
 
 # GORDON_RUN_MODE environment variable is set to
 #  instruct container how to start up (either as Flask API,
-#  or as Celery worker to run PR checks)
+#  as the asynchronous ASGI API, or as Celery worker to run PR checks, or as the Celery beat
+#  scheduler of periodic tasks such as the Jira project index refresh)
 case "$GORDON_RUN_MODE" in
     api)
         CMD="gunicorn -b 0.0.0.0:9001 --workers=5 \"gordon:create_app()\""
         ;;
 
+    api-async)
+        CMD="uvicorn --factory gordon.asgi_server:create_asgi_app --host 0.0.0.0 --port 9001 --workers=${GORDON_ASGI_WORKERS:-2} --no-access-log"
+        ;;
+
     worker)
-        CMD="celery -A gordon.worker.celery_initialization.celery worker --loglevel=INFO"
+        # GORDON_WORKER_PROFILE picks the queues the worker consumes, so pull request checks can get workers
+        # of their own that a backlog of re-requested checks or bulk jobs never delays. GORDON_WORKER_QUEUES
+        # lists the queues explicitly instead. Queues renamed with the GORDON_QUEUE_* variables are consumed
+        # under their new names. The celery queue holds tasks published by earlier releases
+        QUEUE_PULL_REQUEST="${GORDON_QUEUE_PULL_REQUEST:-gordon.pull_request}"
+        QUEUE_REREQUEST="${GORDON_QUEUE_REREQUEST:-gordon.rerequest}"
+        QUEUE_CLOSED="${GORDON_QUEUE_CLOSED:-gordon.closed}"
+        QUEUE_BULK="${GORDON_QUEUE_BULK:-gordon.bulk}"
+        case "${GORDON_WORKER_PROFILE:-all}" in
+            all)         QUEUES="$QUEUE_PULL_REQUEST,$QUEUE_REREQUEST,$QUEUE_CLOSED,$QUEUE_BULK,celery" ;;
+            interactive) QUEUES="$QUEUE_PULL_REQUEST" ;;
+            rerequest)   QUEUES="$QUEUE_REREQUEST,$QUEUE_PULL_REQUEST" ;;
+            background)  QUEUES="$QUEUE_CLOSED,$QUEUE_BULK,celery" ;;
+            *)
+                echo "GORDON_WORKER_PROFILE must be set to 'all', 'interactive', 'rerequest' or 'background'"
+                exit 1
+        esac
+        CMD="celery -A gordon.worker.celery_initialization.celery worker -Q ${GORDON_WORKER_QUEUES:-$QUEUES} --loglevel=INFO"
+        ;;
+
+    beat)
+        CMD="celery -A gordon.worker.celery_initialization.celery beat --loglevel=INFO"
         ;;
 
     *)
-        echo $"GORDON_RUN_MODE must be set to 'api' or 'worker'"
+        echo $"GORDON_RUN_MODE must be set to 'api', 'api-async', 'worker' or 'beat'"
         exit 1
 
 esac
@@ -2,17 +2,33 @@
 Copyright (C) 2021 Twilio, Inc.
 """
 from celery import Celery
-from .api_server import create_app
-from . import *
 from gordon.configurations.celery_config_data import celery_config
+from gordon.services.celery_worker.task_routing import route_task
 
 
 def make_celery(app_name=__name__):
-    return Celery(
+    celery_app = Celery(
         celery_config["name"],
         backend=celery_config["broker"],
         broker=celery_config["backend"]
     )
+    celery_app.conf.update(
+        task_serializer=celery_config["task_serializer"],
+        accept_content=celery_config["accept_content"],
+        task_ignore_result=celery_config["task_ignore_result"],
+        worker_prefetch_multiplier=celery_config["worker_prefetch_multiplier"],
+        broker_transport_options=celery_config["broker_transport_options"],
+        task_routes=(route_task,)
+    )
+    return celery_app
 
 
 celery = make_celery()
+
+
+# The Flask app factory is only imported by the API, workers never load Flask
+def __getattr__(name):
+    if name == "create_app":
+        from gordon.api_server import create_app
+        return create_app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -18,7 +18,9 @@ def create_app(config_object_name=None,
     if config_dict is not None:
         app.config.from_mapping(config_dict)
 
-    from gordon.blueprints.blueprints import api_blueprint
+    from gordon.blueprints.blueprints import api_blueprint, start_journal_drainer
     app.register_blueprint(api_blueprint, url_prefix='/api/v1')
+    if not app.testing:
+        start_journal_drainer()
 
     return app
@@ -0,0 +1,133 @@
+from concurrent.futures import ThreadPoolExecutor
+from gordon import celery
+from gordon.blueprints import api_exceptions, blueprints
+from gordon.configurations.api_server_config_data import config_map
+from gordon.services.common import metrics
+from gordon.services.common.ingress_journal import JournalException
+from celery.utils.log import get_task_logger
+import asyncio
+import json
+import os
+logger = get_task_logger(__name__)
+
+API_PREFIX = "/api/v1"
+
+
+# Asynchronous counterpart of the Flask app, run by uvicorn when GORDON_RUN_MODE is api-async. It serves the same
+# routes with the same checks as the blueprint. An event loop reads bodies and verifies signatures for all pending
+# deliveries, and publishes run on a small thread pool. A slow broker then delays only the deliveries being published
+# rather than holding a whole process per request. The publishing threads share Celery's producer pool, which keeps
+# one broker connection per thread
+class AsgiApp:
+    def __init__(self, config):
+        self.max_content_length = config["MAX_CONTENT_LENGTH"]
+        self.publish_threads = config["ASGI_PUBLISH_THREADS"]
+        self.executor = None
+        self.routes = {
+            ("GET", f"{API_PREFIX}/healthcheck"): self.healthcheck,
+            ("POST", f"{API_PREFIX}/validate-aboutyaml"): self.webhook_handler
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        handler = self.routes.get((scope["method"], scope["path"]))
+        if handler is None:
+            code = 405 if any(path == scope["path"] for _, path in self.routes) else 404
+            await self.respond(send, code, {"code": code})
+            return
+        try:
+            code, response = await handler(scope, receive)
+        except api_exceptions.APIException as error:
+            code, response = error.code, error.to_dict()
+        await self.respond(send, code, response)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self.get_executor()
+                blueprints.start_journal_drainer()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self.executor is not None:
+                    self.executor.shutdown(wait=True)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def get_executor(self):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.publish_threads, thread_name_prefix="gordon-publish")
+        return self.executor
+
+    @staticmethod
+    async def respond(send, code, response):
+        body = json.dumps(response).encode()
+        await send({
+            "type": "http.response.start",
+            "status": code,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    # Reads the request body, rejecting it as soon as more than the configured limit arrived
+    async def read_body(self, receive):
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                raise api_exceptions.BadRequestException("Client disconnected")
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > self.max_content_length:
+                raise api_exceptions.PayloadTooLargeException("Payload too large")
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                return b"".join(chunks)
+
+    async def healthcheck(self, scope, receive):
+        return 200, {"healthcheck": "ready"}
+
+    async def webhook_handler(self, scope, receive):
+        headers = dict(scope["headers"])
+        event_type = headers.get(b"x-github-event", b"").decode() or None
+        sent_signature = headers.get(b"x-hub-signature", b"").decode() or None
+        delivery_id = headers.get(b"x-github-delivery", b"").decode() or None
+        content_length = headers.get(b"content-length")
+        blueprints.check_webhook_headers(
+            event_type, int(content_length) if content_length else None, self.max_content_length)
+
+        request_body = await self.read_body(receive)
+        webhook_payload, payload_event = blueprints.read_webhook(event_type, sent_signature, request_body)
+
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                self.get_executor(), blueprints.handle_webhook, webhook_payload, payload_event, delivery_id)
+        except JournalException as e:
+            logger.error(f"Failed queing celery task: {e}")
+            metrics.increment("webhook.rejected", tags={"reason": "not_queued"})
+            raise api_exceptions.ServiceUnavailableException("Webhook could not be queued")
+        except Exception as e:
+            logger.error(f"Failed queing celery task: {e}")
+
+        return 200, {"Status": 200}
+
+
+# Setting up the ASGI app, configured from the same settings as the Flask app
+def create_asgi_app(config_object_name=None, config_dict=None):
+    if config_object_name is None:
+        config_object_name = os.environ.get("GORDON_CONFIG", "default")
+    config_object = config_map.get(config_object_name)
+    config = {name: getattr(config_object, name) for name in dir(config_object) if name.isupper()}
+    if config_dict is not None:
+        config.update(config_dict)
+
+    # Every publishing thread keeps a broker connection, so none of them waits for another to release one
+    if celery.conf.broker_pool_limit is not None:
+        celery.conf.broker_pool_limit = max(celery.conf.broker_pool_limit, config["ASGI_PUBLISH_THREADS"])
+    return AsgiApp(config)
@@ -20,7 +20,7 @@ class APIException(Exception):
         self.value = value
         self.payload = payload
 
-    def jsonify(self):
+    def to_dict(self):
         response = dict(self.payload or ())
         response["code"] = self.code
         if self.message is not None:
@@ -32,7 +32,10 @@ class APIException(Exception):
         if self.field is not None and self.value is not None:
             response["field"] = self.field
             response["value"] = self.value
-        return jsonify(response)
+        return response
+
+    def jsonify(self):
+        return jsonify(self.to_dict())
 
 
 class BadRequestException(APIException):
@@ -62,6 +65,14 @@ class ResourceNotFoundException(APIException):
         )
 
 
+class PayloadTooLargeException(APIException):
+    def __init__(self, message):
+        APIException.__init__(
+            self,
+            code=413,
+            message=message)
+
+
 class UnprocessableEntityException(APIException):
     def __init__(self, message, errors):
         APIException.__init__(
@@ -77,3 +88,11 @@ class InternalServerErrorException(APIException):
             self,
             code=500,
             message=message)
+
+
+class ServiceUnavailableException(APIException):
+    def __init__(self, message):
+        APIException.__init__(
+            self,
+            code=503,
+            message=message)
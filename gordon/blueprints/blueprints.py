@@ -1,16 +1,27 @@
 from flask import Blueprint
-from flask import request, jsonify
+from flask import request, jsonify, current_app
 from . import api_exceptions
+from gordon.configurations.validator_config import ValidatorConfig
+from gordon.services.common import json_codec, metrics
+from gordon.services.common.ingress_journal import JournalException, get_ingress_journal
 from gordon.services.common.logger import get_logger
+from gordon.services.celery_worker.task_routing import WEBHOOK_TASK
 from gordon.services.github.sender_verification import SenderVerificationProcessor
-from gordon.services.celery_worker.webhook_async_processor import webhook_async
+from gordon.services.github.webhook_processor import WebhookProcessor
+from gordon.services.github.event_filter import get_event_filter
+from gordon.services.validator.pull_request_heads import get_pull_request_heads
+from gordon import celery
 
 import json
 import requests
+import uuid
 
 logger = get_logger()
 api_blueprint = Blueprint('api_blueprint', __name__)
 
+# Checks are enqueued by task name, so the API does not import the validators and their dependencies
+webhook_async = celery.signature(WEBHOOK_TASK)
+
 
 @api_blueprint.errorhandler(api_exceptions.APIException)
 def handleAPIException(error):
@@ -19,10 +30,42 @@ def handleAPIException(error):
     return response
 
 
-# Call to initiate a async celery task to process the received payload
-def handle_webhook(webhook_json, payload_event):
+def publish_task(task, countdown=None):
+    webhook_async.apply_async((task,), countdown=countdown)
+
+
+# Starts replaying webhooks journaled while the broker was unreachable, including those left by an earlier process
+def start_journal_drainer():
+    get_ingress_journal().start_drainer(publish_task)
+
+
+# Call to initiate a async celery task to process the received payload. Only the fields the worker uses are enqueued,
+# and events the worker would not act on, or of public and shared repos, are not enqueued at all. Events that cannot
+# be published are written to the ingress journal and published once the broker is reachable again
+def handle_webhook(webhook_json, payload_event, delivery_id=None):
+    event = WebhookProcessor(webhook_json).get_event(payload_event)
+    if event is None:
+        logger.debug(f"Ignoring {payload_event} event with action {webhook_json.get('action')}")
+        return
+    if get_event_filter().should_skip(event):
+        return
+    countdown = None
+    if event.event_type == "pull_request" and event.action != "closed":
+        # Validations queued for older commits of the pull request are superseded by this one
+        get_pull_request_heads().record_head(event.repo_name, event.pr_number, event.head_sha, event.updated_at)
+        countdown = ValidatorConfig().get_supersede_debounce() or None
     # call webhook processor in a celery worker file
-    webhook_async.delay(webhook_json, payload_event)
+    task = event.to_task()
+    try:
+        publish_task(task, countdown)
+    except Exception as e:
+        journal = get_ingress_journal()
+        if not journal.enabled:
+            raise
+        delivery_id = delivery_id or uuid.uuid4().hex
+        logger.error(f"Failed queing celery task, journaling delivery {delivery_id}: {e}")
+        journal.append(delivery_id, task, countdown)
+        start_journal_drainer()
 
 
 # Health check endpoint to see if the API server is up and running
@@ -31,30 +74,60 @@ def healthcheck():
     return json.dumps({"healthcheck": "ready"})
 
 
+# Rejects unsupported events and oversized bodies from the request headers alone, before the body is read
+def check_webhook_headers(event_type, content_length, max_content_length):
+    if not SenderVerificationProcessor.is_supported_event(event_type):
+        logger.debug(f"Ignoring unsupported event: {event_type}")
+        metrics.increment("webhook.rejected", tags={"reason": "unsupported_event"})
+        raise api_exceptions.BadRequestException("Invalid Sender")
+
+    if content_length is not None and content_length > max_content_length:
+        logger.error(f"Received a {content_length} byte {event_type} payload, above the configured limit")
+        metrics.increment("webhook.rejected", tags={"reason": "too_large"})
+        raise api_exceptions.PayloadTooLargeException("Payload too large")
+
+
+# Checks the signature of the raw body, so payloads not sent by Github are rejected without ever being parsed, and
+# returns the decoded payload with its event type
+def read_webhook(event_type, sent_signature, request_body):
+    sender_verify = SenderVerificationProcessor(event_type, sent_signature, request_body)
+    sender_check, payload_event = sender_verify.verify_sender()
+
+    if not sender_check:
+        metrics.increment("webhook.rejected", tags={"reason": "invalid_signature"})
+        raise api_exceptions.BadRequestException("Invalid Sender")
+
+    try:
+        webhook_payload = json_codec.loads(request_body)
+    except ValueError as e:
+        logger.error(f"Failed decoding {event_type} payload: {e}")
+        metrics.increment("webhook.rejected", tags={"reason": "invalid_json"})
+        raise api_exceptions.BadRequestException("Invalid payload")
+    return webhook_payload, payload_event
+
+
 # Route to be used in your Github app to receive the payload events and process the about.yaml file
 @api_blueprint.route('/validate-aboutyaml', methods=['POST'])
 def webhook_handler():
     event_type = request.headers.get('X-GitHub-Event')
     sent_signature = request.headers.get('X-Hub-Signature')
+    delivery_id = request.headers.get('X-GitHub-Delivery')
+    check_webhook_headers(event_type, request.content_length, current_app.config["MAX_CONTENT_LENGTH"])
 
     request_body = request.get_data()
-    webhook_payload = json.loads(request_body)
-    """
-    call SenderVerificationProcessor to process the payload and ensure it's in a consumable format and all the info
-    needed to run the status check is present in the PR payload
-    """
-    sender_verify = SenderVerificationProcessor(event_type, sent_signature, request_body)
-    sender_check, payload_event = sender_verify.verify_sender()
-
-    if not sender_check:
-        raise api_exceptions.BadRequestException("Invalid Sender")
+    webhook_payload, payload_event = read_webhook(event_type, sent_signature, request_body)
 
     """
     call checks api if sender verification passes
     create task to get diff, load plugins, and scan PR
     """
     try:
-        handle_webhook(webhook_payload, payload_event)
+        handle_webhook(webhook_payload, payload_event, delivery_id)
+    except JournalException as e:
+        # Neither queued nor journaled, Github reports the delivery as failed so it can be redelivered
+        logger.error(f"Failed queing celery task: {e}")
+        metrics.increment("webhook.rejected", tags={"reason": "not_queued"})
+        raise api_exceptions.ServiceUnavailableException("Webhook could not be queued")
     except Exception as e:
         logger.error(f"Failed queing celery task: {e}")
 
@@ -4,6 +4,10 @@ import os
 # Configuration settings for the Flask app created for this service
 class Config:
     LOG_LEVEL = os.environ.get("GORDON_LOG_LEVEL", "INFO")
+    # Largest webhook body accepted, Github does not deliver payloads above 25 MB
+    MAX_CONTENT_LENGTH = int(os.environ.get("GORDON_MAX_WEBHOOK_BYTES", str(25 * 1024 * 1024)))
+    # Threads each ASGI ingress process publishes tasks from, each holding one pooled broker connection while it does
+    ASGI_PUBLISH_THREADS = int(os.environ.get("GORDON_ASGI_PUBLISH_THREADS", "10"))
     # Should be loaded from secrets
 
     # Only ever set for mocks/tests
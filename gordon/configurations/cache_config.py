@@ -0,0 +1,53 @@
+from gordon.configurations.celery_config_data import celery_config
+import os
+
+
+# Configuration for the caches Gordon keeps in process memory and in the shared Redis instance
+class CacheConfig:
+    def get_redis_url(self):
+        redis_url = os.environ.get("GORDON_CACHE_REDIS_URL", celery_config["broker"])
+        return redis_url
+
+    def is_redis_enabled(self):
+        redis_enabled = os.environ.get("GORDON_CACHE_REDIS_ENABLED", "true") == "true"
+        return redis_enabled
+
+    def get_redis_timeout(self):
+        redis_timeout = float(os.environ.get("GORDON_CACHE_REDIS_TIMEOUT", "0.5"))
+        return redis_timeout
+
+    def get_token_refresh_margin(self):
+        refresh_margin = int(os.environ.get("GORDON_TOKEN_REFRESH_MARGIN", "300"))
+        return refresh_margin
+
+    def get_token_lock_timeout(self):
+        lock_timeout = int(os.environ.get("GORDON_TOKEN_LOCK_TIMEOUT", "10"))
+        return lock_timeout
+
+    def get_local_cache_size(self):
+        local_cache_size = int(os.environ.get("GORDON_LOCAL_CACHE_SIZE", "1024"))
+        return local_cache_size
+
+    def get_jira_ttls(self):
+        valid_ttl = int(os.environ.get("GORDON_JIRA_VALID_TTL", "3600"))
+        defunct_ttl = int(os.environ.get("GORDON_JIRA_DEFUNCT_TTL", "3600"))
+        not_found_ttl = int(os.environ.get("GORDON_JIRA_NOT_FOUND_TTL", "300"))
+        return valid_ttl, defunct_ttl, not_found_ttl
+
+    def get_pagerduty_ttls(self):
+        valid_ttl = int(os.environ.get("GORDON_PAGERDUTY_VALID_TTL", "3600"))
+        not_found_ttl = int(os.environ.get("GORDON_PAGERDUTY_NOT_FOUND_TTL", "300"))
+        stale_ttl = int(os.environ.get("GORDON_PAGERDUTY_STALE_TTL", "86400"))
+        return valid_ttl, not_found_ttl, stale_ttl
+
+    def get_validation_result_ttl(self):
+        validation_result_ttl = int(os.environ.get("GORDON_VALIDATION_RESULT_TTL", "300"))
+        return validation_result_ttl
+
+    def get_contents_ttl(self):
+        contents_ttl = int(os.environ.get("GORDON_CONTENTS_CACHE_TTL", "86400"))
+        return contents_ttl
+
+    def get_contents_max_bytes(self):
+        contents_max_bytes = int(os.environ.get("GORDON_CONTENTS_CACHE_MAX_BYTES", "65536"))
+        return contents_max_bytes
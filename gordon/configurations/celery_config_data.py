@@ -7,8 +7,21 @@ broker_port = os.environ.get("CELERY_BROKER_PORT", "6379")
 broker_db = os.environ.get("CELERY_BROKER_DATABASE", "1")
 broker = "redis://" + broker_host + ":" + broker_port + "/" + broker_db
 backend = broker
+# Tasks carry small WebhookEvent records, msgpack encodes them smaller and faster than json. json is still accepted for
+# tasks enqueued by earlier releases
+task_serializer = os.environ.get("CELERY_TASK_SERIALIZER", "msgpack")
+# Workers reserve one task at a time, so a task of a higher priority queue is not stuck behind tasks already reserved
+# from the other queues of the worker
+worker_prefetch_multiplier = int(os.environ.get("CELERY_WORKER_PREFETCH_MULTIPLIER", "1"))
 celery_config = {
     "name": name,
     "broker": broker,
-    "backend": backend
+    "backend": backend,
+    "task_serializer": task_serializer,
+    "accept_content": [task_serializer, "json"],
+    # Task results are never read, so they are not written to the backend
+    "task_ignore_result": True,
+    "worker_prefetch_multiplier": worker_prefetch_multiplier,
+    # One Redis list per priority, which workers pop from lowest priority first across all the queues they consume
+    "broker_transport_options": {"priority_steps": list(range(10)), "queue_order_strategy": "priority"}
 }
@@ -1,7 +1,16 @@
-from gordon.services.common.secrets_loader import get_secrets
+from gordon.services.common.secrets_loader import get_secrets, get_derived_secret
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import serialization
 import os
 
 
+def load_github_app_key(github_secrets):
+    integration_id = int(github_secrets["github_app_integration_id"])
+    private_key = serialization.load_pem_private_key(
+        github_secrets["github_app_pem_key"].encode(), password=None, backend=default_backend())
+    return integration_id, private_key
+
+
 # Configuration settings for loading the secrets and URLs needed when interacting with GitHub
 class GithubConfig:
     def get_github_secrets(self):
@@ -11,6 +20,10 @@ class GithubConfig:
         app_pem = _github_secrets["github_app_pem_key"]
         return integration_id, app_pem
 
+    # The integration id and private key of the Github App, the PEM key is parsed once per version of the secrets file
+    def get_github_app_key(self):
+        return get_derived_secret("SECRET_GITHUB_SECRET", "github_app_key", load_github_app_key)
+
     def get_github_webhook_secret(self):
         _github_secrets = get_secrets("SECRET_GITHUB_SECRET")
         webhook_secret = _github_secrets["webhook_secret"]
@@ -19,3 +32,18 @@ class GithubConfig:
     def get_github_api(self):
         gh_api = os.environ.get("GITHUB_API")
         return gh_api
+
+    # Calls an installation must have left for a check to start, checks queued while it has fewer wait for the reset
+    def get_rate_limit_reserve(self):
+        rate_limit_reserve = int(os.environ.get("GORDON_GITHUB_RATE_LIMIT_RESERVE", "20"))
+        return rate_limit_reserve
+
+    # Times a check is requeued while its installation is rate limited before it is dropped
+    def get_rate_limit_retries(self):
+        rate_limit_retries = int(os.environ.get("GORDON_GITHUB_RATE_LIMIT_RETRIES", "12"))
+        return rate_limit_retries
+
+    # How checks read repository data from Github, "rest" or "graphql"
+    def get_repository_backend(self):
+        repository_backend = os.environ.get("GORDON_GITHUB_BACKEND", "rest").lower()
+        return repository_backend
@@ -0,0 +1,37 @@
+import os
+
+
+# Configuration for the pooled HTTP sessions used for all outbound calls.
+# Timeouts can be overridden per service, e.g. GORDON_HTTP_JIRA_READ_TIMEOUT takes precedence over
+# GORDON_HTTP_READ_TIMEOUT
+class HttpConfig:
+    def get_pool_connections(self):
+        pool_connections = int(os.environ.get("GORDON_HTTP_POOL_CONNECTIONS", "4"))
+        return pool_connections
+
+    def get_pool_maxsize(self):
+        pool_maxsize = int(os.environ.get("GORDON_HTTP_POOL_MAXSIZE", "10"))
+        return pool_maxsize
+
+    def get_service_setting(self, service, name, default):
+        return os.environ.get(f"GORDON_HTTP_{service.upper()}_{name}", os.environ.get(f"GORDON_HTTP_{name}", default))
+
+    def get_timeouts(self, service):
+        connect_timeout = float(self.get_service_setting(service, "CONNECT_TIMEOUT", "3.05"))
+        read_timeout = float(self.get_service_setting(service, "READ_TIMEOUT", "10"))
+        return connect_timeout, read_timeout
+
+    def get_max_retries(self, service):
+        max_retries = int(self.get_service_setting(service, "MAX_RETRIES", "2"))
+        return max_retries
+
+    def get_backoff(self, service):
+        backoff_base = float(self.get_service_setting(service, "BACKOFF_BASE", "0.5"))
+        backoff_max = float(self.get_service_setting(service, "BACKOFF_MAX", "8"))
+        return backoff_base, backoff_max
+
+    def get_circuit_settings(self, service):
+        failure_threshold = int(self.get_service_setting(service, "CIRCUIT_FAILURES", "5"))
+        failure_window = int(self.get_service_setting(service, "CIRCUIT_WINDOW", "60"))
+        open_seconds = int(self.get_service_setting(service, "CIRCUIT_OPEN_SECONDS", "30"))
+        return failure_threshold, failure_window, open_seconds
@@ -6,3 +6,18 @@ class JIRAConfig:
     def get_jira_url(self):
         jira_url = os.environ.get("JIRA_API")
         return jira_url
+
+    # The project index lets checks look up Jira projects without calling Jira, "false" looks every project up live
+    def is_project_index_enabled(self):
+        index_enabled = os.environ.get("GORDON_JIRA_INDEX_ENABLED", "true") == "true"
+        return index_enabled
+
+    # Seconds between two loads of the project index by the Celery beat schedule
+    def get_project_index_refresh_interval(self):
+        refresh_interval = int(os.environ.get("GORDON_JIRA_INDEX_REFRESH_INTERVAL", "900"))
+        return refresh_interval
+
+    # Seconds workers keep using their copy of the project index before checking Redis for a newer one
+    def get_project_index_check_interval(self):
+        check_interval = float(os.environ.get("GORDON_JIRA_INDEX_CHECK_INTERVAL", "60"))
+        return check_interval
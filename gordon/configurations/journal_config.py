@@ -0,0 +1,26 @@
+import os
+import tempfile
+
+
+# Configuration for the local journal the API writes verified webhooks to while the Celery broker is unreachable
+class JournalConfig:
+    def is_journal_enabled(self):
+        journal_enabled = os.environ.get("GORDON_JOURNAL_ENABLED", "true") == "true"
+        return journal_enabled
+
+    # Must be on a persistent volume, the default in the temporary directory only suits local development
+    def get_journal_dir(self):
+        journal_dir = os.environ.get("GORDON_JOURNAL_DIR", os.path.join(tempfile.gettempdir(), "gordon-journal"))
+        return journal_dir
+
+    def get_segment_bytes(self):
+        segment_bytes = int(os.environ.get("GORDON_JOURNAL_SEGMENT_BYTES", str(16 * 1024 * 1024)))
+        return segment_bytes
+
+    def get_drain_interval(self):
+        drain_interval = float(os.environ.get("GORDON_JOURNAL_DRAIN_INTERVAL", "5"))
+        return drain_interval
+
+    def get_delivery_ttl(self):
+        delivery_ttl = int(os.environ.get("GORDON_JOURNAL_DELIVERY_TTL", "86400"))
+        return delivery_ttl
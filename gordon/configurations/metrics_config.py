@@ -0,0 +1,16 @@
+import os
+
+
+# Configuration for the DogStatsD agent Gordon reports its metrics to
+class MetricsConfig:
+    def get_statsd_host(self):
+        statsd_host = os.environ.get("DD_AGENT_HOST", "localhost")
+        return statsd_host
+
+    def get_statsd_port(self):
+        statsd_port = int(os.environ.get("DD_DOGSTATSD_PORT", "8125"))
+        return statsd_port
+
+    def is_metrics_enabled(self):
+        metrics_enabled = os.environ.get("GORDON_METRICS_ENABLED", "true") == "true"
+        return metrics_enabled
@@ -0,0 +1,20 @@
+import os
+
+# Classes of tasks, each published to its own queue. pull_request is the validation of pushed commits developers wait
+# on, rerequest the checks re-run from the Github UI or by a backfill, closed the notifications of closed pull requests
+# and bulk the scheduled jobs such as the Jira project index refresh
+EVENT_CLASSES = ("pull_request", "rerequest", "closed", "bulk")
+# Redis serves lower priorities first, across all the queues a worker consumes
+DEFAULT_PRIORITIES = {"pull_request": 0, "rerequest": 3, "closed": 6, "bulk": 9}
+
+
+# Configuration of the Celery queues and priorities of each class of tasks
+class QueueConfig:
+    def get_queue(self, event_class):
+        queue = os.environ.get(f"GORDON_QUEUE_{event_class.upper()}", f"gordon.{event_class}")
+        return queue
+
+    def get_priority(self, event_class):
+        priority = int(os.environ.get(f"GORDON_QUEUE_{event_class.upper()}_PRIORITY",
+                                      str(DEFAULT_PRIORITIES[event_class])))
+        return priority
@@ -0,0 +1,68 @@
+import os
+
+SERVICES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "services")
+SHARED_REPOS_DIR = os.path.join(SERVICES_DIR, "celery_worker")
+SCHEMAS_DIR = os.path.join(SERVICES_DIR, "validator")
+
+
+# Configuration for how the about.yaml validators run
+class ValidatorConfig:
+    def is_concurrent_validation_enabled(self):
+        concurrent_validation = os.environ.get("GORDON_CONCURRENT_VALIDATION", "true") == "true"
+        return concurrent_validation
+
+    def get_validation_threads(self):
+        validation_threads = int(os.environ.get("GORDON_VALIDATION_THREADS", "4"))
+        return validation_threads
+
+    # Seconds a re-run check that reuses its check run may take before the run is moved back to in_progress,
+    # quicker checks only send their conclusion
+    def get_check_in_progress_delay(self):
+        in_progress_delay = float(os.environ.get("GORDON_CHECK_IN_PROGRESS_DELAY", "2"))
+        return in_progress_delay
+
+    # Shared repos are skipped by the validator, either "default" or "acquisition"
+    def get_shared_repos_file(self, validator):
+        shared_repos_file = os.environ.get(f"GORDON_{validator.upper()}_SHARED_REPOS",
+                                           os.path.join(SHARED_REPOS_DIR, f"{validator}_shared_repos.json"))
+        return shared_repos_file
+
+    # Directory of the about.yaml schemas of the validator, either "default" or "acquisition". Every JSON file in it is
+    # one schema version and valid_scehmas/<validator>_v<version>.txt its help text
+    def get_schema_dir(self, validator):
+        schema_dir = os.environ.get(f"GORDON_{validator.upper()}_SCHEMA_DIR", os.path.join(SCHEMAS_DIR, validator))
+        return schema_dir
+
+    # Seconds between checks of the schema directories for added or changed schema versions
+    def get_schema_reload_interval(self):
+        reload_interval = float(os.environ.get("GORDON_SCHEMA_RELOAD_INTERVAL", "30"))
+        return reload_interval
+
+    # Largest about.yaml parsed, larger files fail to load like malformed ones
+    def get_about_yaml_max_bytes(self):
+        max_bytes = int(os.environ.get("GORDON_ABOUT_YAML_MAX_BYTES", "65536"))
+        return max_bytes
+
+    # Most YAML nodes an about.yaml may have, scalars and the keys and values of mappings each count as one
+    def get_about_yaml_max_nodes(self):
+        max_nodes = int(os.environ.get("GORDON_ABOUT_YAML_MAX_NODES", "1000"))
+        return max_nodes
+
+    # Seconds a completed validation of a head SHA is reused by duplicate events, 0 disables deduplication
+    def get_dedup_window(self):
+        dedup_window = int(os.environ.get("GORDON_DEDUP_WINDOW", "300"))
+        return dedup_window
+
+    # Seconds a validation in progress blocks duplicates, bounds how long a crashed worker holds a head SHA
+    def get_dedup_in_flight_ttl(self):
+        in_flight_ttl = int(os.environ.get("GORDON_DEDUP_IN_FLIGHT_TTL", "900"))
+        return in_flight_ttl
+
+    def is_supersede_enabled(self):
+        supersede_enabled = os.environ.get("GORDON_SUPERSEDE_ENABLED", "true") == "true"
+        return supersede_enabled
+
+    # Seconds pull request validations wait in the queue, so a burst of pushes only validates the last commit
+    def get_supersede_debounce(self):
+        debounce = float(os.environ.get("GORDON_SUPERSEDE_DEBOUNCE", "0"))
+        return debounce
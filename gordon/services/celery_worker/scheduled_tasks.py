@@ -0,0 +1,28 @@
+from gordon import celery
+from celery.utils.log import get_task_logger
+from gordon.configurations.ad_user_config import ADUser
+from gordon.configurations.jira_config import JIRAConfig
+
+logger = get_task_logger(__name__)
+
+
+# Loads every Jira project into the project index, run by the Celery beat schedule. A failed load leaves the previous
+# index in place until it expires, checks look projects up live meanwhile
+@celery.task
+def refresh_jira_index():
+    from gordon.services.validator.jira_lookup import get_jira_index
+    try:
+        get_jira_index().refresh(JIRAConfig().get_jira_url(), ADUser().get_ad_creds())
+    except Exception as e:
+        logger.error(f"Failed refreshing Jira project index: {e}")
+
+
+def get_beat_schedule():
+    schedule = {}
+    jira_config = JIRAConfig()
+    if jira_config.is_project_index_enabled():
+        schedule["refresh-jira-index"] = {
+            "task": refresh_jira_index.name,
+            "schedule": jira_config.get_project_index_refresh_interval()
+        }
+    return schedule
@@ -0,0 +1,56 @@
+from gordon.configurations.queue_config import QueueConfig
+from gordon.services.common import metrics
+from celery.signals import before_task_publish, task_prerun
+from datetime import datetime, timezone
+import time
+
+WEBHOOK_TASK = "gordon.services.celery_worker.webhook_async_processor.webhook_async"
+BULK_TASKS = frozenset(["gordon.services.celery_worker.scheduled_tasks.refresh_jira_index"])
+PUBLISHED_AT_HEADER = "gordon_published_at"
+
+
+# Class of a webhook task, from the WebhookEvent fields the API enqueues or the full payload and event enqueued by
+# earlier releases
+def get_event_class(event_fields, payload_event=None):
+    event_type = payload_event or event_fields.get("event_type")
+    if event_type == "pull_request":
+        return "closed" if event_fields.get("action") == "closed" else "pull_request"
+    return "rerequest"
+
+
+# Celery router publishing each class of tasks to its own queue with the priority configured for the class. Tasks
+# requeued with retry keep the queue they were consumed from
+def route_task(name, args, kwargs, options, task=None, **kw):
+    if name == WEBHOOK_TASK and args:
+        payload_event = args[1] if len(args) > 1 else (kwargs or {}).get("payload_event")
+        event_class = get_event_class(args[0], payload_event)
+    elif name in BULK_TASKS:
+        event_class = "bulk"
+    else:
+        return None
+    queue_config = QueueConfig()
+    return {"queue": queue_config.get_queue(event_class), "priority": queue_config.get_priority(event_class)}
+
+
+@before_task_publish.connect
+def stamp_published_at(headers=None, **kwargs):
+    if headers is not None:
+        headers.setdefault(PUBLISHED_AT_HEADER, time.time())
+
+
+# Reports the milliseconds a task waited in its queue before a worker started it in gordon.queue.wait, tagged with
+# the queue. Tasks published with a countdown are measured from their ETA
+@task_prerun.connect
+def record_queue_wait(task=None, **kwargs):
+    published_at = getattr(task.request, PUBLISHED_AT_HEADER, None) if task is not None else None
+    if published_at is None:
+        return
+    ready_at = published_at
+    if task.request.eta:
+        eta = datetime.fromisoformat(task.request.eta)
+        if eta.tzinfo is None:
+            eta = eta.replace(tzinfo=timezone.utc)
+        ready_at = max(ready_at, eta.timestamp())
+    delivery_info = task.request.delivery_info or {}
+    queue = delivery_info.get("routing_key") or "unknown"
+    metrics.histogram("queue.wait", max(time.time() - ready_at, 0) * 1000, tags={"queue": queue})
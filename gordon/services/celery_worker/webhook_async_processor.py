@@ -1,150 +1,181 @@
 from gordon import celery
 from celery.utils.log import get_task_logger
+import random
 from gordon.services.github.webhook_processor import WebhookProcessor
+from gordon.services.github.webhook_event import WebhookEvent
+from gordon.services.github.event_filter import get_event_filter, get_validator_name
 from gordon.configurations.github_config import GithubConfig
 from gordon.services.github.github_service import GithubService, GithubAppService
+from gordon.services.github.check_run_manager import CheckRunManager
+from gordon.services.github import rate_limit
+from gordon.services.github.rate_limit import RateLimitedException, get_rate_limit_scheduler
+from gordon.services.common import call_counter, metrics
 from gordon.services.common.slack_notification import SlackService
 from gordon.services.validator.default.default_file_validator import DefaultFileValidator
 from gordon.services.validator.acquisition.acquisition_file_validator import AcquistionFileValidator
-import json
-import os
+from gordon.services.validator.validation_registry import get_validation_registry
+from gordon.services.validator.pull_request_heads import get_pull_request_heads
 
 logger = get_task_logger(__name__)
 
+RATE_LIMITED_MESSAGE = "Check cancelled because Gordon is rate limited by Github, please re-run the check"
 
-# Main celery function called to split out the tasks based on the event_type and action received on the Github payload
-@celery.task
-def webhook_async(webhook_json, payload_event):
+
+# Main celery function called to split out the tasks based on the event_type and action received on the Github payload.
+# The API enqueues the fields of a WebhookEvent, tasks enqueued by earlier releases carry the full payload and its event.
+# Checks of an installation that is out of Github calls are requeued until its quota resets
+@celery.task(bind=True)
+def webhook_async(self, event_fields, payload_event=None):
     try:
-        shared_repo = False
-        repo_url = webhook_json["repository"]["html_url"]
-        github_organisation = webhook_json["repository"]["owner"]["login"]
-        private_repo = webhook_json["repository"]["private"]
-
-        # If Github org is in the acquisition list then initiate the acquisition relevant methods defined in
-        # gordon/services/validator/acquisition/acquisition_file_validator
-        if github_organisation in ["acquisition1", "acquisition2"]:
-            if not private_repo:
-                pass
-            else:
-                # Check if the repo received is a shared repo and shouldn't be included in this status check.
-                # If yes, then skip the check. Else, continue processing the request
-                with open(os.path.dirname(os.path.realpath(__file__)) + "/acquisition_shared_repos.json") as shared_file:
-                    shared_json = json.loads(shared_file.read())
-
-                    for name, url in shared_json.items():
-                        if url == repo_url or url == repo_url + "/":
-                            shared_repo = True
-                if not shared_repo:
-                    processor(webhook_json, payload_event, github_organisation)
-
-        # Default handler call if the organization need not be filtered for custom acquisition specific checks
-        # Defaults to calling methods under gordon/services/validator/default/default_file_validator
+        if payload_event is not None:
+            event = WebhookProcessor(event_fields).get_event(payload_event)
+            if event is None:
+                return
         else:
-            if not private_repo:
-                pass
-            else:
-                # Check if the repo received is a shared repo and shouldn't be included in this status check.
-                # If yes, then skip the check. Else, continue
-                with open(os.path.dirname(os.path.realpath(__file__)) + "/default_shared_repos.json") as shared_file:
-                    shared_json = json.loads(shared_file.read())
-
-                    for name, url in shared_json.items():
-                        if url == repo_url or url == repo_url + "/":
-                            shared_repo = True
-                if not shared_repo:
-                    processor(webhook_json, payload_event, github_organisation)
+            event = WebhookEvent.from_task(event_fields)
+
+        # The API already drops events of public and shared repos, this covers tasks it enqueued before a shared
+        # repos list changed
+        if get_event_filter().should_skip(event):
+            return
+
+        # If Github org is in the acquisition list then the acquisition relevant methods defined in
+        # gordon/services/validator/acquisition/acquisition_file_validator are used, otherwise the methods under
+        # gordon/services/validator/default/default_file_validator
+        with call_counter.count_calls() as calls, rate_limit.installation(event.installation_id):
+            get_rate_limit_scheduler().check_quota(event.installation_id)
+            processor(event, event.organization)
+        metrics.histogram("github.api_calls", calls["github"], tags={"event": event.event_type})
+
+    except RateLimitedException as r:
+        max_retries = GithubConfig().get_rate_limit_retries()
+        if self.request.retries >= max_retries:
+            logger.error(f"Dropping check of {event.repo_name}@{event.head_sha} after {max_retries} retries: {r}")
+            cancel_rate_limited_check(event, r.check_run_url or event.check_run_url)
+            return
+        # Jitter spreads the checks requeued by one installation over the seconds after its quota resets
+        countdown = r.retry_after + random.uniform(0, 10)
+        event = event._replace(check_run_url=r.check_run_url or event.check_run_url)
+        raise self.retry(args=(event.to_task(),), kwargs={}, countdown=countdown, max_retries=max_retries)
 
     except Exception as e:
         logger.error(f" Exception: {e}")
 
 
 # A method to act as a sorter for the payload event received and take the appropriate action
-def processor(webhook_json, payload_event, github_organisation):
-    pr_webhook_processor = WebhookProcessor(webhook_json)
-    if payload_event == "check_run" and pr_webhook_processor.checkrun_processor():
-        checkrun_setup(webhook_json, github_organisation)
+def processor(event, github_organisation):
+    if event.event_type == "check_run":
+        deduplicated_setup(checkrun_setup, event, github_organisation)
 
-    elif payload_event == "check_suite" and pr_webhook_processor.checksuite_processor():
-        checksuite_setup(webhook_json, github_organisation)
+    elif event.event_type == "check_suite":
+        deduplicated_setup(checksuite_setup, event, github_organisation)
 
-    elif payload_event == "pull_request":
-        if pr_webhook_processor.pr_processor():
-            open_pull_request_setup(webhook_json, github_organisation)
+    elif event.event_type == "pull_request":
+        if event.action in ["opened", "synchronize", "reopened"]:
+            deduplicated_setup(open_pull_request_setup, event, github_organisation)
 
         """
         Remove the below section from comments if you want slack notifications for when
         PRs are closed without valid about.yaml files
         """
-        # elif pr_webhook_processor.pr_closed():
-        #     closed_pull_request_setup(webhook_json, github_organisation)
+        # elif event.action == "closed":
+        #     closed_pull_request_setup(event, github_organisation)
+
+
+# Runs a check unless a newer commit was pushed to the pull request since the event was queued, or another event
+# already validated the same head SHA of the repo with the same validator or is validating it right now.
+# Checks that were cancelled or failed are not reused, and re-runs requested from the Github UI only wait for a check
+# in progress
+def deduplicated_setup(setup, event, github_organisation):
+    if get_pull_request_heads().is_superseded(event.repo_name, event.pr_number, event.head_sha, "queued"):
+        return
+
+    registry = get_validation_registry()
+    claim = registry.claim(event.repo_name, event.head_sha, get_validator_name(github_organisation),
+                           rerun=event.action == "rerequested")
+    if not claim.should_run:
+        return
+
+    try:
+        file_handler = setup(event, github_organisation)
+    except Exception:
+        registry.release(claim)
+        raise
+    if file_handler.cancelled:
+        registry.release(claim)
+    else:
+        registry.complete(claim)
 
 
 # This is to initiate process a payload of X-GitHub-Event: check_run header
-def checkrun_setup(webhook_json, github_organisation):
-    head_sha = webhook_json["check_run"]["head_sha"]
-    check_url = webhook_json["repository"]["url"]
-    repo_name = webhook_json["repository"]["full_name"]
-    install_id = webhook_json["installation"]["id"]
-    pr_number = webhook_json["check_run"]["pull_requests"][0]["number"]
-    checkrun_payload = create_check_run(head_sha, check_url, install_id)
-    run_url = checkrun_payload["html_url"]
+def checkrun_setup(event, github_organisation):
+    head_sha = event.head_sha
+    check_url = event.check_url
+    repo_name = event.repo_name
+    install_id = event.installation_id
+    pr_number = event.pr_number
+    # The re-requested run is the gordon run of the commit, it is concluded again instead of adding a run
+    check_run = create_check_run(head_sha, check_url, install_id, check_run_url=event.check_run_url or event.source_url)
+    run_url = check_run.url
     logger.info(f"Processing check run: {run_url}")
 
     if github_organisation in ["acquisition1", "acquisition2"]:
-        file_handler = AcquistionFileValidator(checkrun_payload, repo_name, head_sha, install_id, pr_number)
+        file_handler = AcquistionFileValidator(check_run, repo_name, head_sha, install_id, pr_number)
     else:
-        file_handler = DefaultFileValidator(checkrun_payload, repo_name, head_sha, install_id, pr_number)
+        file_handler = DefaultFileValidator(check_run, repo_name, head_sha, install_id, pr_number)
     file_handler.check_executor()
     logger.info(f"Completed processing check run: {run_url}")
+    return file_handler
 
 
 # This is to initiate process a payload of X-GitHub-Event: check_suite header
-def checksuite_setup(webhook_json, github_organisation):
-    head_sha = webhook_json["check_suite"]["head_sha"]
-    check_url = webhook_json["repository"]["url"]
-    repo_name = webhook_json["repository"]["full_name"]
-    install_id = webhook_json["installation"]["id"]
-    suite_url = webhook_json["check_suite"]["url"]
-    pr_number = webhook_json["check_suite"]["pull_requests"][0]["number"]
-    checkrun_payload = create_check_run(head_sha, check_url, install_id)
-    run_url = checkrun_payload["html_url"]
+def checksuite_setup(event, github_organisation):
+    head_sha = event.head_sha
+    check_url = event.check_url
+    repo_name = event.repo_name
+    install_id = event.installation_id
+    suite_url = event.source_url
+    pr_number = event.pr_number
+    check_run = create_check_run(head_sha, check_url, install_id, check_run_url=event.check_run_url, reuse=True)
+    run_url = check_run.url
     logger.info(f"Processing check run: {run_url} under the check suite: {suite_url}")
 
     if github_organisation in ["acquisition1", "acquisition2"]:
-        file_handler = AcquistionFileValidator(checkrun_payload, repo_name, head_sha, install_id, pr_number)
+        file_handler = AcquistionFileValidator(check_run, repo_name, head_sha, install_id, pr_number)
     else:
-        file_handler = DefaultFileValidator(checkrun_payload, repo_name, head_sha, install_id, pr_number)
+        file_handler = DefaultFileValidator(check_run, repo_name, head_sha, install_id, pr_number)
     file_handler.check_executor()
     logger.info(f"Completed processing check run: {run_url} under the check suite: {suite_url}")
+    return file_handler
 
 
 # This is to initiate process a payload of X-GitHub-Event: pull_request header
-def open_pull_request_setup(webhook_json, github_organisation):
-    head_sha = webhook_json["pull_request"]["head"]["sha"]
-    check_url = webhook_json["pull_request"]["base"]["repo"]["url"]
-    repo_name = webhook_json["repository"]["full_name"]
-    install_id = webhook_json["installation"]["id"]
-    pr_url = webhook_json["pull_request"]["html_url"]
-    checkrun_payload = create_check_run(head_sha, check_url, install_id)
-    pr_number = webhook_json["number"]
+def open_pull_request_setup(event, github_organisation):
+    head_sha = event.head_sha
+    check_url = event.check_url
+    repo_name = event.repo_name
+    install_id = event.installation_id
+    pr_url = event.source_url
+    check_run = create_check_run(head_sha, check_url, install_id, check_run_url=event.check_run_url)
+    pr_number = event.pr_number
     logger.info(f"Processing PR: {pr_url}")
 
     if github_organisation in ["acquisition1", "acquisition2"]:
-        file_handler = AcquistionFileValidator(checkrun_payload, repo_name, head_sha, install_id, pr_number)
+        file_handler = AcquistionFileValidator(check_run, repo_name, head_sha, install_id, pr_number)
     else:
-        file_handler = DefaultFileValidator(checkrun_payload, repo_name, head_sha, install_id, pr_number)
+        file_handler = DefaultFileValidator(check_run, repo_name, head_sha, install_id, pr_number)
     file_handler.check_executor()
     logger.info(f"Completed processing PR: {pr_url}")
+    return file_handler
 
 
 # Method to process closed pull requests and notify a monitored Slack channel of all the repositories with
 # an invalid about.yaml file
-def closed_pull_request_setup(webhook_json, github_organisation):
-    head_sha = webhook_json["pull_request"]["head"]["sha"]
-    check_url = webhook_json["pull_request"]["base"]["repo"]["url"]
-    install_id = webhook_json["installation"]["id"]
-    pr_url = webhook_json["pull_request"]["html_url"]
+def closed_pull_request_setup(event, github_organisation):
+    head_sha = event.head_sha
+    check_url = event.check_url
+    install_id = event.installation_id
+    pr_url = event.source_url
     gh_app_service = GithubAppService()
     gh_api = GithubConfig().get_github_api()
     git_token = gh_app_service.get_github_app_token(gh_api, install_id)
@@ -164,11 +195,28 @@ def closed_pull_request_setup(webhook_json, github_organisation):
     logger.info(f"Completed processing PR: {pr_url}")
 
 
-def create_check_run(head_sha, check_url, install_id):
+# Concludes the check run of a check dropped after its rate limit retries as cancelled, so the commit is not left with
+# a check in progress. The installation may still be out of Github calls, so this is best effort
+def cancel_rate_limited_check(event, check_run_url):
+    if not check_run_url:
+        return
+    try:
+        gh_api = GithubConfig().get_github_api()
+        git_token = GithubAppService().get_github_app_token(gh_api, event.installation_id)
+        CheckRunManager(GithubService(gh_api, git_token), event.head_sha, event.check_url, check_run_url,
+                        in_progress_delay=0).complete(RATE_LIMITED_MESSAGE, conclusion="cancelled")
+    except Exception as e:
+        logger.error(f"Failed cancelling rate limited check run {check_run_url}: {e}")
+
+
+# Starts the gordon check run of a commit. A run is created unless the url of the run to reuse is given, or reuse is
+# set and the commit already has a gordon run
+def create_check_run(head_sha, check_url, install_id, check_run_url=None, reuse=False):
     gh_app_service = GithubAppService()
     gh_api = GithubConfig().get_github_api()
     git_token = gh_app_service.get_github_app_token(gh_api, install_id)
 
     gh_service = GithubService(gh_api, git_token)
-    checkrun_payload = gh_service.initiate_check_run(head_sha, check_url)
-    return checkrun_payload
+    if check_run_url is None and reuse:
+        check_run_url = gh_service.find_check_run(head_sha, check_url)
+    return CheckRunManager(gh_service, head_sha, check_url, check_run_url).start()
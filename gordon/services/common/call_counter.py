@@ -0,0 +1,27 @@
+from collections import Counter
+import contextlib
+import contextvars
+import threading
+
+_current_counter = contextvars.ContextVar("gordon_call_counter", default=None)
+_lock = threading.Lock()
+
+
+# Counts the outbound calls made while the block runs, per service and per (service, method), e.g. to check the
+# Github API calls one event costs. Threads started inside the block only count when they run in a copy of its context
+@contextlib.contextmanager
+def count_calls():
+    counter = Counter()
+    token = _current_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _current_counter.reset(token)
+
+
+def record_call(service, method):
+    counter = _current_counter.get()
+    if counter is not None:
+        with _lock:
+            counter[service] += 1
+            counter[(service, method.upper())] += 1
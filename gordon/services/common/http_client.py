@@ -0,0 +1,126 @@
+from gordon.configurations.http_config import HttpConfig
+from gordon.services.common import metrics
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlsplit
+import threading
+import requests
+import os
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+# HTTP adapter keeping a persistent connection pool for one host and counting how many new connections its requests
+# needed, so connection reuse can be verified per host
+class PooledHTTPAdapter(HTTPAdapter):
+    def __init__(self, host, stats, **kwargs):
+        self.host = host
+        self.stats = stats
+        super(PooledHTTPAdapter, self).__init__(**kwargs)
+
+    def count_connections(self):
+        connections = 0
+        pools = self.poolmanager.pools
+        for pool_key in list(pools.keys()):
+            pool = pools.get(pool_key)
+            if pool is not None:
+                connections += pool.num_connections
+        return connections
+
+    def send(self, request, **kwargs):
+        connections_before = self.count_connections()
+        try:
+            return super(PooledHTTPAdapter, self).send(request, **kwargs)
+        finally:
+            new_connections = max(self.count_connections() - connections_before, 0)
+            self.stats["requests"] += 1
+            self.stats["new_connections"] += new_connections
+            metrics.increment("http.requests", tags={"host": self.host})
+            if new_connections:
+                metrics.increment("http.new_connections", new_connections, tags={"host": self.host})
+
+
+# Per process registry of keep-alive sessions, one per scheme, host and port.
+# The registry is emptied in forked children so Celery prefork workers and gunicorn workers open their own
+# connections instead of sharing the parent's sockets
+class HttpClientRegistry:
+    def __init__(self):
+        self.sessions = {}
+        self.stats = {}
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+
+    def reset(self):
+        self.sessions = {}
+        self.stats = {}
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def host_key(url):
+        parts = urlsplit(url)
+        scheme = parts.scheme or "https"
+        port = parts.port or DEFAULT_PORTS.get(scheme)
+        return f"{scheme}://{parts.hostname}:{port}"
+
+    def get_session(self, url):
+        if self.pid != os.getpid():
+            self.reset()
+
+        host = self.host_key(url)
+        session = self.sessions.get(host)
+        if session is not None:
+            return session
+
+        with self.lock:
+            if host not in self.sessions:
+                http_config = HttpConfig()
+                stats = {"requests": 0, "new_connections": 0}
+                adapter = PooledHTTPAdapter(host, stats,
+                                            pool_connections=http_config.get_pool_connections(),
+                                            pool_maxsize=http_config.get_pool_maxsize())
+                session = requests.Session()
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self.stats[host] = stats
+                self.sessions[host] = session
+            return self.sessions[host]
+
+    def get_connection_stats(self):
+        connection_stats = {}
+        for host, stats in list(self.stats.items()):
+            connection_stats[host] = {
+                "requests": stats["requests"],
+                "new_connections": stats["new_connections"],
+                "reused_connections": stats["requests"] - stats["new_connections"]
+            }
+        return connection_stats
+
+
+_registry = HttpClientRegistry()
+os.register_at_fork(after_in_child=_registry.reset)
+
+
+def get_session(url):
+    return _registry.get_session(url)
+
+
+# Drop-in replacement for requests.request() that sends the request over the pooled session of the target host
+def request(method, url, **kwargs):
+    return get_session(url).request(method, url, **kwargs)
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+
+def patch(url, **kwargs):
+    return request("PATCH", url, **kwargs)
+
+
+# Returns requests, new connections and reused connections per host for the current process
+def get_connection_stats():
+    return _registry.get_connection_stats()
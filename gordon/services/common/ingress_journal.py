@@ -0,0 +1,268 @@
+from gordon.configurations.journal_config import JournalConfig
+from gordon.services.common import metrics
+from gordon.services.common.redis_client import get_redis_client, mark_redis_unavailable
+from collections import OrderedDict
+from celery.utils.log import get_task_logger
+import threading
+import struct
+import fcntl
+import mmap
+import json
+import time
+import zlib
+import os
+
+logger = get_task_logger(__name__)
+
+# Every record is its length and CRC32 followed by the JSON encoded record
+RECORD_HEADER = struct.Struct(">II")
+OPEN_SUFFIX = ".open"
+# Segments are created under a temporary name the drainer ignores until their process holds the lock on them
+NEW_SUFFIX = ".new"
+SEGMENT_SUFFIX = ".log"
+DRAIN_LOCK = "drain.lock"
+DELIVERY_KEY_PREFIX = "gordon:delivery"
+# Replayed delivery IDs remembered in process memory in front of Redis
+MAX_LOCAL_DELIVERIES = 10000
+
+
+class JournalException(Exception):
+    pass
+
+
+# Reads the records of a segment through a read only memory map. A record cut short or failing its checksum can only
+# be the last one, written by a process that died while appending it, and ends the segment
+def read_records(path):
+    records = []
+    with open(path, "rb") as segment_file:
+        size = os.fstat(segment_file.fileno()).st_size
+        if size == 0:
+            return records
+        with mmap.mmap(segment_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            offset = 0
+            while offset + RECORD_HEADER.size <= size:
+                length, crc = RECORD_HEADER.unpack_from(data, offset)
+                start = offset + RECORD_HEADER.size
+                record = data[start:start + length]
+                if len(record) < length or zlib.crc32(record) != crc:
+                    logger.error(f"Ignoring torn record at offset {offset} of journal segment {path}")
+                    break
+                records.append(json.loads(record))
+                offset = start + length
+    return records
+
+
+# Append only journal of verified webhooks the API could not publish to the Celery broker, kept on local disk until a
+# drainer replays them. Each process appends to its own segment, which it holds an exclusive lock on and renames from
+# .open to .log once it is larger than GORDON_JOURNAL_SEGMENT_BYTES or the drainer runs. Appends return once the record
+# is fsync'ed, concurrent appends share the fsync of whichever came first. The drainer replays closed segments in the
+# order they were written, in one process at a time, skipping delivery IDs already replayed by any API process, and
+# deletes each segment once all its records were published
+class IngressJournal:
+    def __init__(self, directory=None, segment_bytes=None, drain_interval=None, delivery_ttl=None, enabled=None):
+        journal_config = JournalConfig()
+        self.enabled = enabled if enabled is not None else journal_config.is_journal_enabled()
+        self.directory = directory or journal_config.get_journal_dir()
+        self.segment_bytes = segment_bytes or journal_config.get_segment_bytes()
+        self.drain_interval = drain_interval or journal_config.get_drain_interval()
+        self.delivery_ttl = delivery_ttl or journal_config.get_delivery_ttl()
+        self.lock = threading.Lock()
+        self.sync_lock = threading.Lock()
+        self.segment = None
+        self.segment_path = None
+        self.segment_pid = None
+        self.written = 0
+        self.synced = 0
+        self.deliveries = OrderedDict()
+        self.drainer = None
+        self.drainer_pid = None
+
+    def sync_directory(self):
+        fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def open_segment(self):
+        # A forked process never appends to the segment of its parent
+        if self.segment is not None and self.segment_pid == os.getpid():
+            return self.segment
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{time.time_ns():020d}-{os.getpid()}")
+        # Locked before it is renamed to .open, so a drainer never takes an open segment for the orphan of a dead
+        # process between its creation and its lock
+        segment = open(path + NEW_SUFFIX, "ab", buffering=0)
+        try:
+            fcntl.flock(segment.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            os.rename(path + NEW_SUFFIX, path + OPEN_SUFFIX)
+        except OSError:
+            segment.close()
+            raise
+        self.segment, self.segment_path = segment, path + OPEN_SUFFIX
+        self.segment_pid = os.getpid()
+        self.sync_directory()
+        return self.segment
+
+    # Closes the current segment so it can be drained, must be called holding the lock
+    def rotate(self):
+        if self.segment is None or self.segment_pid != os.getpid():
+            self.segment = None
+            return
+        os.fsync(self.segment.fileno())
+        os.rename(self.segment_path, self.segment_path[:-len(OPEN_SUFFIX)] + SEGMENT_SUFFIX)
+        self.sync_directory()
+        self.segment.close()
+        self.segment = None
+        self.synced = self.written
+
+    def append(self, delivery_id, task, countdown=None):
+        """
+        :param delivery_id: X-GitHub-Delivery ID of the webhook, the record is replayed once per ID
+        :param task: arguments of the webhook task
+        :param countdown: countdown the task was to be published with
+        """
+        record = json.dumps({"delivery_id": delivery_id, "task": task, "countdown": countdown,
+                             "journaled_at": time.time()}, separators=(",", ":")).encode()
+        try:
+            with self.lock:
+                segment = self.open_segment()
+                segment.write(RECORD_HEADER.pack(len(record), zlib.crc32(record)) + record)
+                self.written += 1
+                sequence = self.written
+                if segment.tell() >= self.segment_bytes:
+                    self.rotate()
+            self.sync(sequence)
+        except OSError as e:
+            raise JournalException(f"Failed writing delivery {delivery_id} to the ingress journal: {e}")
+        metrics.increment("journal.written")
+
+    # Waits until the record of the given sequence number is on disk. The thread holding the sync lock fsyncs every
+    # record written so far, so the threads waiting for it mostly find their records synced already
+    def sync(self, sequence):
+        with self.sync_lock:
+            if self.synced >= sequence:
+                return
+            with self.lock:
+                if self.segment is None:
+                    return
+                target = self.written
+                fd = os.dup(self.segment.fileno())
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            self.synced = max(self.synced, target)
+
+    def is_replayed(self, delivery_id):
+        if delivery_id in self.deliveries:
+            return True
+        client = get_redis_client()
+        if client is None:
+            return False
+        try:
+            return client.exists(f"{DELIVERY_KEY_PREFIX}:{delivery_id}") > 0
+        except Exception as e:
+            mark_redis_unavailable(e)
+            return False
+
+    def mark_replayed(self, delivery_id):
+        self.deliveries[delivery_id] = True
+        while len(self.deliveries) > MAX_LOCAL_DELIVERIES:
+            self.deliveries.popitem(last=False)
+        client = get_redis_client()
+        if client is None:
+            return
+        try:
+            client.set(f"{DELIVERY_KEY_PREFIX}:{delivery_id}", 1, ex=self.delivery_ttl)
+        except Exception as e:
+            mark_redis_unavailable(e)
+
+    # Closed segments in the order they were written. Open segments no process holds a lock on anymore belong to a
+    # process that died and are closed on its behalf. Segments still under their temporary name hold no records yet
+    def list_segments(self):
+        segments = []
+        for name in sorted(os.listdir(self.directory)):
+            path = os.path.join(self.directory, name)
+            if name.endswith(OPEN_SUFFIX):
+                try:
+                    with open(path, "rb") as orphan:
+                        fcntl.flock(orphan.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        os.rename(path, path[:-len(OPEN_SUFFIX)] + SEGMENT_SUFFIX)
+                except (BlockingIOError, FileNotFoundError):
+                    # Still appended to, or closed by its process since the directory was listed
+                    continue
+                path = path[:-len(OPEN_SUFFIX)] + SEGMENT_SUFFIX
+            elif not name.endswith(SEGMENT_SUFFIX):
+                continue
+            segments.append(path)
+        return segments
+
+    def drain(self, publish):
+        """
+        :param publish: function publishing the task and countdown of a record, raising when the broker is unreachable.
+            Segments are kept from the first record that fails, and retried by the next drain
+        :return: number of records published
+        """
+        with self.lock:
+            if self.segment is not None and self.segment.tell() > 0:
+                self.rotate()
+        if not os.path.isdir(self.directory):
+            return 0
+
+        published = 0
+        with open(os.path.join(self.directory, DRAIN_LOCK), "a") as drain_lock:
+            try:
+                fcntl.flock(drain_lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return 0
+            segments = self.list_segments()
+            remaining = len(segments)
+            try:
+                for path in segments:
+                    for record in read_records(path):
+                        delivery_id = record["delivery_id"]
+                        if self.is_replayed(delivery_id):
+                            metrics.increment("journal.duplicate")
+                            continue
+                        publish(record["task"], record.get("countdown"))
+                        self.mark_replayed(delivery_id)
+                        published += 1
+                        metrics.increment("journal.replayed")
+                        metrics.histogram("journal.replay_delay", (time.time() - record["journaled_at"]) * 1000)
+                    os.remove(path)
+                    remaining -= 1
+            finally:
+                metrics.gauge("journal.segments", remaining)
+        return published
+
+    def run_drainer(self, publish):
+        while True:
+            time.sleep(self.drain_interval)
+            try:
+                published = self.drain(publish)
+                if published:
+                    logger.info(f"Replayed {published} journaled webhooks")
+            except Exception as e:
+                logger.error(f"Failed replaying the ingress journal, retrying in {self.drain_interval}s: {e}")
+
+    # Starts the drainer thread of this process, which replays the journal every GORDON_JOURNAL_DRAIN_INTERVAL seconds
+    def start_drainer(self, publish):
+        if not self.enabled or (self.drainer is not None and self.drainer_pid == os.getpid()):
+            return
+        with self.lock:
+            if self.drainer is None or self.drainer_pid != os.getpid():
+                self.drainer = threading.Thread(target=self.run_drainer, args=(publish,), daemon=True,
+                                                name="gordon-journal-drainer")
+                self.drainer_pid = os.getpid()
+                self.drainer.start()
+
+
+_ingress_journal = None
+
+
+def get_ingress_journal():
+    global _ingress_journal
+    if _ingress_journal is None:
+        _ingress_journal = IngressJournal()
+    return _ingress_journal
@@ -0,0 +1,14 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Decodes JSON with orjson, which parses webhook payloads several times faster than the json module, falling back to
+# json where orjson is not installed. Decode errors are ValueErrors with either parser
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
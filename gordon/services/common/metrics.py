@@ -0,0 +1,70 @@
+from gordon.configurations.metrics_config import MetricsConfig
+from collections import Counter
+import contextlib
+import threading
+import time
+
+METRIC_PREFIX = "gordon."
+
+_statsd = None
+_counters = Counter()
+_gauges = {}
+_counters_lock = threading.Lock()
+_statsd_lock = threading.Lock()
+
+
+def get_statsd():
+    global _statsd
+    if _statsd is None:
+        # Imported on first use as the datadog package is slow to import
+        from datadog.dogstatsd.base import DogStatsd
+        metrics_config = MetricsConfig()
+        _statsd = DogStatsd(host=metrics_config.get_statsd_host(), port=metrics_config.get_statsd_port())
+    return _statsd
+
+
+# DogStatsd shares one socket between threads and replaces it after a send error, so sends are serialized
+def send(method, metric, value, tags):
+    if MetricsConfig().is_metrics_enabled():
+        with _statsd_lock:
+            getattr(get_statsd(), method)(METRIC_PREFIX + metric, value, tags=format_tags(tags))
+
+
+def format_tags(tags):
+    if not tags:
+        return None
+    return [f"{name}:{value}" for name, value in sorted(tags.items())]
+
+
+# Metrics are sent to DogStatsD and also kept in process so they can be read back with get_counter() / get_gauge()
+def increment(metric, value=1, tags=None):
+    with _counters_lock:
+        _counters[(metric, tuple(sorted((tags or {}).items())))] += value
+    send("increment", metric, value, tags)
+
+
+def gauge(metric, value, tags=None):
+    _gauges[(metric, tuple(sorted((tags or {}).items())))] = value
+    send("gauge", metric, value, tags)
+
+
+def histogram(metric, value, tags=None):
+    send("histogram", metric, value, tags)
+
+
+# Context manager reporting the wall time of the wrapped block in milliseconds
+@contextlib.contextmanager
+def timed(metric, tags=None):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram(metric, (time.perf_counter() - start) * 1000, tags=tags)
+
+
+def get_counter(metric, tags=None):
+    return _counters[(metric, tuple(sorted((tags or {}).items())))]
+
+
+def get_gauge(metric, tags=None):
+    return _gauges.get((metric, tuple(sorted((tags or {}).items()))))
@@ -0,0 +1,216 @@
+from gordon.configurations.http_config import HttpConfig
+from gordon.services.common import call_counter, http_client, metrics
+from gordon.services.common.redis_client import get_redis_client, mark_redis_unavailable
+from celery.utils.log import get_task_logger
+import threading
+import requests
+import random
+import time
+
+logger = get_task_logger(__name__)
+
+CIRCUIT_KEY_PREFIX = "gordon:circuit"
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# Status codes that mean the request was not processed, so even non idempotent requests can be retried
+SAFE_RETRY_STATUS_CODES = {429}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "PATCH", "DELETE"}
+
+
+class OutboundCallException(Exception):
+    pass
+
+
+class CircuitOpenException(OutboundCallException):
+    def __init__(self, service):
+        self.service = service
+        super(CircuitOpenException, self).__init__(
+            f"{service} is unavailable, calls are suspended until it recovers")
+
+
+# Circuit breaker state kept in Redis so every worker sees the same state
+class RedisCircuitStore:
+    def __init__(self, client):
+        self.client = client
+
+    def is_set(self, key):
+        return bool(self.client.exists(key))
+
+    def set_flag(self, key, ttl, only_if_missing=False):
+        return bool(self.client.set(key, 1, ex=ttl, nx=only_if_missing))
+
+    def increment(self, key, ttl):
+        count = self.client.incr(key)
+        if count == 1:
+            self.client.expire(key, ttl)
+        return count
+
+    def delete(self, *keys):
+        self.client.delete(*keys)
+
+
+# Process local circuit breaker state, used while Redis is unreachable
+class LocalCircuitStore:
+    def __init__(self):
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        value = self.values.get(key)
+        if value is None or value[1] < time.monotonic():
+            return None
+        return value[0]
+
+    def is_set(self, key):
+        return self.get(key) is not None
+
+    def set_flag(self, key, ttl, only_if_missing=False):
+        with self.lock:
+            if only_if_missing and self.get(key) is not None:
+                return False
+            self.values[key] = (1, time.monotonic() + ttl)
+            return True
+
+    def increment(self, key, ttl):
+        with self.lock:
+            count = (self.get(key) or 0) + 1
+            expires_at = self.values[key][1] if count > 1 else time.monotonic() + ttl
+            self.values[key] = (count, expires_at)
+            return count
+
+    def delete(self, *keys):
+        with self.lock:
+            for key in keys:
+                self.values.pop(key, None)
+
+
+_local_store = LocalCircuitStore()
+
+
+# Per service circuit breaker.
+# After failure_threshold failures within failure_window seconds the circuit opens and calls fail fast for open_seconds.
+# The circuit then turns half open: a single worker is allowed to probe the dependency while the others keep failing
+# fast, a successful probe closes the circuit and a failed one opens it again
+class CircuitBreaker:
+    CLOSED = "closed"
+    PROBE = "probe"
+
+    def __init__(self, service):
+        self.service = service
+        self.failure_threshold, self.failure_window, self.open_seconds = HttpConfig().get_circuit_settings(service)
+        self.open_key = f"{CIRCUIT_KEY_PREFIX}:{service}:open"
+        self.half_open_key = f"{CIRCUIT_KEY_PREFIX}:{service}:half-open"
+        self.probe_key = f"{CIRCUIT_KEY_PREFIX}:{service}:probe"
+        self.failures_key = f"{CIRCUIT_KEY_PREFIX}:{service}:failures"
+
+    def run(self, operation):
+        client = get_redis_client()
+        if client is not None:
+            try:
+                return operation(RedisCircuitStore(client))
+            except Exception as e:
+                mark_redis_unavailable(e)
+        return operation(_local_store)
+
+    # Returns the state the call is made in, or None when the call must be rejected
+    def allow_request(self):
+        def allow(store):
+            if store.is_set(self.open_key):
+                return None
+            if store.is_set(self.half_open_key):
+                if store.set_flag(self.probe_key, self.open_seconds, only_if_missing=True):
+                    return self.PROBE
+                return None
+            return self.CLOSED
+
+        state = self.run(allow)
+        if state is None:
+            metrics.increment("circuit.rejected", tags={"service": self.service})
+        return state
+
+    def record_success(self, state):
+        if state == self.PROBE:
+            logger.info(f"Circuit for {self.service} closed after a successful probe")
+            self.run(lambda store: store.delete(self.half_open_key, self.probe_key, self.failures_key))
+
+    def record_failure(self, state):
+        def fail(store):
+            failures = store.increment(self.failures_key, self.failure_window)
+            if state == self.PROBE or failures >= self.failure_threshold:
+                store.set_flag(self.open_key, self.open_seconds)
+                store.set_flag(self.half_open_key, self.open_seconds * 20)
+                store.delete(self.probe_key, self.failures_key)
+                return True
+            return False
+
+        if self.run(fail):
+            logger.error(f"Circuit for {self.service} opened for {self.open_seconds}s")
+            metrics.increment("circuit.opened", tags={"service": self.service})
+
+
+# Policy applied to every outbound call of a service: connect/read timeouts, bounded retries with exponential backoff
+# and full jitter on connection errors, 429 and 5xx responses, and a circuit breaker shared by all workers
+class OutboundCallPolicy:
+    def __init__(self, service):
+        http_config = HttpConfig()
+        self.service = service
+        self.timeout = http_config.get_timeouts(service)
+        self.max_retries = http_config.get_max_retries(service)
+        self.backoff_base, self.backoff_max = http_config.get_backoff(service)
+        self.circuit_breaker = CircuitBreaker(service)
+
+    def backoff(self, attempt, response=None):
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after is not None and retry_after.isdigit():
+            return min(float(retry_after), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def is_retryable(self, method, response):
+        if response.status_code in SAFE_RETRY_STATUS_CODES:
+            return True
+        return method.upper() in IDEMPOTENT_METHODS and response.status_code in RETRY_STATUS_CODES
+
+    def request(self, method, url, **kwargs):
+        state = self.circuit_breaker.allow_request()
+        if state is None:
+            raise CircuitOpenException(self.service)
+
+        kwargs["timeout"] = self.timeout
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                response = http_client.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                # Only connect timeouts are certain not to have reached the server of a call that is not idempotent
+                retryable = method.upper() in IDEMPOTENT_METHODS or isinstance(e, requests.ConnectTimeout)
+                if last_attempt or not retryable:
+                    self.circuit_breaker.record_failure(state)
+                    raise OutboundCallException(f"{self.service} call failed: {e}")
+                metrics.increment("http.retries", tags={"service": self.service})
+                time.sleep(self.backoff(attempt))
+                continue
+
+            if not last_attempt and self.is_retryable(method, response):
+                metrics.increment("http.retries", tags={"service": self.service})
+                time.sleep(self.backoff(attempt, response))
+                continue
+
+            if response.status_code >= 500:
+                self.circuit_breaker.record_failure(state)
+            else:
+                self.circuit_breaker.record_success(state)
+            return response
+
+
+_policies = {}
+
+
+def get_policy(service):
+    if service not in _policies:
+        _policies[service] = OutboundCallPolicy(service)
+    return _policies[service]
+
+
+# Sends a request for the given service ("github", "jira", "pagerduty", "slack") under its outbound call policy
+def request(service, method, url, **kwargs):
+    call_counter.record_call(service, method)
+    return get_policy(service).request(method, url, **kwargs)
@@ -0,0 +1,47 @@
+from gordon.configurations.cache_config import CacheConfig
+from celery.utils.log import get_task_logger
+import threading
+import time
+import os
+import redis
+
+logger = get_task_logger(__name__)
+
+# Seconds to stop using Redis after a failure so an unreachable cache tier doesn't add latency to every call
+REDIS_RETRY_INTERVAL = 30
+
+_client = None
+_client_pid = None
+_unavailable_until = 0
+_client_lock = threading.Lock()
+
+
+# Shared Redis connection used by the caches layered on the Celery broker. The client is rebuilt after a fork so that
+# prefork Celery workers and gunicorn workers never share sockets with their parent process.
+# Returns None when Redis caching is disabled or currently unreachable, callers then fall back to their local tier
+def get_redis_client():
+    global _client, _client_pid
+
+    cache_config = CacheConfig()
+    if not cache_config.is_redis_enabled() or time.monotonic() < _unavailable_until:
+        return None
+
+    if _client is not None and _client_pid == os.getpid():
+        return _client
+
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            timeout = cache_config.get_redis_timeout()
+            _client = redis.Redis.from_url(
+                cache_config.get_redis_url(),
+                socket_timeout=timeout,
+                socket_connect_timeout=timeout)
+            _client_pid = os.getpid()
+    return _client
+
+
+# Method for callers to report a failed Redis call, so the next calls skip Redis until the retry interval passes
+def mark_redis_unavailable(error):
+    global _unavailable_until
+    logger.error(f"Redis cache unavailable, using local cache only for {REDIS_RETRY_INTERVAL}s: {error}")
+    _unavailable_until = time.monotonic() + REDIS_RETRY_INTERVAL
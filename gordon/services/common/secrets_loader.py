@@ -1,5 +1,6 @@
 import json
 import os
+import threading
 from celery.utils.log import get_task_logger
 logger = get_task_logger(__name__)
 
@@ -8,20 +9,94 @@ class SecretsLoaderException(Exception):
     pass
 
 
+# Contents of one secrets file with the objects built from them, e.g. a parsed private key
+class SecretsFile:
+    def __init__(self, file_id, secrets):
+        self.file_id = file_id
+        self.secrets = secrets
+        self.derived = {}
+
+
+# Loads each secrets file once per process. Files are stat'ed on every access and only read and parsed again when
+# their inode, mtime or size changed, which covers Kubernetes rotating a mounted secret by swapping its symlink.
+# Objects derived from a secret are built once per version of its file
+class SecretsProvider:
+    def __init__(self):
+        self.files = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def get_path(secrets_env_name):
+        secrets_filename = os.environ.get(secrets_env_name)
+        if secrets_filename is None:
+            msg = f"Secrets Filename Env ({secrets_env_name}) " + \
+                  "not defined, will not be usable"
+            logger.error(msg)
+            raise SecretsLoaderException(msg)
+        return secrets_filename
+
+    def get_file(self, secrets_env_name):
+        path = self.get_path(secrets_env_name)
+        cached = self.files.get(path)
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            if cached is not None:
+                # Served from memory while the file is briefly missing during a rotation
+                logger.error(f"Failed reading secrets file {path}, using the last version loaded: {e}")
+                return cached
+            msg = f"Secrets File {path} not found"
+            logger.error(msg)
+            raise SecretsLoaderException(msg)
+
+        file_id = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if cached is not None and cached.file_id == file_id:
+            return cached
+
+        with self.lock:
+            cached = self.files.get(path)
+            if cached is not None and cached.file_id == file_id:
+                return cached
+            try:
+                with open(path) as secrets_file:
+                    secrets_json = json.loads(secrets_file.read())
+            except (OSError, ValueError) as e:
+                if cached is not None:
+                    logger.error(f"Failed loading secrets file {path}, using the last version loaded: {e}")
+                    return cached
+                raise SecretsLoaderException(f"Failed loading secrets file {path}: {e}")
+            loaded = SecretsFile(file_id, secrets_json)
+            self.files[path] = loaded
+            return loaded
+
+    def get_secrets(self, secrets_env_name):
+        return self.get_file(secrets_env_name).secrets
+
+    def get_derived(self, secrets_env_name, name, build):
+        """
+        :param name: identifies the derived object among those of the same file
+        :param build: function building the object from the secrets of the file
+        """
+        secrets_file = self.get_file(secrets_env_name)
+        if name not in secrets_file.derived:
+            with self.lock:
+                if name not in secrets_file.derived:
+                    secrets_file.derived[name] = build(secrets_file.secrets)
+        return secrets_file.derived[name]
+
+
+_secrets_provider = SecretsProvider()
+
+
+def get_secrets_provider():
+    return _secrets_provider
+
+
 # Function to load secrets from environment variables containing the path of files containing secrets
 def get_secrets(secrets_env_name):
-    secrets_filename = os.environ.get(secrets_env_name)
-
-    if secrets_filename is None:
-        msg = f"Secrets Filename Env ({secrets_env_name}) " + \
-              "not defined, will not be usable"
-        logger.error(msg)
-        raise SecretsLoaderException(msg)
-    elif not os.path.exists(secrets_filename):
-        msg = f"Secrets File {secrets_filename} not found"
-        logger.error(msg)
-        raise SecretsLoaderException(msg)
-    else:
-        with open(secrets_filename) as secrets_file:
-            secrets_json = json.loads(secrets_file.read())
-            return secrets_json
+    return _secrets_provider.get_secrets(secrets_env_name)
+
+
+# Function to load an object built from secrets, such as a parsed key, that is rebuilt when its secrets file changes
+def get_derived_secret(secrets_env_name, name, build):
+    return _secrets_provider.get_derived(secrets_env_name, name, build)
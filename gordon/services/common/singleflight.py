@@ -0,0 +1,34 @@
+from concurrent.futures import Future
+import threading
+
+
+# Collapses concurrent calls for the same key into one: the first caller runs the function, callers arriving while
+# it runs wait for and share its result or exception
+class SingleFlight:
+    def __init__(self):
+        self.calls = {}
+        self.lock = threading.Lock()
+
+    def do(self, key, function):
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = Future()
+                self.calls[key] = call
+
+        if not leader:
+            return call.result()
+
+        try:
+            call.set_result(function())
+        except BaseException as e:
+            call.set_exception(e)
+        finally:
+            with self.lock:
+                del self.calls[key]
+        return call.result()
+
+    def in_flight(self, key):
+        with self.lock:
+            return key in self.calls
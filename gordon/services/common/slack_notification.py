@@ -1,6 +1,6 @@
 from gordon.configurations.slack_config import SlackConfig
 from celery.utils.log import get_task_logger
-import requests
+from gordon.services.common import outbound_policy
 import json
 logger = get_task_logger(__name__)
 
@@ -13,8 +13,8 @@ class SlackService:
             message = message + slack_message
             slack_message = {'text': message}
             webhook = SlackConfig().get_slack_webhook()
-            slack_alert_response = requests.post(
-                webhook, data=json.dumps(slack_message),
+            slack_alert_response = outbound_policy.request(
+                "slack", "POST", webhook, data=json.dumps(slack_message),
                 headers={'Content-Type': 'application/json'})
             if slack_alert_response.status_code != 200:
                 logger.error(f"Failed sending alert to slack with "
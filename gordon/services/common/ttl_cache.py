@@ -0,0 +1,124 @@
+from gordon.services.common import metrics
+from gordon.services.common.redis_client import get_redis_client, mark_redis_unavailable
+from collections import OrderedDict
+from celery.utils.log import get_task_logger
+import threading
+import json
+import time
+
+logger = get_task_logger(__name__)
+
+CACHE_KEY_PREFIX = "gordon:cache"
+
+
+class CacheEntry:
+    def __init__(self, value, fresh_until, stale_until):
+        self.value = value
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+
+    @property
+    def is_fresh(self):
+        return time.time() < self.fresh_until
+
+    @property
+    def is_expired(self):
+        return time.time() >= self.stale_until
+
+
+# Two tier TTL cache for JSON serializable values: a bounded LRU in process memory in front of Redis, which is shared
+# by all workers. Entries may outlive their TTL by stale_ttl seconds for callers that accept stale values.
+# Hits and misses are reported per tier as gordon.cache.hits / gordon.cache.misses tagged with the cache name
+class TwoTierCache:
+    def __init__(self, name, max_local_entries):
+        self.name = name
+        self.max_local_entries = max_local_entries
+        self.local_entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def redis_key(self, key):
+        return f"{CACHE_KEY_PREFIX}:{self.name}:{key}"
+
+    def get_local(self, key):
+        with self.lock:
+            entry = self.local_entries.get(key)
+            if entry is None:
+                return None
+            if entry.is_expired:
+                del self.local_entries[key]
+                return None
+            self.local_entries.move_to_end(key)
+            return entry
+
+    def set_local(self, key, entry):
+        if self.max_local_entries <= 0:
+            return
+        with self.lock:
+            self.local_entries[key] = entry
+            self.local_entries.move_to_end(key)
+            while len(self.local_entries) > self.max_local_entries:
+                self.local_entries.popitem(last=False)
+
+    def get_shared(self, key):
+        client = get_redis_client()
+        if client is None:
+            return None
+        try:
+            cached = client.get(self.redis_key(key))
+        except Exception as e:
+            mark_redis_unavailable(e)
+            return None
+        if cached is None:
+            return None
+        cached = json.loads(cached)
+        return CacheEntry(cached["value"], cached["fresh_until"], cached["stale_until"])
+
+    def get_entry(self, key, allow_stale=False):
+        entry = self.get_local(key)
+        tier = "local"
+
+        # Another worker may already have refreshed an entry that went stale locally
+        if entry is None or not entry.is_fresh:
+            shared_entry = self.get_shared(key)
+            if shared_entry is not None and (entry is None or shared_entry.fresh_until > entry.fresh_until):
+                entry = shared_entry
+                tier = "redis"
+                self.set_local(key, entry)
+
+        if entry is None or entry.is_expired or (not allow_stale and not entry.is_fresh):
+            metrics.increment("cache.misses", tags={"cache": self.name})
+            return None
+
+        metrics.increment("cache.hits", tags={"cache": self.name, "tier": tier})
+        return entry
+
+    def get(self, key):
+        entry = self.get_entry(key)
+        return entry.value if entry is not None else None
+
+    def set(self, key, value, ttl, stale_ttl=0):
+        now = time.time()
+        entry = CacheEntry(value, now + ttl, now + ttl + stale_ttl)
+        self.set_local(key, entry)
+
+        client = get_redis_client()
+        if client is None:
+            return
+        try:
+            client.set(self.redis_key(key), json.dumps({
+                "value": value,
+                "fresh_until": entry.fresh_until,
+                "stale_until": entry.stale_until
+            }), ex=max(int(ttl + stale_ttl), 1))
+        except Exception as e:
+            mark_redis_unavailable(e)
+
+    def delete(self, key):
+        with self.lock:
+            self.local_entries.pop(key, None)
+        client = get_redis_client()
+        if client is not None:
+            try:
+                client.delete(self.redis_key(key))
+            except Exception as e:
+                mark_redis_unavailable(e)
@@ -0,0 +1,68 @@
+from gordon.configurations.validator_config import ValidatorConfig
+from gordon.services.common import metrics
+from celery.utils.log import get_task_logger
+import contextvars
+import threading
+
+logger = get_task_logger(__name__)
+
+
+# Drives the "gordon" check run of one check: one call to open the run and one to conclude it. New runs are created
+# already in_progress. A re-requested run is reused instead of creating another run on the commit, and is only patched
+# back to in_progress when the check outlasts the in progress delay, so quick checks skip the intermediate update
+class CheckRunManager:
+    def __init__(self, github_service, head_sha, check_url, check_run_url=None, in_progress_delay=None):
+        """
+        :param github_service: GithubService authenticated as the installation the check runs for
+        :param head_sha: SHA value of the commit the check run is on
+        :param check_url: API url of the repository the check run is created in
+        :param check_run_url: API url of an existing gordon check run to reuse
+        :param in_progress_delay: seconds before a reused run is moved back to in_progress
+        """
+        self.github_service = github_service
+        self.head_sha = head_sha
+        self.check_url = check_url
+        self.payload = {"url": check_run_url} if check_run_url else None
+        self.in_progress_delay = ValidatorConfig().get_check_in_progress_delay() \
+            if in_progress_delay is None else in_progress_delay
+        self.completed = False
+        self.timer = None
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return self.payload.get("html_url") or self.payload["url"]
+
+    def start(self):
+        if self.payload is None:
+            self.payload = self.github_service.initiate_check_run(self.head_sha, self.check_url)
+        else:
+            # The timer runs in a copy of the context so its call is counted with the rest of the event
+            self.timer = threading.Timer(self.in_progress_delay, contextvars.copy_context().run,
+                                         args=(self.mark_in_progress,))
+            self.timer.daemon = True
+            self.timer.start()
+        return self
+
+    # Runs on the timer thread, a failed update only leaves the run in its previous status until the conclusion
+    def mark_in_progress(self):
+        # Holding the lock through the update keeps it from landing after the conclusion
+        with self.lock:
+            if self.completed:
+                return
+            try:
+                self.github_service.update_check_run(self.payload, "", status="in_progress")
+            except Exception as e:
+                logger.error(f"Failed moving check run {self.url} back to in_progress: {e}")
+                metrics.increment("check_run.in_progress_failed")
+
+    # Sets the conclusion of the run, only the first conclusion of a check is sent
+    def complete(self, message, conclusion):
+        with self.lock:
+            if self.completed:
+                logger.warning(f"Check run {self.url} already has a conclusion, dropping: {conclusion}")
+                return None
+            self.completed = True
+            if self.timer is not None:
+                self.timer.cancel()
+        return self.github_service.update_check_run(self.payload, message, conclusion=conclusion)
@@ -0,0 +1,96 @@
+from gordon.configurations.cache_config import CacheConfig
+from gordon.services.common import json_codec, metrics
+from gordon.services.common.ttl_cache import TwoTierCache
+from github import GithubException, GithubObject
+from typing import NamedTuple
+from urllib.parse import urlparse
+import re
+
+# Refs that name a commit rather than a branch, their contents never change
+COMMIT_SHA = re.compile(r"^[0-9a-f]{40}$")
+RESULTS = ("immutable", "not_modified", "fetched")
+
+
+# The parts of a Github contents response the validators read
+class CachedContents(NamedTuple):
+    sha: str
+    content: str
+
+
+_contents_cache = None
+
+
+def get_contents_cache():
+    global _contents_cache
+    if _contents_cache is None:
+        _contents_cache = ContentsCache()
+    return _contents_cache
+
+
+# File contents fetched from Github, cached per (repo, path, ref) with the ETag of the response. Branch refs are
+# revalidated with If-None-Match, a 304 costs no rate limit and no body. Commit SHA refs are immutable and served
+# from the cache without a call, along with the fact that the file does not exist at that commit.
+# Each lookup is reported as gordon.github.contents tagged with its result, see get_hit_ratio()
+class ContentsCache:
+    def __init__(self, cache=None):
+        cache_config = CacheConfig()
+        self.cache = cache if cache is not None else TwoTierCache(
+            "github-contents", cache_config.get_local_cache_size())
+        self.ttl = cache_config.get_contents_ttl()
+        self.max_bytes = cache_config.get_contents_max_bytes()
+
+    @staticmethod
+    def cache_key(repo, path, ref):
+        # Lazy repositories carry a relative url and completed ones an absolute url, the path is the same
+        return f"{urlparse(repo.url).path.lower()}:{path}:{ref or ''}"
+
+    @staticmethod
+    def record(result):
+        metrics.increment("github.contents", tags={"result": result})
+
+    @staticmethod
+    def get_hit_ratio():
+        counts = {result: metrics.get_counter("github.contents", {"result": result}) for result in RESULTS}
+        total = sum(counts.values())
+        return (counts["immutable"] + counts["not_modified"]) / total if total else 0.0
+
+    def get_contents(self, repo, path, ref=GithubObject.NotSet):
+        """
+        :param repo: PyGithub repository, lazy or not
+        :return: CachedContents of the file, raises GithubException when it does not exist at ref
+        """
+        ref = None if ref is GithubObject.NotSet else ref
+        key = self.cache_key(repo, path, ref)
+        cached = self.cache.get(key)
+        immutable = ref is not None and COMMIT_SHA.match(ref) is not None
+
+        if cached is not None and immutable:
+            self.record("immutable")
+            if cached.get("missing"):
+                raise GithubException(404, {"message": "Not Found"})
+            return CachedContents(cached["sha"], cached["content"])
+
+        headers = {"If-None-Match": cached["etag"]} if cached is not None and cached.get("etag") else {}
+        parameters = {"ref": ref} if ref is not None else {}
+        # The requester is used directly as PyGithub's get_contents neither sends If-None-Match nor exposes a 304
+        status, response_headers, output = repo._requester.requestJson(
+            "GET", f"{repo.url}/contents/{path}", parameters=parameters, headers=headers)
+
+        if status == 304 and cached is not None:
+            self.record("not_modified")
+            self.cache.set(key, cached, self.ttl)
+            return CachedContents(cached["sha"], cached["content"])
+
+        self.record("fetched")
+        data = json_codec.loads(output) if output else None
+        if status == 404 and immutable:
+            self.cache.set(key, {"missing": True}, self.ttl)
+        if status >= 400:
+            raise GithubException(status, data)
+        if not isinstance(data, dict) or data.get("type") != "file":
+            raise GithubException(404, {"message": f"{path} is not a file"})
+
+        contents = CachedContents(data["sha"], data["content"])
+        if len(contents.content) <= self.max_bytes:
+            self.cache.set(key, {"etag": response_headers.get("etag"), **contents._asdict()}, self.ttl)
+        return contents
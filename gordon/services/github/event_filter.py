@@ -0,0 +1,98 @@
+from gordon.configurations.validator_config import ValidatorConfig
+from gordon.services.common import metrics
+from celery.utils.log import get_task_logger
+import threading
+import json
+import os
+
+logger = get_task_logger(__name__)
+
+# Github organizations checked by the acquisition validator, every other organization uses the default validator
+ACQUISITION_ORGANIZATIONS = ["acquisition1", "acquisition2"]
+
+SKIP_PUBLIC_REPO = "public_repo"
+SKIP_SHARED_REPO = "shared_repo"
+
+
+def normalize_repo_url(url):
+    url = url.strip().lower().rstrip("/")
+    if url.endswith(".git"):
+        url = url[:-len(".git")]
+    return url
+
+
+def get_validator_name(organization):
+    return "acquisition" if organization in ACQUISITION_ORGANIZATIONS else "default"
+
+
+# Set of the normalized repo URLs in a shared repos file. The file is stat'ed on every lookup and re-read when it
+# changed, so edits take effect without a restart while lookups stay a set membership test
+class SharedRepos:
+    def __init__(self, path):
+        self.path = path
+        self.file_id = None
+        self.urls = frozenset()
+        self.lock = threading.Lock()
+
+    def reload_if_changed(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError as e:
+            logger.error(f"Failed reading shared repos file {self.path}: {e}")
+            return
+        file_id = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if file_id == self.file_id:
+            return
+
+        with self.lock:
+            if file_id == self.file_id:
+                return
+            try:
+                with open(self.path) as shared_file:
+                    shared_json = json.loads(shared_file.read())
+                self.urls = frozenset(normalize_repo_url(url) for url in shared_json.values())
+                logger.info(f"Loaded {len(self.urls)} shared repos from {self.path}")
+            except Exception as e:
+                # The previous list stays in use until the file is fixed
+                logger.error(f"Failed loading shared repos file {self.path}: {e}")
+            self.file_id = file_id
+
+    def __contains__(self, repo_url):
+        self.reload_if_changed()
+        return normalize_repo_url(repo_url) in self.urls
+
+
+# Decides which webhook events are not checked: events of public repos and of repos on the shared repos list of the
+# validator the organization uses. The API drops these events before they are enqueued, and skips are counted in
+# gordon.webhook.filtered tagged with the reason
+class EventFilter:
+    def __init__(self):
+        validator_config = ValidatorConfig()
+        self.shared_repos = {
+            validator: SharedRepos(validator_config.get_shared_repos_file(validator))
+            for validator in ["default", "acquisition"]
+        }
+
+    def get_skip_reason(self, event):
+        if not event.private:
+            return SKIP_PUBLIC_REPO
+        if event.repo_html_url in self.shared_repos[get_validator_name(event.organization)]:
+            return SKIP_SHARED_REPO
+        return None
+
+    def should_skip(self, event):
+        reason = self.get_skip_reason(event)
+        if reason is not None:
+            logger.debug(f"Skipping {event.event_type} event of {event.repo_name}: {reason}")
+            metrics.increment("webhook.filtered", tags={"reason": reason, "event": event.event_type})
+        return reason is not None
+
+
+_event_filter = None
+
+
+def get_event_filter():
+    global _event_filter
+    if _event_filter is None:
+        _event_filter = EventFilter()
+    return _event_filter
@@ -1,14 +1,23 @@
-from github import Github, GithubIntegration
 from gordon.configurations.github_config import GithubConfig
+from gordon.services.common import outbound_policy
+from gordon.services.github import rate_limit
+from gordon.services.github.pooled_connection import get_github_connection
+from gordon.services.github.installation_token_cache import get_installation_token_cache, \
+    InstallationTokenCacheException
 from celery.utils.log import get_task_logger
+import calendar
 import hashlib
 import hmac
-import requests
 import json
+import jwt
+import time
 import os
 
 logger = get_task_logger(__name__)
 
+# Installation tokens are valid for an hour, used when Github does not report the expiry of a minted token
+DEFAULT_TOKEN_LIFETIME = 3600
+
 
 class GithubServiceException(Exception):
     pass
@@ -25,15 +34,7 @@ class GithubService:
         self.github_base_url = base_url
         self.github_token = token
         try:
-            if self.github_base_url is not None:
-                connection = Github(
-                    base_url=self.github_base_url,
-                    login_or_token=self.github_token)
-            else:
-
-                connection = Github(
-                    login_or_token=self.github_token)
-            self.github_connection = connection
+            self.github_connection = get_github_connection(self.github_base_url, self.github_token)
         except Exception as e:
             logger.error(f"Failed github connection: {e}")
 
@@ -44,7 +45,7 @@ class GithubService:
                    "Authorization": f"token {self.github_token}"}
         # data = json.dumps({"name": "gordon", "head_sha": f"{head_sha}"})
 
-        response = requests.get(check_url, headers=headers)
+        response = rate_limit.request("GET", check_url, headers=headers)
         if response.status_code == 200:
             return response.json()
         else:
@@ -55,7 +56,8 @@ class GithubService:
 
     def get_repository(self, repository_name):
         try:
-            repo = self.github_connection.get_repo(repository_name)
+            # Lazy handles skip the GET of the repository, the validators only use it to build content and pull urls
+            repo = self.github_connection.get_repo(repository_name, lazy=True)
             return repo
         except Exception as e:
             logger.error(f"Failed to get the repository {repository_name}"
@@ -70,13 +72,14 @@ class GithubService:
         # logger.error(f"Computed signature {signature}")
         return signature
 
-    # Method to initiate a check run on Github which makes the app appear on a pull request
+    # Method to initiate a check run on Github which makes the app appear on a pull request. The run is created
+    # in_progress since the check starts right away
     def initiate_check_run(self, head_sha, check_url):
         check_url = check_url + "/check-runs"
         headers = {"Accept": "application/vnd.github.antiope-preview+json", "Authorization": f"token {self.github_token}"}
-        data = json.dumps({"name": "gordon", "head_sha": f"{head_sha}"})
+        data = json.dumps({"name": "gordon", "head_sha": f"{head_sha}", "status": "in_progress"})
 
-        response = requests.post(check_url, headers=headers, data=data)
+        response = rate_limit.request("POST", check_url, headers=headers, data=data)
         if response.status_code == 201:
             return response.json()
         else:
@@ -85,6 +88,23 @@ class GithubService:
                 "Could not initiate a check-run on the repository"
             )
 
+    # Method to find the API url of the latest gordon check run on a commit, None if the commit has none
+    def find_check_run(self, head_sha, check_url):
+        check_url = check_url + f"/commits/{head_sha}/check-runs"
+        headers = {"Accept": "application/vnd.github.antiope-preview+json",
+                   "Authorization": f"token {self.github_token}"}
+
+        response = rate_limit.request("GET", check_url, headers=headers,
+                                      params={"check_name": "gordon", "filter": "latest"})
+        if response.status_code == 200:
+            check_runs = response.json()["check_runs"]
+            return check_runs[0]["url"] if check_runs else None
+        else:
+            logger.error(f"Failed to get check runs for commit: {check_url}")
+            raise GithubServiceException(
+                "Could not get the check runs of the commit"
+            )
+
     def post_issue_comment(self, comment, repo_name, pr_number):
         try:
             gh_con = self.github_connection
@@ -116,11 +136,13 @@ class GithubService:
                 raise GithubServiceException(
                     "Please provide a supported argument to update the check run"
                 )
-            response = requests.patch(check_url, headers=headers, data=data)
+            response = rate_limit.request("PATCH", check_url, headers=headers, data=data)
             if response.status_code == 200:
                 return response.json()
             else:
                 logger.error(f"Failed to update check run: {check_url}")
+        except rate_limit.RateLimitedException:
+            raise
         except Exception as e:
             logger.error(f"Failed to update check run: {e}")
 
@@ -139,17 +161,46 @@ class GithubService:
 
 # Class to generate a token for the Github app that can be used to access repositories and update pull requests as needed
 class GithubAppService:
+    # Tokens are served from the shared installation token cache, a new one is only minted when the cached one is close
+    # to its expiry
     def get_github_app_token(self, base_url, installation_id):
-        gh_config = GithubConfig()
-        integration_id, pem_key = gh_config.get_github_secrets()
         try:
-            git_app_handler = GithubIntegration(integration_id,
-                                                pem_key, base_url=base_url)
-            access_token = git_app_handler.get_access_token(int(installation_id))
-            token = access_token.token
-            return token
-        except Exception as e:
+            return get_installation_token_cache().get_token(
+                base_url, installation_id,
+                lambda: self.mint_github_app_token(base_url, installation_id))
+        except InstallationTokenCacheException as e:
             logger.error(f"Failed to retrieve git token: {e}")
             raise GithubAppServiceException(
                 "Failed to retrieve Github App token"
             )
+
+    # JWT authenticating as the Github App, signed like GithubIntegration.create_jwt() but with the private key parsed
+    # once rather than on every token mint
+    @staticmethod
+    def create_jwt(expiration=60):
+        integration_id, private_key = GithubConfig().get_github_app_key()
+        now = int(time.time())
+        payload = {"iat": now, "exp": now + expiration, "iss": str(integration_id)}
+        encoded = jwt.encode(payload, key=private_key, algorithm="RS256")
+        if isinstance(encoded, bytes):
+            encoded = encoded.decode("utf-8")
+        return encoded
+
+    # Method to mint a new installation token. The access token call goes over the pooled Github session rather than
+    # GithubIntegration.get_access_token(), which opens a new connection for every call
+    def mint_github_app_token(self, base_url, installation_id):
+        token_url = f"{base_url}/app/installations/{int(installation_id)}/access_tokens"
+        headers = {"Accept": "application/vnd.github.machine-man-preview+json",
+                   "Authorization": f"Bearer {self.create_jwt()}"}
+        response = outbound_policy.request("github", "POST", token_url, headers=headers)
+        if response.status_code != 201:
+            raise GithubAppServiceException(
+                f"Access token request failed with status code: {response.status_code}"
+            )
+
+        access_token = response.json()
+        if access_token.get("expires_at"):
+            expires_at = calendar.timegm(time.strptime(access_token["expires_at"], "%Y-%m-%dT%H:%M:%SZ"))
+        else:
+            expires_at = time.time() + DEFAULT_TOKEN_LIFETIME
+        return access_token["token"], expires_at
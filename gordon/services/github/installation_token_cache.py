@@ -0,0 +1,159 @@
+from gordon.configurations.cache_config import CacheConfig
+from gordon.services.common.redis_client import get_redis_client, mark_redis_unavailable
+from celery.utils.log import get_task_logger
+import threading
+import hashlib
+import json
+import time
+
+logger = get_task_logger(__name__)
+
+TOKEN_KEY_PREFIX = "gordon:installation-token"
+TOKEN_LOCK_PREFIX = "gordon:installation-token-lock"
+
+
+class InstallationTokenCacheException(Exception):
+    pass
+
+
+# Cache of GitHub App installation tokens keyed by (github_api, installation_id).
+# Tokens are kept in process memory and in Redis so every Celery worker shares them. A token is treated as expired
+# refresh_margin seconds before GitHub expires it, so callers never receive a token that dies mid-check.
+# Minting is singleflight: threads of a process wait on a local lock and processes wait on a Redis lock, so N concurrent
+# tasks for the same installation sign a single JWT and make a single access token call
+class InstallationTokenCache:
+    def __init__(self, refresh_margin=None, lock_timeout=None):
+        cache_config = CacheConfig()
+        self.refresh_margin = refresh_margin if refresh_margin is not None else cache_config.get_token_refresh_margin()
+        self.lock_timeout = lock_timeout if lock_timeout is not None else cache_config.get_token_lock_timeout()
+        self.tokens = {}
+        self.key_locks = {}
+        self.key_locks_guard = threading.Lock()
+
+    def get_token(self, github_api, installation_id, mint_token):
+        """
+        :param github_api: Github API URL the installation belongs to
+        :param installation_id: Github app installation id
+        :param mint_token: callable returning a new (token, expires_at) pair, expires_at being a unix timestamp
+        :return: an installation token valid for at least refresh_margin seconds
+        """
+        cache_key = self.cache_key(github_api, installation_id)
+
+        token = self.get_local_token(cache_key)
+        if token is not None:
+            return token
+
+        with self.get_key_lock(cache_key):
+            token = self.get_local_token(cache_key)
+            if token is not None:
+                return token
+
+            token, expires_at = self.get_shared_token(cache_key, mint_token)
+            self.tokens[cache_key] = (token, expires_at)
+            return token
+
+    def invalidate(self, github_api, installation_id):
+        cache_key = self.cache_key(github_api, installation_id)
+        self.tokens.pop(cache_key, None)
+        client = get_redis_client()
+        if client is not None:
+            try:
+                client.delete(cache_key)
+            except Exception as e:
+                mark_redis_unavailable(e)
+
+    @staticmethod
+    def cache_key(github_api, installation_id):
+        api_digest = hashlib.sha1(str(github_api).encode()).hexdigest()[:12]
+        return f"{TOKEN_KEY_PREFIX}:{api_digest}:{int(installation_id)}"
+
+    def is_fresh(self, expires_at):
+        return expires_at - time.time() > self.refresh_margin
+
+    def get_key_lock(self, cache_key):
+        with self.key_locks_guard:
+            if cache_key not in self.key_locks:
+                self.key_locks[cache_key] = threading.Lock()
+            return self.key_locks[cache_key]
+
+    def get_local_token(self, cache_key):
+        cached = self.tokens.get(cache_key)
+        if cached is not None and self.is_fresh(cached[1]):
+            return cached[0]
+        return None
+
+    def read_shared_token(self, client, cache_key):
+        cached = client.get(cache_key)
+        if cached is None:
+            return None
+        cached = json.loads(cached)
+        if not self.is_fresh(cached["expires_at"]):
+            return None
+        return cached["token"], cached["expires_at"]
+
+    # Method to read the token from Redis, minting and publishing a new one under a Redis lock when it is missing or
+    # stale
+    def get_shared_token(self, cache_key, mint_token):
+        client = get_redis_client()
+        if client is None:
+            return self.mint(mint_token)
+
+        try:
+            cached = self.read_shared_token(client, cache_key)
+            if cached is not None:
+                return cached
+
+            lock = client.lock(f"{TOKEN_LOCK_PREFIX}:{cache_key}", timeout=self.lock_timeout,
+                               blocking_timeout=self.lock_timeout)
+            acquired = lock.acquire()
+        except Exception as e:
+            mark_redis_unavailable(e)
+            return self.mint(mint_token)
+
+        try:
+            # Another worker may have minted while this one waited for the lock
+            try:
+                cached = self.read_shared_token(client, cache_key)
+                if cached is not None:
+                    return cached
+            except Exception as e:
+                mark_redis_unavailable(e)
+
+            if not acquired:
+                logger.error(f"Timed out waiting for the token lock of {cache_key}, minting without it")
+            token, expires_at = self.mint(mint_token)
+            self.publish_shared_token(client, cache_key, token, expires_at)
+            return token, expires_at
+        finally:
+            if acquired:
+                try:
+                    lock.release()
+                except Exception as e:
+                    logger.debug(f"Failed releasing token lock: {e}")
+
+    @staticmethod
+    def publish_shared_token(client, cache_key, token, expires_at):
+        ttl = int(expires_at - time.time())
+        if ttl <= 0:
+            return
+        try:
+            client.set(cache_key, json.dumps({"token": token, "expires_at": expires_at}), ex=ttl)
+        except Exception as e:
+            mark_redis_unavailable(e)
+
+    @staticmethod
+    def mint(mint_token):
+        try:
+            return mint_token()
+        except Exception as e:
+            raise InstallationTokenCacheException(f"Failed minting installation token: {e}")
+
+
+_token_cache = None
+
+
+def get_installation_token_cache():
+    global _token_cache
+    if _token_cache is None:
+        _token_cache = InstallationTokenCache()
+    return _token_cache
@@ -0,0 +1,82 @@
+from gordon.services.github import rate_limit
+from github import Github
+from github.Requester import Requester, RequestsResponse
+from collections import OrderedDict
+import threading
+import os
+
+# Number of PyGithub clients kept per process. Clients are keyed by installation token, which rotates hourly
+GITHUB_CONNECTION_CACHE_SIZE = 32
+# Items per page of paginated lists, the most Github returns, so walking a list takes as few calls as possible
+GITHUB_PAGE_SIZE = 100
+
+
+# Connection class handed to PyGithub so its API calls go through the pooled keep-alive sessions of http_client
+# and the Github outbound call policy and rate limit scheduler, instead of a new requests.Session per Github object
+class PooledHTTPSConnection:
+    protocol = "https"
+    default_port = 443
+
+    def __init__(self, host, port=None, strict=False, timeout=None, retry=None, **kwargs):
+        self.host = host
+        self.port = port if port else self.default_port
+        self.timeout = timeout
+        self.verify = kwargs.get("verify", True)
+
+    def request(self, verb, url, input, headers):
+        self.verb = verb
+        self.url = url
+        self.input = input
+        self.headers = headers
+
+    def getresponse(self):
+        url = f"{self.protocol}://{self.host}:{self.port}{self.url}"
+        response = rate_limit.request(
+            self.verb, url,
+            headers=self.headers,
+            data=self.input,
+            verify=self.verify,
+            allow_redirects=False)
+        return RequestsResponse(response)
+
+    def close(self):
+        return
+
+
+class PooledHTTPConnection(PooledHTTPSConnection):
+    protocol = "http"
+    default_port = 80
+
+
+Requester.injectConnectionClasses(PooledHTTPConnection, PooledHTTPSConnection)
+
+_github_connections = OrderedDict()
+_github_connections_lock = threading.Lock()
+
+
+def reset_github_connections():
+    global _github_connections_lock
+    _github_connections.clear()
+    _github_connections_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=reset_github_connections)
+
+
+# Returns a PyGithub client for the base URL and token, reusing the one built by an earlier event when possible
+def get_github_connection(base_url=None, token=None):
+    connection_key = (base_url, token)
+    with _github_connections_lock:
+        connection = _github_connections.get(connection_key)
+        if connection is not None:
+            _github_connections.move_to_end(connection_key)
+            return connection
+
+        if base_url is not None:
+            connection = Github(base_url=base_url, login_or_token=token, per_page=GITHUB_PAGE_SIZE)
+        else:
+            connection = Github(login_or_token=token, per_page=GITHUB_PAGE_SIZE)
+        _github_connections[connection_key] = connection
+        while len(_github_connections) > GITHUB_CONNECTION_CACHE_SIZE:
+            _github_connections.popitem(last=False)
+        return connection
@@ -0,0 +1,199 @@
+from gordon.configurations.github_config import GithubConfig
+from gordon.services.common import metrics, outbound_policy
+from gordon.services.common.outbound_policy import OutboundCallException
+from gordon.services.common.redis_client import get_redis_client, mark_redis_unavailable
+from celery.utils.log import get_task_logger
+import contextlib
+import contextvars
+import threading
+import time
+
+logger = get_task_logger(__name__)
+
+QUOTA_KEY_PREFIX = "gordon:github-quota"
+# Seconds a quota is kept past its reset, the next response of the installation carries the new one
+QUOTA_TTL_MARGIN = 60
+# Longest a rate limited call is put off for, Github quotas reset every hour
+MAX_RETRY_DELAY = 3600
+RATE_LIMIT_STATUS_CODES = {403, 429}
+
+_current_installation = contextvars.ContextVar("gordon_github_installation", default=None)
+
+
+class RateLimitedException(OutboundCallException):
+    def __init__(self, installation_id, retry_after):
+        self.installation_id = installation_id
+        self.retry_after = retry_after
+        # Set by the validator that was interrupted, so the requeued check concludes the same check run
+        self.check_run_url = None
+        super(RateLimitedException, self).__init__(
+            f"Github rate limit of installation {installation_id} reached, calls resume in {retry_after:.0f}s")
+
+
+# Github calls made inside the block are scheduled against the quota of the installation
+@contextlib.contextmanager
+def installation(installation_id):
+    token = _current_installation.set(installation_id)
+    try:
+        yield
+    finally:
+        _current_installation.reset(token)
+
+
+# Quotas kept in Redis so every worker draws from the same bucket of an installation
+class RedisQuotaStore:
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key):
+        return {name.decode(): float(value) for name, value in self.client.hgetall(key).items()}
+
+    def update(self, key, fields, expires_at):
+        pipeline = self.client.pipeline()
+        pipeline.hset(key, mapping=fields)
+        pipeline.expireat(key, int(expires_at))
+        pipeline.execute()
+
+    def consume(self, key, expires_at):
+        pipeline = self.client.pipeline()
+        pipeline.hincrby(key, "remaining", -1)
+        pipeline.expireat(key, int(expires_at))
+        pipeline.execute()
+
+
+# Process local quotas, used while Redis is unreachable
+class LocalQuotaStore:
+    def __init__(self):
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        value = self.values.get(key)
+        if value is None or value[1] < time.time():
+            return {}
+        return dict(value[0])
+
+    def update(self, key, fields, expires_at):
+        with self.lock:
+            self.values[key] = ({**self.get(key), **fields}, expires_at)
+
+    def consume(self, key, expires_at):
+        with self.lock:
+            fields = self.get(key)
+            if "remaining" in fields:
+                fields["remaining"] -= 1
+                self.values[key] = (fields, expires_at)
+
+
+_local_store = LocalQuotaStore()
+
+
+# Token bucket per Github App installation in front of every Github call made for it. The bucket holds the calls the
+# installation has left until its quota resets, as reported by the X-RateLimit-* headers of each response, and is
+# drawn down by each call made in between. A secondary rate limit's Retry-After blocks the installation for that long.
+# Calls made while the bucket is empty or blocked raise RateLimitedException, which the worker turns into a delayed
+# retry of the task instead of cancelling the check
+class RateLimitScheduler:
+    def __init__(self):
+        self.reserve = GithubConfig().get_rate_limit_reserve()
+
+    @staticmethod
+    def quota_key(installation_id):
+        return f"{QUOTA_KEY_PREFIX}:{installation_id}"
+
+    def run(self, operation):
+        client = get_redis_client()
+        if client is not None:
+            try:
+                return operation(RedisQuotaStore(client))
+            except Exception as e:
+                mark_redis_unavailable(e)
+        return operation(_local_store)
+
+    # Seconds until the installation can make calls again while keeping `reserve` of them, 0 when it can right away
+    @staticmethod
+    def get_delay(quota, reserve):
+        now = time.time()
+        delay = quota.get("blocked_until", 0) - now
+        if quota.get("remaining", reserve + 1) <= reserve and quota.get("reset", 0) > now:
+            delay = max(delay, quota["reset"] - now)
+        return min(max(delay, 0), MAX_RETRY_DELAY)
+
+    def throttled(self, installation_id, delay, reason):
+        logger.warning(f"Github calls of installation {installation_id} put off for {delay:.0f}s: {reason}")
+        metrics.increment("github.rate_limited", tags={"reason": reason})
+        return RateLimitedException(installation_id, delay)
+
+    # Called before a check starts, so checks only start when the installation has enough calls left to finish them
+    def check_quota(self, installation_id):
+        delay = self.get_delay(self.run(lambda store: store.get(self.quota_key(installation_id))), self.reserve)
+        if delay:
+            raise self.throttled(installation_id, delay, "reserve")
+
+    # Called before each call, takes a call from the bucket of the installation
+    def acquire(self, installation_id):
+        key = self.quota_key(installation_id)
+
+        def take(store):
+            quota = store.get(key)
+            delay = self.get_delay(quota, 0)
+            if not delay and "remaining" in quota:
+                store.consume(key, quota.get("reset", time.time()) + QUOTA_TTL_MARGIN)
+            return delay
+
+        delay = self.run(take)
+        if delay:
+            raise self.throttled(installation_id, delay, "exhausted")
+
+    # Called with each response, refills the bucket from the rate limit headers Github sends
+    def observe(self, installation_id, response):
+        now = time.time()
+        headers = response.headers
+        fields = {}
+        remaining, reset = headers.get("X-RateLimit-Remaining"), headers.get("X-RateLimit-Reset")
+        # GraphQL queries draw from a separate quota, only the REST quota fills the bucket
+        core = headers.get("X-RateLimit-Resource", "core") == "core"
+        if core and remaining is not None and remaining.isdigit() and reset is not None and reset.isdigit():
+            fields["remaining"], fields["reset"] = int(remaining), int(reset)
+            metrics.gauge("github.rate_limit.remaining", fields["remaining"],
+                          tags={"installation": installation_id})
+
+        delay, reason = 0, None
+        if response.status_code in RATE_LIMIT_STATUS_CODES:
+            retry_after = headers.get("Retry-After")
+            if retry_after is not None and retry_after.isdigit():
+                delay, reason = int(retry_after), "secondary"
+            elif fields.get("remaining") == 0:
+                delay, reason = max(fields["reset"] - now, 1), "exhausted"
+            if delay:
+                fields["blocked_until"] = now + min(delay, MAX_RETRY_DELAY)
+
+        if fields:
+            expires_at = max(fields.get("reset", 0), fields.get("blocked_until", 0), now) + QUOTA_TTL_MARGIN
+            self.run(lambda store: store.update(self.quota_key(installation_id), fields, expires_at))
+        if delay:
+            raise self.throttled(installation_id, min(delay, MAX_RETRY_DELAY), reason)
+
+
+_rate_limit_scheduler = None
+
+
+def get_rate_limit_scheduler():
+    global _rate_limit_scheduler
+    if _rate_limit_scheduler is None:
+        _rate_limit_scheduler = RateLimitScheduler()
+    return _rate_limit_scheduler
+
+
+# Sends a Github request under the outbound call policy, scheduled against the quota of the current installation.
+# Calls made outside of an installation, like minting its token, are not scheduled
+def request(method, url, **kwargs):
+    installation_id = _current_installation.get()
+    if installation_id is None:
+        return outbound_policy.request("github", method, url, **kwargs)
+
+    scheduler = get_rate_limit_scheduler()
+    scheduler.acquire(installation_id)
+    response = outbound_policy.request("github", method, url, **kwargs)
+    scheduler.observe(installation_id, response)
+    return response
@@ -0,0 +1,191 @@
+from gordon.configurations.github_config import GithubConfig
+from gordon.services.common import json_codec
+from gordon.services.github import rate_limit
+from gordon.services.github.contents_cache import CachedContents, get_contents_cache
+from gordon.services.github.rate_limit import RateLimitedException
+from github import GithubException, GithubObject
+from celery.utils.log import get_task_logger
+import threading
+import base64
+import json
+
+logger = get_task_logger(__name__)
+
+# Changed files of a pull request read per GraphQL page, the largest page Github allows
+FILES_PAGE_SIZE = 100
+
+FILES_QUERY = """
+query($owner: String!, $name: String!, $number: Int!, $cursor: String) {
+  repository(owner: $owner, name: $name) {
+    pullRequest(number: $number) {
+      files(first: %d, after: $cursor) { nodes { path } pageInfo { hasNextPage endCursor } }
+    }
+  }
+}
+""" % FILES_PAGE_SIZE
+
+CHECK_QUERY = """
+query($owner: String!, $name: String!, $main: String!, $ref: String!, $number: Int!) {
+  repository(owner: $owner, name: $name) {
+    main: object(expression: $main) { ... on Blob { oid text isBinary isTruncated } }
+    ref: object(expression: $ref) { ... on Blob { oid text isBinary isTruncated } }
+    pullRequest(number: $number) {
+      files(first: %d) { nodes { path } pageInfo { hasNextPage endCursor } }
+    }
+  }
+}
+""" % FILES_PAGE_SIZE
+
+
+class RepositoryBackendException(Exception):
+    pass
+
+
+# The Github data a check reads, behind one interface so deployments can pick REST or GraphQL with
+# GORDON_GITHUB_BACKEND. Both answer get_contents() like a PyGithub repository, raising GithubException when the file
+# does not exist at the ref, pull_request_touches() for whether the pull request changes a file and
+# pull_request_deletes() for whether it removes one
+def get_repository_backend(github_service, repo_name, ref_sha, pr_number):
+    backend = GithubConfig().get_repository_backend()
+    if backend == "graphql":
+        return GraphqlRepositoryBackend(github_service, repo_name, ref_sha, pr_number)
+    return RestRepositoryBackend(github_service.get_repository(repo_name), ref_sha, pr_number)
+
+
+def is_not_found(e):
+    return isinstance(e, GithubException) and e.status == 404
+
+
+# One REST call per file version, read through the ETag contents cache. Whether the pull request deletes a file is
+# answered from the file at the merge base of the pull request in a constant number of calls, the pull request files
+# are only paginated when the merge base is not available
+class RestRepositoryBackend:
+    def __init__(self, repo, ref_sha, pr_number):
+        """
+        :param repo: PyGithub repository, lazy or not
+        """
+        self.repo = repo
+        self.ref_sha = ref_sha
+        self.pr_number = pr_number
+
+    def get_contents(self, path, ref=GithubObject.NotSet):
+        return get_contents_cache().get_contents(self.repo, path, ref)
+
+    def exists(self, path, ref):
+        try:
+            self.get_contents(path, ref)
+            return True
+        except GithubException as e:
+            if is_not_found(e):
+                return False
+            raise
+
+    # Commit the pull request branched off from, the diff of a pull request is the diff from this commit to its head
+    def get_merge_base(self, pr):
+        # One commit per page keeps the comparison small, the merge base is part of every page
+        headers, data = self.repo._requester.requestJsonAndCheck(
+            "GET", f"{self.repo.url}/compare/{pr.base.sha}...{self.ref_sha}", parameters={"per_page": 1})
+        return data["merge_base_commit"]["sha"]
+
+    # Pages through the changed files and stops at the page listing the file
+    def pull_request_touches(self, path, pr=None):
+        pr = pr if pr is not None else self.repo.get_pull(self.pr_number)
+        return any(pr_file.filename == path for pr_file in pr.get_files())
+
+    # A pull request deletes a file its head does not have when the file exists at the merge base, which takes the
+    # pull request, the comparison and the file at the merge base: three calls whatever the size of the pull request
+    def pull_request_deletes(self, path):
+        if self.exists(path, self.ref_sha):
+            return False
+        pr = self.repo.get_pull(self.pr_number)
+        try:
+            merge_base = self.get_merge_base(pr)
+        except RateLimitedException:
+            raise
+        except Exception as e:
+            logger.warning(f"Merge base of {self.repo.url} pull request {self.pr_number} unavailable, "
+                           f"listing its files instead: {e}")
+            return self.pull_request_touches(path, pr)
+        return self.exists(path, merge_base)
+
+
+# A single GraphQL query returns both versions of the file with their blob SHAs and the first page of the pull request
+# files. It runs on the first read, concurrent reads of the main and ref files wait for it. Only pull requests with
+# more changed files than one page need further queries, which stop at the page listing the file. GraphQL has no text
+# for binary blobs and cuts the text of large ones, those are read through REST instead
+class GraphqlRepositoryBackend:
+    def __init__(self, github_service, repo_name, ref_sha, pr_number, path="about.yaml"):
+        self.github_service = github_service
+        self.repo_name = repo_name
+        self.owner, self.name = repo_name.split("/", 1)
+        self.ref_sha = ref_sha
+        self.pr_number = pr_number
+        self.path = path
+        self.result = None
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def get_graphql_url(api_url):
+        # Github Enterprise serves REST under /api/v3 and GraphQL under /api/graphql
+        if api_url.rstrip("/").endswith("/api/v3"):
+            return api_url.rstrip("/")[:-len("/v3")] + "/graphql"
+        return api_url.rstrip("/") + "/graphql"
+
+    def query(self, query, variables):
+        url = self.get_graphql_url(self.github_service.github_base_url)
+        headers = {"Authorization": f"bearer {self.github_service.github_token}"}
+        response = rate_limit.request("POST", url, headers=headers,
+                                      data=json.dumps({"query": query, "variables": variables}))
+        if response.status_code != 200:
+            raise RepositoryBackendException(f"GraphQL query failed with {response.status_code}: {url}")
+        body = json_codec.loads(response.content)
+        repository = (body.get("data") or {}).get("repository")
+        if repository is None:
+            raise RepositoryBackendException(f"GraphQL query failed: {body.get('errors')}")
+        return repository
+
+    def fetch(self):
+        with self.lock:
+            if self.result is None:
+                self.result = self.query(CHECK_QUERY, {
+                    "owner": self.owner, "name": self.name, "number": self.pr_number,
+                    "main": f"HEAD:{self.path}", "ref": f"{self.ref_sha}:{self.path}"
+                })
+            return self.result
+
+    def get_contents(self, path, ref=GithubObject.NotSet):
+        if path != self.path or ref not in (GithubObject.NotSet, self.ref_sha):
+            raise RepositoryBackendException(f"{path} at {ref} is not part of the GraphQL query")
+        blob = self.fetch()["main" if ref is GithubObject.NotSet else "ref"]
+        if not blob:
+            raise GithubException(404, {"message": "Not Found"})
+        if blob.get("isBinary") or blob.get("isTruncated") or blob.get("text") is None:
+            logger.info(f"{path} of {self.repo_name} at {ref} has no complete text in GraphQL, reading it through REST")
+            return get_contents_cache().get_contents(self.github_service.get_repository(self.repo_name), path, ref)
+        return CachedContents(blob["oid"], base64.b64encode(blob["text"].encode()).decode())
+
+    # The head blob is part of the query, the pull request deletes the file when the head has none and the files
+    # list it, which is paged through until it does
+    def pull_request_deletes(self, path):
+        try:
+            self.get_contents(path, self.ref_sha)
+            return False
+        except GithubException as e:
+            if not is_not_found(e):
+                raise
+        return self.pull_request_touches(path)
+
+    def pull_request_touches(self, path):
+        pull_request = self.fetch()["pullRequest"]
+        if pull_request is None:
+            raise RepositoryBackendException(f"Pull request {self.pr_number} not found")
+        files = pull_request["files"]
+        while True:
+            if any(node["path"] == path for node in files["nodes"]):
+                return True
+            if not files["pageInfo"]["hasNextPage"]:
+                return False
+            files = self.query(FILES_QUERY, {
+                "owner": self.owner, "name": self.name, "number": self.pr_number,
+                "cursor": files["pageInfo"]["endCursor"]
+            })["pullRequest"]["files"]
@@ -1,8 +1,10 @@
 from celery.utils.log import get_task_logger
 from gordon.configurations.github_config import GithubConfig
-from gordon.services.github.github_service import GithubService, GithubServiceException
 logger = get_task_logger(__name__)
 
+# Github events Gordon runs checks for, every other event is rejected before its body is read
+SUPPORTED_EVENTS = frozenset(["pull_request", "check_run", "check_suite"])
+
 
 class SenderVerificationException(Exception):
     pass
@@ -19,8 +21,12 @@ class SenderVerificationProcessor:
         self.gh_config = GithubConfig()
         self.git_wh_secret = self.gh_config.get_github_webhook_secret()
 
+    @staticmethod
+    def is_supported_event(event_type):
+        return event_type in SUPPORTED_EVENTS
+
     def verify_sender(self):
-        if self.event_type != "pull_request" and self.event_type != "check_run" and self.event_type != "check_suite":
+        if not self.is_supported_event(self.event_type):
             logger.error(f"Received a unsupported action: {self.event_type}")
             return self.all_check_status, self.event_type
 
@@ -28,6 +34,8 @@ class SenderVerificationProcessor:
             logger.error("Missing github signature")
             return self.all_check_status, self.event_type
 
+        # Imported here as the Github client is only needed once a webhook is received
+        from gordon.services.github.github_service import GithubService, GithubServiceException
         try:
             GithubService.validate_webhook(
                 webhook_body=self.webhook_json,
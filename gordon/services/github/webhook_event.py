@@ -0,0 +1,29 @@
+from typing import NamedTuple, Optional
+
+
+# The fields of a Github webhook payload the worker uses to run a check. The API enqueues this record instead of the
+# full payload, which carries complete repository, sender and pull request objects the worker never reads
+class WebhookEvent(NamedTuple):
+    event_type: str
+    action: str
+    organization: str
+    repo_name: str
+    repo_html_url: str
+    private: bool
+    installation_id: int
+    head_sha: str
+    pr_number: int
+    check_url: str
+    source_url: Optional[str] = None
+    # API url of the gordon check run a requeued check concludes
+    check_run_url: Optional[str] = None
+    # updated_at of the pull request in pull_request events, which orders heads delivered out of order
+    updated_at: Optional[str] = None
+
+    # Task arguments are a map rather than a positional array so API and worker releases can differ by a field
+    def to_task(self):
+        return self._asdict()
+
+    @classmethod
+    def from_task(cls, fields):
+        return cls(**{name: fields.get(name, cls._field_defaults.get(name)) for name in cls._fields})
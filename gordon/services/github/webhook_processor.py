@@ -1,4 +1,5 @@
 from celery.utils.log import get_task_logger
+from gordon.services.github.webhook_event import WebhookEvent
 logger = get_task_logger(__name__)
 
 
@@ -105,3 +106,49 @@ class WebhookProcessor:
             raise WebhookProcessorException(
                 f"Error retrieving PR field: {key_error};" +
                 " are you sure this is a pull request?")
+
+    # Builds the record enqueued for the worker, or returns None for events the worker would not act on
+    def get_event(self, payload_event):
+        if payload_event == "check_run":
+            relevant = self.checkrun_processor()
+        elif payload_event == "check_suite":
+            relevant = self.checksuite_processor()
+        elif payload_event == "pull_request":
+            relevant = self.pr_processor() or self.pr_closed()
+        else:
+            relevant = False
+        if not relevant:
+            return None
+
+        try:
+            repository = self.webhook_json["repository"]
+            updated_at = None
+            if payload_event == "pull_request":
+                pull_request = self.webhook_json["pull_request"]
+                head_sha, pr_number = pull_request["head"]["sha"], self.webhook_json["number"]
+                check_url, source_url = pull_request["base"]["repo"]["url"], pull_request["html_url"]
+                updated_at = pull_request.get("updated_at") or None
+            else:
+                check = self.webhook_json[payload_event]
+                head_sha, pr_number = check["head_sha"], check["pull_requests"][0]["number"]
+                check_url, source_url = repository["url"], check.get("url")
+
+            return WebhookEvent(
+                event_type=payload_event,
+                action=self.webhook_json["action"],
+                organization=repository["owner"]["login"],
+                repo_name=repository["full_name"],
+                repo_html_url=repository["html_url"],
+                private=repository["private"],
+                installation_id=self.webhook_json["installation"]["id"],
+                head_sha=head_sha,
+                pr_number=pr_number,
+                check_url=check_url,
+                source_url=source_url,
+                updated_at=updated_at
+            )
+        except KeyError as key_error:
+            logger.error(f"Error retrieving: {key_error};" +
+                         f" are you sure this is a {payload_event} event?\n")
+            raise WebhookProcessorException(
+                f"Error retrieving {payload_event} field: {key_error}")
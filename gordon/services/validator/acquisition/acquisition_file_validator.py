@@ -1,6 +1,13 @@
-from gordon.services.validator.acquisition.acquistion_about_yaml import AboutYaml, AboutYamlException
+from gordon.services.validator.acquisition.acquistion_about_yaml import AboutYaml, AboutYamlException, \
+    AboutYamlDependencyException
 from gordon.configurations.github_config import GithubConfig
+from gordon.configurations.validator_config import ValidatorConfig
 from gordon.services.github.github_service import GithubService, GithubAppService
+from gordon.services.github.rate_limit import RateLimitedException
+from gordon.services.github.repository_backend import get_repository_backend
+from gordon.services.validator.concurrent_validation import ConcurrentValidation
+from gordon.services.validator.pull_request_heads import get_pull_request_heads
+from gordon.services.validator.schema_registry import get_schema_registry
 from celery.utils.log import get_task_logger
 from gordon.services.validator.acquisition import acquistion_constants as constants
 
@@ -12,9 +19,9 @@ fields. This can be used in your acquisitions where it makes sense to add additi
 
 
 class AcquistionFileValidator:
-    def __init__(self, payload, repo_name, ref_sha, installation_id, pr_number):
+    def __init__(self, check_run, repo_name, ref_sha, installation_id, pr_number):
         """
-        :param payload: Github app payload in Json format
+        :param check_run: CheckRunManager of the started gordon check run
         :param repo_name: Name of repo for which the check is running
         :param ref_sha: SHA value of the commit from which the pull request was generated
         :param installation_id: Github app installation id
@@ -22,10 +29,12 @@ class AcquistionFileValidator:
         """
         self.git_api = GithubConfig().get_github_api()
         self.pr_number = pr_number
-        self.payload = payload
+        self.check_run = check_run
         self.repo_name = repo_name
         self.ref_sha = ref_sha
         self.installation_id = installation_id
+        self.concurrent_validation = ValidatorConfig().is_concurrent_validation_enabled()
+        self.cancelled = False
         self.git_token = self.get_github_token()
         self.main_checkrun_message = "<h2>Check results on main branch:</h2>\n"
         self.ref_checkrun_message = f"<h2>Check results on commit branch {self.ref_sha}</h2>\n"
@@ -33,12 +42,19 @@ class AcquistionFileValidator:
     # Method called by the celery processor to initiate the about.yaml file validation and update check-run status accordingly
     def check_executor(self):
         git_service = GithubService(self.git_api, self.git_token)
-        self.payload = git_service.update_check_run(self.payload, "update stats", status="in_progress")
-
         try:
-            repo = git_service.get_repository(self.repo_name)
-            main_file = AboutYaml(repo)
-            ref_file = AboutYaml(repo, self.ref_sha)
+            repo = get_repository_backend(git_service, self.repo_name, self.ref_sha, self.pr_number)
+            # Stage boundary: a commit pushed to the pull request since this check was queued makes it irrelevant
+            if get_pull_request_heads().is_superseded(self.repo_name, self.pr_number, self.ref_sha, "validation"):
+                self.cancel_checkrun("Check cancelled: a newer commit was pushed to the pull request")
+                return
+            if self.concurrent_validation:
+                with ConcurrentValidation() as concurrent_validation:
+                    main_file, ref_file = concurrent_validation.load_files(AboutYaml, repo, self.ref_sha)
+                    concurrent_validation.prefetch(self.external_checks(main_file, ref_file))
+            else:
+                main_file = AboutYaml(repo)
+                ref_file = AboutYaml(repo, self.ref_sha)
 
             """
             check_message_constructor() is a important function as this is what constructs the end message on the
@@ -46,8 +62,8 @@ class AcquistionFileValidator:
             the keys in the yaml file. This is to create output messages for the main and ref branches individually.
             And AboutYaml class is what has the methods used to verify the validity of the information put into these files
             """
-            self.check_message_constructor("schema_message", main_file.is_valid, {})
-            self.check_message_constructor("schema_message", ref_file.is_valid, {}, ref=True)
+            self.check_message_constructor("schema_message", main_file.is_valid, main_file.data)
+            self.check_message_constructor("schema_message", ref_file.is_valid, ref_file.data, ref=True)
 
             """
             If you want to change or modify the default about.yaml specification for your organization then pay close attention
@@ -71,8 +87,7 @@ class AcquistionFileValidator:
 
             # block 1:- Decision tree to check if file not found in either of the two branches
             if not main_file and not ref_file:
-                response = git_service.update_check_run(
-                    self.payload,
+                response = self.check_run.complete(
                     "about.yaml file not found in main or ref branch. Please add an about.yaml file to the repo. "
                     "For more information on about.yaml formats please refer this "
                     "<a href=''>information page</a>",
@@ -115,37 +130,34 @@ class AcquistionFileValidator:
                     # data may invalidate the main branch data once merged
                     if main_file.is_valid_slack and main_file.is_valid_pagerduty and main_file.is_valid_jira:
                         if not ref_file.is_valid_pagerduty or not ref_file.is_valid_jira or not ref_file.is_valid_slack:
-                            response = git_service.update_check_run(
-                                self.payload,
+                            response = self.check_run.complete(
                                 f"PR has failed about.yaml validation checks. Latest commit {self.ref_sha} invalidates the about.yaml in main branch. "
                                 f"{self.ref_checkrun_message}",
                                 conclusion=constants.CHECKRUN_CONCLUSIONS["failure"])
                         else:
-                            response = git_service.update_check_run(
-                                self.payload,
+                            response = self.check_run.complete(
                                 "All checks Passed",
                                 conclusion=constants.CHECKRUN_CONCLUSIONS["success"])
 
                     # If main branch doesn't have valid data then check if ref is correcting it in the commit
                     elif ref_file.is_valid_slack and ref_file.is_valid_pagerduty and ref_file. is_valid_jira:
-                        response = git_service.update_check_run(
-                            self.payload, "All checks Passed",
+                        response = self.check_run.complete(
+                            "All checks Passed",
                             conclusion=constants.CHECKRUN_CONCLUSIONS["success"])
 
                     # Files in main and ref are not valid about.yaml then fail the check
                     else:
-                        response = git_service.update_check_run(
-                            self.payload, f"<b>Failed checks</b> in main and ref branches. \n"
-                                          f"{self.main_checkrun_message}\n"
-                                          f"{self.ref_checkrun_message}",
+                        response = self.check_run.complete(
+                            f"<b>Failed checks</b> in main and ref branches. \n"
+                            f"{self.main_checkrun_message}\n"
+                            f"{self.ref_checkrun_message}",
                             conclusion=constants.CHECKRUN_CONCLUSIONS["failure"])
 
                 # block 2.2:- If main branch schema is valid and ref branch schema is invalid then fail the check as the
                 # merge will corrupt the existing valid about.yaml in the main branch
                 elif main_file.is_valid and not ref_file.is_valid:
 
-                    response = git_service.update_check_run(
-                        self.payload,
+                    response = self.check_run.complete(
                         f"Failed due to schema issues in ref {self.ref_sha}. Please correct "
                         f"the file format before merging: \n{self.ref_checkrun_message}",
                         conclusion=constants.CHECKRUN_CONCLUSIONS["failure"])
@@ -167,46 +179,40 @@ class AcquistionFileValidator:
                         })
 
                     if not ref_file.is_valid_pagerduty or not ref_file.is_valid_slack or not ref_file.is_valid_jira:
-                        response = git_service.update_check_run(
-                            self.payload,
+                        response = self.check_run.complete(
                             f"PR has failed about.yaml validation checks. Latest commit {self.ref_sha} does not have a valid about.yaml file. Please address them before "
                             f"you merge: \n{self.ref_checkrun_message}",
                             conclusion=constants.CHECKRUN_CONCLUSIONS["failure"])
                     else:
-                        response = git_service.update_check_run(
-                            self.payload,
+                        response = self.check_run.complete(
                             f"Main branch about.yaml file has inconsistencies, but the ref branch {self.ref_sha} "
                             f"addresses them\n {self.ref_checkrun_message}\n\n{self.main_checkrun_message}",
                             conclusion=constants.CHECKRUN_CONCLUSIONS["success"])
 
                 # block 2.4:- If main and ref branches do not a valid schema then immediately fail the PR check
                 elif not main_file.is_valid and not ref_file.is_valid:
-                    response = git_service.update_check_run(
-                        self.payload, f"Failed schema checks on main and ref: \n"
-                                      f"{self.main_checkrun_message} \n\n{self.ref_checkrun_message}",
+                    response = self.check_run.complete(
+                        f"Failed schema checks on main and ref: \n"
+                        f"{self.main_checkrun_message} \n\n{self.ref_checkrun_message}",
                         conclusion=constants.CHECKRUN_CONCLUSIONS["failure"])
 
             # block 3:- File found in main branch but not in ref  branch, then check the main file schema. If passes, then
             # check if individual info in is valid or not. If valid then pass, else fail the check
             elif main_file and not ref_file:
                 try:
-                    ref_yaml_deleted = False
-                    pr = repo.get_pull(self.pr_number)
-                    for pr_file in pr.get_files():
-                        if pr_file.filename == "about.yaml":
-                            ref_yaml_deleted = True
+                    ref_yaml_deleted = repo.pull_request_deletes("about.yaml")
                     if ref_yaml_deleted:
-                        response = git_service.update_check_run(
-                            self.payload,
+                        response = self.check_run.complete(
                             "Looks like you're deleting the about.yaml file in the ref branch. Please add an about.yaml file to the repo. "
                             "For more information on about.yaml formats please refer this "
                             "<a href=''>information page</a>",
                             conclusion=constants.CHECKRUN_CONCLUSIONS["failure"])
                     else:
-                        response = git_service.update_check_run(
-                            self.payload,
+                        response = self.check_run.complete(
                             "All checks passed",
                             conclusion=constants.CHECKRUN_CONCLUSIONS["success"])
+                except RateLimitedException:
+                    raise
                 except Exception as e:
                     logger.error(f" Exception: {e}")
 
@@ -230,24 +236,30 @@ class AcquistionFileValidator:
                         })
 
                     if not ref_file.is_valid_slack or not ref_file.is_valid_pagerduty or not ref_file.is_valid_jira:
-                        response = git_service.update_check_run(
-                            self.payload,
+                        response = self.check_run.complete(
                             f"PR has failed about.yaml validation checks. Latest commit {self.ref_sha} invalidates the about.yaml in main branch. "
                             "Please correct them before merging to main:<br/><br/>"
                             f"{self.ref_checkrun_message}\n\n{self.main_checkrun_message}",
                             conclusion=constants.CHECKRUN_CONCLUSIONS["failure"])
                     else:
-                        response = git_service.update_check_run(
-                            self.payload,
+                        response = self.check_run.complete(
                             "All checks Passed",
                             conclusion=constants.CHECKRUN_CONCLUSIONS["success"])
                 else:
-                    response = git_service.update_check_run(
-                        self.payload,
+                    response = self.check_run.complete(
                         f"PR has failed about.yaml validation checks. Latest commit {self.ref_sha} has an invalid about.yaml"
                         " Please correct them before merging to main.</br></br>"
                         f"{self.ref_checkrun_message}\n\n{self.main_checkrun_message}",
                         conclusion=constants.CHECKRUN_CONCLUSIONS["failure"])
+        except RateLimitedException as r:
+            # The worker requeues the check, which concludes this check run once the installation has calls left
+            r.check_run_url = self.check_run.payload["url"]
+            raise
+
+        except AboutYamlDependencyException as d:
+            self.cancel_checkrun(f"Check cancelled: {d}. Please re-run the check once it is back up.")
+            logger.error(f"Failed one or more checks: {d}")
+
         except AboutYamlException as a:
             self.cancel_checkrun()
             logger.error(f"Failed one or more checks: {a}")
@@ -256,6 +268,15 @@ class AcquistionFileValidator:
             self.cancel_checkrun()
             logger.error(f"Failed processing contents of {self.repo_name}: {e}")
 
+    # Jira and Pagerduty validations the decision tree in check_executor() evaluates for the files, in evaluation order
+    def external_checks(self, main_file, ref_file):
+        checks = []
+        if ref_file.is_valid:
+            if main_file.is_valid:
+                checks += [(main_file, "is_valid_pagerduty"), (main_file, "is_valid_jira")]
+            checks += [(ref_file, "is_valid_pagerduty"), (ref_file, "is_valid_jira")]
+        return checks
+
     def get_github_token(self):
         try:
             git_app = GithubAppService()
@@ -265,13 +286,12 @@ class AcquistionFileValidator:
             logger.error(f"Failed getting github app token: {e}")
 
     # Method to cancel a check status in case when exceptions occur at any step of the file validation
-    def cancel_checkrun(self):
+    def cancel_checkrun(self, message="Check cancelled due to processing errors on Gordon. "
+                                      "Reach out to #help-security for questions"):
+        self.cancelled = True
         try:
-            git_service = GithubService(self.git_api, self.git_token)
-            response = git_service.update_check_run(
-                self.payload,
-                "Check cancelled due to processing errors on Gordon. "
-                "Reach out to #help-security for questions",
+            response = self.check_run.complete(
+                message,
                 conclusion="cancelled")
         except Exception as e:
             logger.error(f"Failed cancelling check run: {e}")
@@ -291,8 +311,7 @@ class AcquistionFileValidator:
             if identifier == "schema_message":
                 if not status:
                     message += f"<b>Schema check:</b> FAILED. <b>Description:</b> The format of the file is invalid. Expected schema format:\n"
-                    with open(constants.CURRENT_DIR + f"/valid_scehmas/acquisition.txt") as file:
-                        message += file.read()
+                    message += get_schema_registry("acquisition").get_help_text(data)
 
             elif identifier == "pagerduty_id":
                 if not status:
@@ -1,17 +1,15 @@
 import os
-import json
-import functools
 
 from gordon.configurations.jira_config import JIRAConfig
 from gordon.configurations.pagerduty_config import PagerDutyConfig
+from gordon.services.validator.schema_registry import get_schema_registry
 
 # Constants to used in the validation process for both the branches
-JIRA_BASE_URL = JIRAConfig().get_jira_url()
 CURRENT_DIR = os.path.dirname(os.path.realpath(__file__))
 
-PAGERDUTY_URL = PagerDutyConfig().get_pagerduty_url()
-PAGERDUTY_TOKEN = PagerDutyConfig().get_pagerduty_api_token()
 
+# Bump when a change to the validation logic invalidates cached validation results
+VALIDATOR_VERSION = 1
 
 CHECKRUN_CONCLUSIONS = {
     "success": "success",
@@ -20,9 +18,18 @@ CHECKRUN_CONCLUSIONS = {
 }
 
 
-# Raises Exception on file not found
-@functools.lru_cache()
-def get_yaml_schema():
-    with open(os.path.dirname(os.path.realpath(__file__)) + "/acquistion_schema.json", "r") as schema_file:
-        YAML_SCHEMA = json.load(schema_file)
-        return YAML_SCHEMA
+# Identifies the validator and schemas that produced a cached validation result
+def get_validator_version():
+    return f"acquisition:{VALIDATOR_VERSION}:{get_schema_registry('acquisition').get_fingerprint()}"
+
+
+# JIRA_BASE_URL, PAGERDUTY_URL and PAGERDUTY_TOKEN are read on use rather than when the module is imported, so importing
+# a validator does no secret file I/O and rotated secrets are picked up
+def __getattr__(name):
+    if name == "JIRA_BASE_URL":
+        return JIRAConfig().get_jira_url()
+    if name == "PAGERDUTY_URL":
+        return PagerDutyConfig().get_pagerduty_url()
+    if name == "PAGERDUTY_TOKEN":
+        return PagerDutyConfig().get_pagerduty_api_token()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
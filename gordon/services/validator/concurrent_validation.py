@@ -0,0 +1,54 @@
+from gordon.configurations.validator_config import ValidatorConfig
+from concurrent.futures import ThreadPoolExecutor, wait
+import contextvars
+from github import GithubObject
+
+
+# Runs the network bound steps of a check on a bounded thread pool: both about.yaml versions are fetched in parallel,
+# then the Jira and Pagerduty lookups the decision tree is going to evaluate are warmed in parallel.
+# The decision tree itself still runs serially on the warmed cached properties, so conclusions and messages are the same
+# as in serial mode. Errors are raised in the order serial evaluation would have raised them
+class ConcurrentValidation:
+    def __init__(self, max_workers=None):
+        if max_workers is None:
+            max_workers = ValidatorConfig().get_validation_threads()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gordon-validation")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.executor.shutdown(wait=True)
+
+    # Tasks run in a copy of the caller's context so their outbound calls are counted with the event's
+    def submit(self, fn, *args):
+        return self.executor.submit(contextvars.copy_context().run, fn, *args)
+
+    def load_files(self, about_yaml_class, repo, ref_sha):
+        main_future = self.submit(about_yaml_class, repo, GithubObject.NotSet)
+        ref_future = self.submit(about_yaml_class, repo, ref_sha)
+        wait([main_future, ref_future])
+        main_file, ref_file = main_future.result(), ref_future.result()
+
+        # A ref that did not change about.yaml carries the same blob as main, which only needs validating once
+        if ref_file.sha is not None and ref_file.sha == main_file.sha:
+            return main_file, main_file
+        return main_file, ref_file
+
+    def prefetch(self, checks):
+        """
+        :param checks: list of (about_yaml, property name) pairs, in the order the decision tree evaluates them
+        """
+        futures = [self.submit(self.evaluate, about_yaml, property_name)
+                   for about_yaml, property_name in dict.fromkeys(checks)]
+        wait(futures)
+        for future in futures:
+            future.result()
+
+    # Before Python 3.12 functools.cached_property evaluates under one lock shared by every instance, which would
+    # serialize the lookups of the main and ref files. The wrapped function is called directly instead and its result
+    # stored where cached_property keeps it
+    @staticmethod
+    def evaluate(about_yaml, property_name):
+        if property_name not in about_yaml.__dict__:
+            about_yaml.__dict__[property_name] = getattr(type(about_yaml), property_name).func(about_yaml)
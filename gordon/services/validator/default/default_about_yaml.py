@@ -1,18 +1,22 @@
-import yaml
 import base64
-import requests
+from gordon.services.common.outbound_policy import CircuitOpenException
+from gordon.services.github.rate_limit import RateLimitedException
+from gordon.services.validator.jira_lookup import get_jira_lookup
+from gordon.services.validator.pagerduty_lookup import get_pagerduty_lookup
+from gordon.services.validator.schema_registry import get_schema_registry
+from gordon.services.validator.validation_results import ValidationResults
+from gordon.services.validator.yaml_parser import get_yaml_parser
 import functools
 import json
 from gordon.services.validator.default import default_constants
 from gordon.configurations.ad_user_config import ADUser
 from celery.utils.log import get_task_logger
-from jsonschema import Draft7Validator
 from github import GithubException, GithubObject
 
 logger = get_task_logger(__name__)
 
 
-@functools.lru_cache(maxsize=1)
+# Read through the secrets provider on every use so rotated credentials are picked up
 def get_auth():
     ad = ADUser()
     _username, _password = ad.get_ad_creds()
@@ -23,11 +27,18 @@ class AboutYamlException(Exception):
     pass
 
 
+# Raised when a validation could not run because an external dependency is unavailable
+class AboutYamlDependencyException(AboutYamlException):
+    pass
+
+
 # Class to validate the schema of the about.yaml file and also the contents of the fields
 class AboutYaml:
     def __init__(self, repo, ref=GithubObject.NotSet):
         self.data = None
         self.version = None
+        self.sha = None
+        self.results = ValidationResults(None, None)
         self.load(repo, ref)
 
     def __bool__(self):
@@ -36,14 +47,26 @@ class AboutYaml:
     def load(self, repo, ref):
         try:
             contents = repo.get_contents("about.yaml", ref=ref)
-            data = base64.b64decode(contents.content).decode()
-            self.data = yaml.load(data, Loader=yaml.FullLoader)
+            self.sha = contents.sha
+            self.results = ValidationResults(default_constants.get_validator_version(), self.sha)
+            cached = self.results.load()
+            if cached is not None:
+                self.data = cached["data"]
+                if isinstance(self.data, dict):
+                    self.version = self.data.get("version")
+                self.results.restore(self)
+                return self.is_valid
+
+            self.data = get_yaml_parser().parse(base64.b64decode(contents.content))
             return self.is_valid
         except GithubException as e:
             self.data = None
             logger.debug(f"Github exception: {e}")
             return self.is_valid
 
+        except RateLimitedException:
+            raise
+
         except Exception as e:
             msg = "Could not parse about.yaml"
 
@@ -52,92 +75,47 @@ class AboutYaml:
 
             raise AboutYamlException(msg)
 
-    @property
-    @functools.lru_cache()
+    @functools.cached_property
     def is_valid(self):
         if not self.data or "organization" not in self.data:
             return False
 
-        self.version = self.data["organization"]
-        return Draft7Validator(default_constants.get_yaml_schema()).is_valid(self.data)
+        self.version = self.data.get("version")
+        valid = get_schema_registry("default").is_valid(self.data)
+        return self.results.record("is_valid", valid, data=self.data)
 
-    @property
-    @functools.lru_cache()
+    @functools.cached_property
     def is_valid_jira(self):
         try:
-            auth = get_auth()
-            endpoint = self.data.get("jira_id")
-            url = f"{default_constants.JIRA_BASE_URL}{endpoint}"
-            response = requests.get(url, auth=auth)
-
-            if response.status_code == 200:
-                result = response.json()
-
-                if result["projectCategory"]["name"] != "Defunct":
-                    return True
-                else:
-                    return False
-            elif response.status_code == 404:
-                return False
-            elif response.status_code == 401:
-                logger.error(
-                    f"JIRA service user authentication failure with code {response.status_code}.")
-                raise AboutYamlException(
-                    "JIRA service user auth failure code 401"
-                )
-            elif response.status_code == 403:
-                logger.error(f"Service account blocked on JIRA authentication with status code:"
-                             f"{response.status_code} and message: {response.text}")
-                raise AboutYamlException(
-                    "JIRA service user auth failure"
-                )
-            else:
-                logger.error(f"JIRA server down, with status code:"
-                             f"{response.status_code} and message: {response.text}")
-                raise AboutYamlException(
-                    "JIRA server error"
-                )
+            valid = get_jira_lookup().is_valid_project(default_constants.JIRA_BASE_URL, self.data.get("jira_id"),
+                                                       get_auth())
+            return self.results.record("is_valid_jira", valid)
+        except CircuitOpenException as e:
+            logger.error(f"Skipped verifying Jira project: {e}")
+            raise AboutYamlDependencyException(
+                "Jira is currently unavailable so the Jira project could not be verified"
+            )
         except Exception as e:
             logger.error(f"Failed verifying Jira project: {e}")
             raise AboutYamlException(
                 "JIRA service user auth failure"
             )
 
-    @property
+    @functools.cached_property
     def is_valid_pagerduty(self):
-        api_url, api_token = default_constants.PAGERDUTY_URL, default_constants.PAGERDUTY_TOKEN
         schedule_id = self.data.get("pagerduty_id")
-        pd_url = api_url + f"{schedule_id}/users"
-        headers = {'Authorization': f"Token token={api_token}", 'Accept': 'application/vnd.pagerduty+json;version=2'}
 
         try:
-            response = requests.get(pd_url, headers=headers)
-            if response.status_code == 200:
-                return True
-
-            elif response.status_code == 404:
-                return False
-
-            elif response.status_code == 401:
-                logger.error(
-                    "Failed Pagerduty verification with status code: "
-                    f"{response.status_code}, message: {response.text}"
-                )
-                raise AboutYamlException(
-                    "Pagerduty token auth failure code 401"
-                )
-
-            else:
-                logger.error(
-                    "Pagerduty server down with status code: "
-                    f"{response.status_code}, message: {response.text}"
-                )
-                raise AboutYamlException(
-                    "Pagerduty server error"
-                )
-
+            api_url, api_token = default_constants.PAGERDUTY_URL, default_constants.PAGERDUTY_TOKEN
+            valid = get_pagerduty_lookup().is_valid_schedule(api_url, schedule_id, api_token)
+            return self.results.record("is_valid_pagerduty", valid)
+        except CircuitOpenException as e:
+            logger.error(f"Skipped verifying Pagerduty data: {e}")
+            raise AboutYamlDependencyException(
+                "Pagerduty is currently unavailable so the Pagerduty schedule could not be verified"
+            )
         except Exception as e:
-            logger.error(f"Failed verifying Pagerduty data: {pd_url}")
+            logger.error(f"Failed verifying Pagerduty data: {e}")
             raise AboutYamlException(
-                f"Failed verifying Pagerduty data: {pd_url}"
+                f"Failed verifying Pagerduty schedule: {schedule_id}"
             )
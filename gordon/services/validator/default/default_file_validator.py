@@ -1,6 +1,13 @@
-from gordon.services.validator.default.default_about_yaml import AboutYaml, AboutYamlException
+from gordon.services.validator.default.default_about_yaml import AboutYaml, AboutYamlException, \
+    AboutYamlDependencyException
 from gordon.configurations.github_config import GithubConfig
+from gordon.configurations.validator_config import ValidatorConfig
 from gordon.services.github.github_service import GithubService, GithubAppService
+from gordon.services.github.rate_limit import RateLimitedException
+from gordon.services.github.repository_backend import get_repository_backend
+from gordon.services.validator.concurrent_validation import ConcurrentValidation
+from gordon.services.validator.pull_request_heads import get_pull_request_heads
+from gordon.services.validator.schema_registry import get_schema_registry
 from celery.utils.log import get_task_logger
 from gordon.services.validator.default import default_constants
 
@@ -8,9 +15,9 @@ logger = get_task_logger(__name__)
 
 
 class DefaultFileValidator:
-    def __init__(self, payload, repo_name, ref_sha, installation_id, pr_number):
+    def __init__(self, check_run, repo_name, ref_sha, installation_id, pr_number):
         """
-        :param payload: Github app payload in Json format
+        :param check_run: CheckRunManager of the started gordon check run
         :param repo_name: Name of repo for which the check is running
         :param ref_sha: SHA value of the commit from which the pull request was generated
         :param installation_id: Github app installation id
@@ -18,10 +25,12 @@ class DefaultFileValidator:
         """
         self.git_api = GithubConfig().get_github_api()
         self.pr_number = pr_number
-        self.payload = payload
+        self.check_run = check_run
         self.repo_name = repo_name
         self.ref_sha = ref_sha
         self.installation_id = installation_id
+        self.concurrent_validation = ValidatorConfig().is_concurrent_validation_enabled()
+        self.cancelled = False
         self.git_token = self.get_github_token()
         self.main_checkrun_message = "<h2>Check results on main branch:</h2>\n"
         self.ref_checkrun_message = f"<h2>Check results on commit branch {self.ref_sha}</h2>\n"
@@ -29,25 +38,31 @@ class DefaultFileValidator:
     # Method called by the celery processor to initiate the about.yaml file validation and update check-run status accordingly
     def check_executor(self):
         git_service = GithubService(self.git_api, self.git_token)
-        self.payload = git_service.update_check_run(self.payload, "update stats", status="in_progress")
-
         try:
-            repo = git_service.get_repository(self.repo_name)
-            main_file = AboutYaml(repo)
-            ref_file = AboutYaml(repo, self.ref_sha)
+            repo = get_repository_backend(git_service, self.repo_name, self.ref_sha, self.pr_number)
+            # Stage boundary: a commit pushed to the pull request since this check was queued makes it irrelevant
+            if get_pull_request_heads().is_superseded(self.repo_name, self.pr_number, self.ref_sha, "validation"):
+                self.cancel_checkrun("Check cancelled: a newer commit was pushed to the pull request")
+                return
+            if self.concurrent_validation:
+                with ConcurrentValidation() as concurrent_validation:
+                    main_file, ref_file = concurrent_validation.load_files(AboutYaml, repo, self.ref_sha)
+                    concurrent_validation.prefetch(self.external_checks(main_file, ref_file))
+            else:
+                main_file = AboutYaml(repo)
+                ref_file = AboutYaml(repo, self.ref_sha)
             """
             check_message_constructor() is a important function as this is what constructs the end message on the
             page of a status check of a pull request. Observe how this method in this file is called twice for each of
             the keys in the yaml file. This is to create output messages for the main and ref branches individually.
             And AboutYaml class is what has the methods used to verify the validity of the information put into these files
             """
-            self.check_message_constructor("schema_message", main_file.is_valid, {})
-            self.check_message_constructor("schema_message", ref_file.is_valid, {}, ref=True)
+            self.check_message_constructor("schema_message", main_file.is_valid, main_file.data)
+            self.check_message_constructor("schema_message", ref_file.is_valid, ref_file.data, ref=True)
 
             # block 1:- Decision tree to check if file not found in either of the two branches
             if not main_file and not ref_file:
-                response = git_service.update_check_run(
-                    self.payload,
+                response = self.check_run.complete(
                     "about.yaml file not found in main or ref branch. Please add an about.yaml file to the repo. "
                     "For more information on about.yaml formats please refer this "
                     "<a href=''>information page</a>",
@@ -80,37 +95,34 @@ class DefaultFileValidator:
                     # data may invalidate the main branch data once merged
                     if main_file.is_valid_jira and main_file.is_valid_pagerduty:
                         if not ref_file.is_valid_jira or not ref_file.is_valid_pagerduty:
-                            response = git_service.update_check_run(
-                                self.payload,
+                            response = self.check_run.complete(
                                 f"PR has failed about.yaml validation checks. Latest commit {self.ref_sha} invalidates the about.yaml in main branch. "
                                 f"{self.ref_checkrun_message}",
                                 conclusion=default_constants.CHECKRUN_CONCLUSIONS["failure"])
                         else:
-                            response = git_service.update_check_run(
-                                self.payload,
+                            response = self.check_run.complete(
                                 "All checks Passed",
                                 conclusion=default_constants.CHECKRUN_CONCLUSIONS["success"])
 
                     # If main branch doesn't have valid data then check if ref is correcting it in the commit
                     elif ref_file.is_valid_jira and ref_file.is_valid_pagerduty:
-                        response = git_service.update_check_run(
-                            self.payload, "All checks Passed",
+                        response = self.check_run.complete(
+                            "All checks Passed",
                             conclusion=default_constants.CHECKRUN_CONCLUSIONS["success"])
 
                     # Files in main and ref are not valid about.yaml then fail the check
                     else:
-                        response = git_service.update_check_run(
-                            self.payload, f"<b>Failed checks</b> in main and ref branches. \n"
-                                          f"{self.main_checkrun_message}\n"
-                                          f"{self.ref_checkrun_message}",
+                        response = self.check_run.complete(
+                            f"<b>Failed checks</b> in main and ref branches. \n"
+                            f"{self.main_checkrun_message}\n"
+                            f"{self.ref_checkrun_message}",
                             conclusion=default_constants.CHECKRUN_CONCLUSIONS["failure"])
 
                 # block 2.2:- If main branch schema is valid and ref branch schema is invalid then fail the check as the merge will corrupt the
                 # existing valid about.yaml in the main branch
                 elif main_file.is_valid and not ref_file.is_valid:
 
-                    response = git_service.update_check_run(
-                        self.payload,
+                    response = self.check_run.complete(
                         f"Failed due to schema issues in ref {self.ref_sha}. Please correct "
                         f"the file format before merging: \n{self.ref_checkrun_message}",
                         conclusion=default_constants.CHECKRUN_CONCLUSIONS["failure"])
@@ -128,22 +140,20 @@ class DefaultFileValidator:
                         }, ref=True)
 
                     if not ref_file.is_valid_pagerduty or not ref_file.is_valid_jira:
-                        response = git_service.update_check_run(
-                            self.payload,
+                        response = self.check_run.complete(
                             f"PR has failed about.yaml validation checks. Latest commit {self.ref_sha} does not have a valid about.yaml file. Please address them before "
                             f"you merge: \n{self.ref_checkrun_message}",
                             conclusion=default_constants.CHECKRUN_CONCLUSIONS["failure"])
                     else:
-                        response = git_service.update_check_run(
-                            self.payload,
+                        response = self.check_run.complete(
                             f"Main branch about.yaml file has inconsistencies, but the ref branch {self.ref_sha} "
                             f"addresses them\n {self.ref_checkrun_message}\n\n{self.main_checkrun_message}",
                             conclusion=default_constants.CHECKRUN_CONCLUSIONS["success"])
 
                 # block 2.4:- If main and ref do not a valid schema then immediately fail the PR check
                 elif not main_file.is_valid and not ref_file.is_valid:
-                    response = git_service.update_check_run(
-                        self.payload, f"Failed schema checks on main and ref: \n"
+                    response = self.check_run.complete(
+                        f"Failed schema checks on main and ref: \n"
                         f"{self.main_checkrun_message} \n\n{self.ref_checkrun_message}",
                         conclusion=default_constants.CHECKRUN_CONCLUSIONS["failure"])
 
@@ -151,23 +161,19 @@ class DefaultFileValidator:
             # check if file info is valid or not. If valid then pass, else fail the check
             elif main_file and not ref_file:
                 try:
-                    ref_yaml_deleted = False
-                    pr = repo.get_pull(self.pr_number)
-                    for pr_file in pr.get_files():
-                        if pr_file.filename == "about.yaml":
-                            ref_yaml_deleted = True
+                    ref_yaml_deleted = repo.pull_request_deletes("about.yaml")
                     if ref_yaml_deleted:
-                        response = git_service.update_check_run(
-                            self.payload,
+                        response = self.check_run.complete(
                             "Looks like you're deleting the about.yaml file in the ref branch. Please add an about.yaml file to the repo. "
                             "For more information on about.yaml formats please refer this "
                             "<a href=''>information page</a>",
                             conclusion=default_constants.CHECKRUN_CONCLUSIONS["failure"])
                     else:
-                        response = git_service.update_check_run(
-                            self.payload,
+                        response = self.check_run.complete(
                             "All checks passed",
                             conclusion=default_constants.CHECKRUN_CONCLUSIONS["success"])
+                except RateLimitedException:
+                    raise
                 except Exception as e:
                     logger.error(f" Exception: {e}")
 
@@ -186,24 +192,30 @@ class DefaultFileValidator:
                         }, ref=True)
 
                     if not ref_file.is_valid_jira or not ref_file.is_valid_pagerduty:
-                        response = git_service.update_check_run(
-                            self.payload,
+                        response = self.check_run.complete(
                             f"PR has failed about.yaml validation checks. Latest commit {self.ref_sha} invalidates the about.yaml in main branch. "
                             "Please correct them before merging to main:<br/><br/>"
                             f"{self.ref_checkrun_message}\n\n{self.main_checkrun_message}",
                             conclusion=default_constants.CHECKRUN_CONCLUSIONS["failure"])
                     else:
-                        response = git_service.update_check_run(
-                            self.payload,
+                        response = self.check_run.complete(
                             "All checks Passed",
                             conclusion=default_constants.CHECKRUN_CONCLUSIONS["success"])
                 else:
-                    response = git_service.update_check_run(
-                        self.payload,
+                    response = self.check_run.complete(
                         f"PR has failed about.yaml validation checks. Latest commit {self.ref_sha} has an invalid about.yaml"
                         " Please correct them before merging to main.</br></br>"
                         f"{self.ref_checkrun_message}\n\n{self.main_checkrun_message}",
                         conclusion=default_constants.CHECKRUN_CONCLUSIONS["failure"])
+        except RateLimitedException as r:
+            # The worker requeues the check, which concludes this check run once the installation has calls left
+            r.check_run_url = self.check_run.payload["url"]
+            raise
+
+        except AboutYamlDependencyException as d:
+            self.cancel_checkrun(f"Check cancelled: {d}. Please re-run the check once it is back up.")
+            logger.error(f"Failed one or more checks: {d}")
+
         except AboutYamlException as a:
             self.cancel_checkrun()
             logger.error(f"Failed one or more checks: {a}")
@@ -212,6 +224,15 @@ class DefaultFileValidator:
             self.cancel_checkrun()
             logger.error(f"Failed processing contents of {self.repo_name}: {e}")
 
+    # Jira and Pagerduty validations the decision tree in check_executor() evaluates for the files, in evaluation order
+    def external_checks(self, main_file, ref_file):
+        checks = []
+        if ref_file.is_valid:
+            if main_file.is_valid:
+                checks += [(main_file, "is_valid_jira"), (main_file, "is_valid_pagerduty")]
+            checks += [(ref_file, "is_valid_jira"), (ref_file, "is_valid_pagerduty")]
+        return checks
+
     def get_github_token(self):
         try:
             git_app = GithubAppService()
@@ -221,13 +242,12 @@ class DefaultFileValidator:
             logger.error(f"Failed getting github app token: {e}")
 
     # Method to cancel a check status in case when exceptions occur at any step of the file validation
-    def cancel_checkrun(self):
+    def cancel_checkrun(self, message="Check cancelled due to processing errors on Gordon. "
+                                      "Reach out to #help-security for questions"):
+        self.cancelled = True
         try:
-            git_service = GithubService(self.git_api, self.git_token)
-            response = git_service.update_check_run(
-                self.payload,
-                "Check cancelled due to processing errors on Gordon. "
-                "Reach out to #help-security for questions",
+            response = self.check_run.complete(
+                message,
                 conclusion="cancelled")
         except Exception as e:
             logger.error(f"Failed cancelling check run: {e}")
@@ -246,8 +266,7 @@ class DefaultFileValidator:
             if identifier == "schema_message":
                 if not status:
                     message += f"<b>Schema check:</b> FAILED. <b>Description:</b> The format of the file is invalid. Expected schema format:\n"
-                    with open(default_constants.CURRENT_DIR + f"/valid_scehmas/default.txt") as file:
-                        message += file.read()
+                    message += get_schema_registry("default").get_help_text(data)
 
             elif identifier == "jira_id":
                 if not status:
@@ -0,0 +1,223 @@
+from gordon.configurations.cache_config import CacheConfig
+from gordon.configurations.jira_config import JIRAConfig
+from gordon.services.common import outbound_policy, metrics
+from gordon.services.common.redis_client import get_redis_client, mark_redis_unavailable
+from gordon.services.common.singleflight import SingleFlight
+from gordon.services.common.ttl_cache import TwoTierCache
+from celery.utils.log import get_task_logger
+import threading
+import time
+import uuid
+
+logger = get_task_logger(__name__)
+
+PROJECT_VALID = "valid"
+PROJECT_DEFUNCT = "defunct"
+PROJECT_NOT_FOUND = "not_found"
+
+INDEX_KEY = "gordon:jira-projects"
+# Projects are stored in the index with a one character status
+INDEX_CODES = {PROJECT_VALID: "v", PROJECT_DEFUNCT: "d"}
+INDEX_STATUSES = {code: status for status, code in INDEX_CODES.items()}
+# Seconds the previous index stays readable after a refresh, for workers still loading it
+PREVIOUS_INDEX_TTL = 60
+
+
+class JiraLookupException(Exception):
+    pass
+
+
+def get_project_status(project):
+    category = project.get("projectCategory") or {}
+    return PROJECT_DEFUNCT if category.get("name") == "Defunct" else PROJECT_VALID
+
+
+# Looks up Jira projects in the project index first, then through a cache shared by all checks and workers.
+# Active, "Defunct" and unknown projects are cached with their own TTLs, errors are never cached. Concurrent lookups
+# of the same project share one Jira call
+class JiraProjectLookup:
+    def __init__(self, cache=None, index=None):
+        cache_config = CacheConfig()
+        self.cache = cache if cache is not None else TwoTierCache("jira-project", cache_config.get_local_cache_size())
+        valid_ttl, defunct_ttl, not_found_ttl = cache_config.get_jira_ttls()
+        self.ttls = {
+            PROJECT_VALID: valid_ttl,
+            PROJECT_DEFUNCT: defunct_ttl,
+            PROJECT_NOT_FOUND: not_found_ttl
+        }
+        self.index = index if index is not None else get_jira_index()
+        self.single_flight = SingleFlight()
+
+    @staticmethod
+    def normalize_key(project_key):
+        return str(project_key).strip().upper()
+
+    def is_valid_project(self, jira_base_url, project_key, auth):
+        return self.get_project_status(jira_base_url, project_key, auth) == PROJECT_VALID
+
+    # Jira project keys are case insensitive, the normalized key is both the cache key and the key looked up in Jira
+    def get_project_status(self, jira_base_url, project_key, auth):
+        project_key = self.normalize_key(project_key)
+        status = self.index.get_status(project_key)
+        if status is not None:
+            return status
+        status = self.cache.get(project_key)
+        if status is None:
+            status = self.single_flight.do(
+                project_key, lambda: self.refresh_project_status(jira_base_url, project_key, auth))
+        return status
+
+    def refresh_project_status(self, jira_base_url, project_key, auth):
+        """
+        :param project_key: normalized project key
+        """
+        status = self.fetch_project_status(jira_base_url, project_key, auth)
+        self.cache.set(project_key, status, self.ttls[status])
+        return status
+
+    @staticmethod
+    def fetch_project_status(jira_base_url, project_key, auth):
+        url = f"{jira_base_url}{project_key}"
+        response = outbound_policy.request("jira", "GET", url, auth=auth)
+
+        if response.status_code == 200:
+            return get_project_status(response.json())
+        elif response.status_code == 404:
+            return PROJECT_NOT_FOUND
+        elif response.status_code == 401:
+            logger.error(
+                f"JIRA service user authentication failure with code {response.status_code}. "
+                f"Bad Authorization requires CAPTCHA reset")
+            raise JiraLookupException(
+                "JIRA service user auth failure code 401"
+            )
+        elif response.status_code == 403:
+            logger.error(f"Service account blocked on JIRA authentication with status code:"
+                         f"{response.status_code} and message: {response.text}")
+            raise JiraLookupException(
+                "JIRA service user auth failure"
+            )
+        else:
+            logger.error(f"JIRA server down, with status code:"
+                         f"{response.status_code} and message: {response.text}")
+            raise JiraLookupException(
+                "JIRA server error"
+            )
+
+
+# Every Jira project and whether it is "Defunct", loaded from Jira's project listing by the refresh_jira_index task the
+# Celery beat schedule runs every GORDON_JIRA_INDEX_REFRESH_INTERVAL seconds. Each load is written to Redis as a new
+# hash of project key to status and published by pointing INDEX_KEY at it, so workers never read a partial index.
+# Workers keep a copy in process memory and check for a newer one every GORDON_JIRA_INDEX_CHECK_INTERVAL seconds;
+# projects created since the last load are not in the index and are looked up live
+class JiraProjectIndex:
+    def __init__(self, enabled=None, check_interval=None, ttl=None):
+        jira_config = JIRAConfig()
+        self.enabled = enabled if enabled is not None else jira_config.is_project_index_enabled()
+        self.check_interval = check_interval if check_interval is not None else \
+            jira_config.get_project_index_check_interval()
+        # An index the beat schedule stopped refreshing expires rather than being used indefinitely
+        self.ttl = ttl if ttl is not None else 4 * jira_config.get_project_index_refresh_interval()
+        self.generation = None
+        self.statuses = {}
+        self.next_check = 0
+        self.lock = threading.Lock()
+
+    def get_status(self, project_key):
+        """
+        :param project_key: normalized project key
+        :return: the status of an indexed project, None when the project is not in the index
+        """
+        if not self.enabled:
+            return None
+        self.reload_if_changed()
+        status = self.statuses.get(project_key)
+        metrics.increment("jira.index", tags={"result": "miss" if status is None else "hit"})
+        return status
+
+    def reload_if_changed(self):
+        now = time.monotonic()
+        if now < self.next_check:
+            return
+        with self.lock:
+            if now < self.next_check:
+                return
+            self.next_check = now + self.check_interval
+            client = get_redis_client()
+            if client is None:
+                return
+            try:
+                generation = client.get(INDEX_KEY)
+                if generation is None:
+                    self.generation, self.statuses = None, {}
+                    return
+                if generation == self.generation:
+                    return
+                entries = client.hgetall(f"{INDEX_KEY}:{generation.decode()}")
+                self.statuses = {key.decode(): INDEX_STATUSES[code.decode()] for key, code in entries.items()}
+                self.generation = generation
+                logger.info(f"Loaded {len(self.statuses)} Jira projects from the project index")
+            except Exception as e:
+                mark_redis_unavailable(e)
+
+    def refresh(self, jira_base_url, auth):
+        statuses = self.fetch_projects(jira_base_url, auth)
+        generation = uuid.uuid4().hex
+        client = get_redis_client()
+        if client is not None:
+            try:
+                self.publish(client, generation, statuses)
+            except Exception as e:
+                mark_redis_unavailable(e)
+
+        with self.lock:
+            self.generation, self.statuses = generation.encode(), statuses
+        logger.info(f"Indexed {len(statuses)} Jira projects")
+        metrics.gauge("jira.index.projects", len(statuses))
+        return len(statuses)
+
+    def publish(self, client, generation, statuses):
+        key = f"{INDEX_KEY}:{generation}"
+        previous = client.get(INDEX_KEY)
+        entries = [(project_key, INDEX_CODES[status]) for project_key, status in statuses.items()]
+        pipeline = client.pipeline()
+        for start in range(0, len(entries), 1000):
+            pipeline.hset(key, mapping=dict(entries[start:start + 1000]))
+        pipeline.expire(key, self.ttl)
+        pipeline.set(INDEX_KEY, generation, ex=self.ttl)
+        if previous is not None:
+            pipeline.expire(f"{INDEX_KEY}:{previous.decode()}", PREVIOUS_INDEX_TTL)
+        pipeline.execute()
+
+    @staticmethod
+    def fetch_projects(jira_base_url, auth):
+        # JIRA_API is the project resource, which lists every project the service user can browse
+        response = outbound_policy.request("jira", "GET", jira_base_url.rstrip("/"), auth=auth)
+        if response.status_code != 200:
+            logger.error(f"Failed listing Jira projects, with status code: {response.status_code}")
+            raise JiraLookupException(f"Failed listing Jira projects with status code {response.status_code}")
+        projects = response.json()
+        # An empty listing means the service user lost access rather than Jira having no projects
+        if not projects:
+            raise JiraLookupException("Jira listed no projects")
+        return {JiraProjectLookup.normalize_key(project["key"]): get_project_status(project) for project in projects}
+
+
+_jira_index = None
+
+
+def get_jira_index():
+    global _jira_index
+    if _jira_index is None:
+        _jira_index = JiraProjectIndex()
+    return _jira_index
+
+
+_jira_lookup = None
+
+
+def get_jira_lookup():
+    global _jira_lookup
+    if _jira_lookup is None:
+        _jira_lookup = JiraProjectLookup()
+    return _jira_lookup
@@ -0,0 +1,110 @@
+from gordon.configurations.cache_config import CacheConfig
+from gordon.services.common import outbound_policy, metrics
+from gordon.services.common.singleflight import SingleFlight
+from gordon.services.common.ttl_cache import TwoTierCache
+from celery.utils.log import get_task_logger
+import contextvars
+import threading
+
+logger = get_task_logger(__name__)
+
+SCHEDULE_VALID = "valid"
+SCHEDULE_NOT_FOUND = "not_found"
+
+
+class PagerDutyLookupException(Exception):
+    pass
+
+
+# Looks up Pagerduty schedules through a cache shared by all checks and workers.
+# Concurrent lookups of the same schedule, e.g. the main and ref about.yaml of one check, share one Pagerduty call.
+# Once a valid schedule passes its TTL it is still served for stale_ttl seconds while a background refresh replaces
+# it, so a check only waits on Pagerduty for schedules it has never seen. Unknown schedules are never served stale, so
+# a schedule created after a failed check is found as soon as its not found entry expires
+class PagerDutyScheduleLookup:
+    def __init__(self, cache=None):
+        cache_config = CacheConfig()
+        self.cache = cache if cache is not None else \
+            TwoTierCache("pagerduty-schedule", cache_config.get_local_cache_size())
+        valid_ttl, not_found_ttl, self.stale_ttl = cache_config.get_pagerduty_ttls()
+        self.ttls = {
+            SCHEDULE_VALID: valid_ttl,
+            SCHEDULE_NOT_FOUND: not_found_ttl
+        }
+        self.single_flight = SingleFlight()
+
+    @staticmethod
+    def normalize_key(schedule_id):
+        return str(schedule_id).strip()
+
+    # The normalized schedule ID is both the cache key and the schedule looked up in Pagerduty
+    def is_valid_schedule(self, pagerduty_url, schedule_id, api_token):
+        schedule_id = self.normalize_key(schedule_id)
+        entry = self.cache.get_entry(schedule_id, allow_stale=True)
+
+        if entry is None:
+            status = self.single_flight.do(
+                schedule_id, lambda: self.refresh_schedule_status(pagerduty_url, schedule_id, api_token))
+            return status == SCHEDULE_VALID
+
+        if not entry.is_fresh and not self.single_flight.in_flight(schedule_id):
+            metrics.increment("pagerduty.stale_served")
+            # The refresh runs in a copy of the context so its call is counted with the rest of the event
+            threading.Thread(target=contextvars.copy_context().run,
+                             args=(self.revalidate, pagerduty_url, schedule_id, api_token), daemon=True).start()
+        return entry.value == SCHEDULE_VALID
+
+    def revalidate(self, pagerduty_url, schedule_id, api_token):
+        try:
+            self.single_flight.do(
+                schedule_id, lambda: self.refresh_schedule_status(pagerduty_url, schedule_id, api_token))
+        except Exception as e:
+            logger.error(f"Failed refreshing Pagerduty schedule {schedule_id}: {e}")
+
+    def refresh_schedule_status(self, pagerduty_url, schedule_id, api_token):
+        """
+        :param schedule_id: normalized schedule ID
+        """
+        status = self.fetch_schedule_status(pagerduty_url, schedule_id, api_token)
+        stale_ttl = self.stale_ttl if status == SCHEDULE_VALID else 0
+        self.cache.set(schedule_id, status, self.ttls[status], stale_ttl)
+        return status
+
+    # Fetches the schedule itself rather than /schedules/{id}/users, which renders the on-call users of the whole
+    # rotation and is expensive for large schedules
+    @staticmethod
+    def fetch_schedule_status(pagerduty_url, schedule_id, api_token):
+        pd_url = f"{pagerduty_url}{schedule_id}"
+        headers = {'Authorization': f"Token token={api_token}", 'Accept': 'application/vnd.pagerduty+json;version=2'}
+        response = outbound_policy.request("pagerduty", "GET", pd_url, headers=headers)
+
+        if response.status_code == 200:
+            return SCHEDULE_VALID
+        elif response.status_code == 404:
+            return SCHEDULE_NOT_FOUND
+        elif response.status_code == 401:
+            logger.error(
+                "Failed Pagerduty verification with status code: "
+                f"{response.status_code}, message: {response.text}"
+            )
+            raise PagerDutyLookupException(
+                "Pagerduty token auth failure code 401"
+            )
+        else:
+            logger.error(
+                "Pagerduty server down with status code: "
+                f"{response.status_code}, message: {response.text}"
+            )
+            raise PagerDutyLookupException(
+                "Pagerduty server error"
+            )
+
+
+_pagerduty_lookup = None
+
+
+def get_pagerduty_lookup():
+    global _pagerduty_lookup
+    if _pagerduty_lookup is None:
+        _pagerduty_lookup = PagerDutyScheduleLookup()
+    return _pagerduty_lookup
@@ -0,0 +1,85 @@
+from gordon.configurations.validator_config import ValidatorConfig
+from gordon.services.common import metrics
+from gordon.services.common.redis_client import get_redis_client, mark_redis_unavailable
+from celery.utils.log import get_task_logger
+
+logger = get_task_logger(__name__)
+
+HEAD_KEY_PREFIX = "gordon:pr-head"
+# Seconds the latest head SHA of a pull request is remembered after its last push
+HEAD_TTL = 86400
+# Records the head SHA with the updated_at of its pull request event, unless the recorded head came from an event of a
+# later updated_at. Github does not deliver webhooks in order, and ISO 8601 UTC timestamps compare as strings
+RECORD_HEAD_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if current then
+    local separator = string.find(current, ' ', 1, true)
+    if separator and string.sub(current, separator + 1) > ARGV[2] then
+        return 0
+    end
+end
+redis.call('SET', KEYS[1], ARGV[1] .. ' ' .. ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+
+# Latest head SHA of each pull request, recorded by the API as pull request events arrive and shared with the workers
+# through Redis. A validation whose head SHA is no longer the latest of its pull request is superseded: it is skipped
+# before it starts and short-circuits at the next stage boundary once it has. Without Redis nothing is superseded.
+# Heads are stored as "<sha> <updated_at>", a head delivered after a newer one does not replace it
+class PullRequestHeads:
+    def __init__(self):
+        self.enabled = ValidatorConfig().is_supersede_enabled()
+
+    @staticmethod
+    def head_key(repo_name, pr_number):
+        return f"{HEAD_KEY_PREFIX}:{repo_name.lower()}:{pr_number}"
+
+    def record_head(self, repo_name, pr_number, head_sha, updated_at=None):
+        """
+        :param updated_at: updated_at of the pull request in the event, heads without one always replace the last head
+        """
+        client = get_redis_client() if self.enabled else None
+        if client is None:
+            return
+        try:
+            key = self.head_key(repo_name, pr_number)
+            if updated_at:
+                if not client.eval(RECORD_HEAD_SCRIPT, 1, key, head_sha, updated_at, HEAD_TTL):
+                    logger.info(f"Not recording {repo_name}#{pr_number}@{head_sha}, a newer head was recorded")
+            else:
+                client.set(key, head_sha, ex=HEAD_TTL)
+        except Exception as e:
+            mark_redis_unavailable(e)
+
+    def is_superseded(self, repo_name, pr_number, head_sha, stage):
+        """
+        :param stage: name of the stage boundary the check is made at, reported in gordon.validation.superseded
+        """
+        client = get_redis_client() if self.enabled else None
+        if client is None:
+            return False
+        try:
+            latest = client.get(self.head_key(repo_name, pr_number))
+        except Exception as e:
+            mark_redis_unavailable(e)
+            return False
+
+        if latest is None:
+            return False
+        latest_sha = latest.decode().split(" ", 1)[0]
+        if latest_sha == head_sha:
+            return False
+        logger.info(f"Skipping validation of {repo_name}#{pr_number}@{head_sha}, superseded by {latest_sha}")
+        metrics.increment("validation.superseded", tags={"stage": stage})
+        return True
+
+
+_pull_request_heads = None
+
+
+def get_pull_request_heads():
+    global _pull_request_heads
+    if _pull_request_heads is None:
+        _pull_request_heads = PullRequestHeads()
+    return _pull_request_heads
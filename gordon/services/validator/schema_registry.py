@@ -0,0 +1,170 @@
+from gordon.configurations.validator_config import ValidatorConfig
+from gordon.services.common import metrics
+from celery.utils.log import get_task_logger
+from jsonschema import Draft7Validator
+from typing import NamedTuple, Optional
+import threading
+import hashlib
+import json
+import time
+import os
+
+logger = get_task_logger(__name__)
+
+HELP_DIR = "valid_scehmas"
+VALIDATORS = ("default", "acquisition")
+
+
+# One version of an about.yaml schema compiled into its validator, with the help text of failed schema checks
+class SchemaEntry(NamedTuple):
+    version: int
+    # None when the schema does not restrict the organization
+    organizations: Optional[frozenset]
+    validator: Draft7Validator
+    help_text: str
+
+
+# Example about.yaml of a schema that has no help text file
+def render_help_text(schema):
+    lines = []
+    for name, field in schema.get("properties", {}).items():
+        if "const" in field:
+            example = field["const"]
+        elif field.get("enum"):
+            example = field["enum"][0]
+        else:
+            example = name.replace("_", "-")
+        lines.append(f"{name}: {example}")
+    return "\n".join(lines)
+
+
+# The about.yaml schemas of a validator keyed by organization and version. Each schema file is compiled once and its
+# help text rendered once; the schema directory is checked every GORDON_SCHEMA_RELOAD_INTERVAL seconds so schema
+# versions added or changed there are used without restarting workers
+class SchemaRegistry:
+    def __init__(self, name, schema_dir=None, reload_interval=None):
+        validator_config = ValidatorConfig()
+        self.name = name
+        self.schema_dir = schema_dir if schema_dir is not None else validator_config.get_schema_dir(name)
+        self.reload_interval = reload_interval if reload_interval is not None else \
+            validator_config.get_schema_reload_interval()
+        self.dir_id = None
+        self.next_check = 0
+        # Entries per schema file, a file that fails to load keeps the entry of its last good version
+        self.files = {}
+        self.entries = {}
+        self.latest = None
+        self.fingerprint = None
+        self.lock = threading.Lock()
+        self.reload_if_changed(force=True)
+
+    def get_dir_id(self):
+        file_ids = []
+        for directory in [self.schema_dir, os.path.join(self.schema_dir, HELP_DIR)]:
+            try:
+                with os.scandir(directory) as dir_entries:
+                    for dir_entry in dir_entries:
+                        if dir_entry.is_file():
+                            stat = dir_entry.stat()
+                            file_ids.append((dir_entry.path, stat.st_ino, stat.st_mtime_ns, stat.st_size))
+            except OSError as e:
+                logger.error(f"Failed reading schema directory {directory}: {e}")
+        return tuple(sorted(file_ids))
+
+    def reload_if_changed(self, force=False):
+        now = time.monotonic()
+        if not force and now < self.next_check:
+            return
+        with self.lock:
+            if not force and now < self.next_check:
+                return
+            self.next_check = now + self.reload_interval
+            dir_id = self.get_dir_id()
+            if dir_id == self.dir_id:
+                return
+            self.load()
+            self.dir_id = dir_id
+
+    def load(self):
+        paths = sorted(os.path.join(self.schema_dir, file_name) for file_name in os.listdir(self.schema_dir)
+                       if file_name.endswith(".json")) if os.path.isdir(self.schema_dir) else []
+        files = {}
+        for path in paths:
+            try:
+                files[path] = self.load_file(path)
+            except Exception as e:
+                logger.error(f"Failed loading {self.name} schema {path}: {e}")
+                if path in self.files:
+                    files[path] = self.files[path]
+
+        entries = {}
+        for path, (schema, entry) in files.items():
+            for organization in entry.organizations or [None]:
+                entries[(organization, entry.version)] = entry
+        self.files = files
+        self.entries = entries
+        self.latest = max((entry for schema, entry in files.values()), key=lambda entry: entry.version, default=None)
+        schemas = sorted(json.dumps(schema, sort_keys=True) for schema, entry in files.values())
+        self.fingerprint = hashlib.sha1("\n".join(schemas).encode()).hexdigest()[:12]
+        logger.info(f"Loaded {len(files)} {self.name} schemas from {self.schema_dir}")
+        metrics.gauge("validation.schemas", len(files), tags={"validator": self.name})
+
+    def load_file(self, path):
+        with open(path) as schema_file:
+            schema = json.load(schema_file)
+        Draft7Validator.check_schema(schema)
+
+        properties = schema.get("properties", {})
+        version = properties.get("version", {}).get("const")
+        if not isinstance(version, int):
+            raise ValueError("schema does not define a constant integer version")
+        organizations = properties.get("organization", {}).get("enum")
+
+        help_path = os.path.join(self.schema_dir, HELP_DIR, f"{self.name}_v{version}.txt")
+        if os.path.exists(help_path):
+            with open(help_path) as help_file:
+                help_text = help_file.read()
+        else:
+            help_text = render_help_text(schema)
+
+        entry = SchemaEntry(version, frozenset(organizations) if organizations else None, Draft7Validator(schema),
+                            help_text)
+        return schema, entry
+
+    def get_entry(self, data):
+        """
+        :return: the schema of the organization and version of an about.yaml, None when there is none
+        """
+        self.reload_if_changed()
+        if not isinstance(data, dict):
+            return None
+        organization, version = data.get("organization"), data.get("version")
+        try:
+            return self.entries.get((organization, version)) or self.entries.get((None, version))
+        except TypeError:
+            # Unhashable organization or version values
+            return None
+
+    def is_valid(self, data):
+        entry = self.get_entry(data)
+        return entry is not None and entry.validator.is_valid(data)
+
+    # Help text of the schema an about.yaml declares, or of the latest schema when it declares none that exists
+    def get_help_text(self, data):
+        entry = self.get_entry(data) or self.latest
+        return entry.help_text if entry is not None else ""
+
+    # Identifies the loaded schemas, changes when a schema is added or edited
+    def get_fingerprint(self):
+        self.reload_if_changed()
+        return self.fingerprint
+
+
+_schema_registries = {}
+
+
+def get_schema_registry(validator):
+    registry = _schema_registries.get(validator)
+    if registry is None:
+        registry = _schema_registries.setdefault(validator, SchemaRegistry(validator))
+    return registry
@@ -0,0 +1,157 @@
+from gordon.configurations.validator_config import ValidatorConfig
+from gordon.services.common import metrics
+from gordon.services.common.redis_client import get_redis_client, mark_redis_unavailable
+from celery.utils.log import get_task_logger
+from typing import NamedTuple, Optional
+import threading
+import time
+import uuid
+
+logger = get_task_logger(__name__)
+
+REGISTRY_KEY_PREFIX = "gordon:validation"
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+# Entries kept in process memory while Redis is unavailable before expired ones are purged
+MAX_LOCAL_ENTRIES = 1024
+
+# Sets the key unless it holds a value other than the replaceable one, and returns the value it holds otherwise.
+# An empty replaceable value makes it a SET NX that reads the value it lost to in the same call
+CLAIM_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if current and current ~= ARGV[3] then
+    return current
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+return false
+"""
+# Replaces the value of the key, or deletes the key when the new value is empty, only while it holds the expected value
+REPLACE_IF_EQUAL_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+if ARGV[2] == '' then
+    redis.call('DEL', KEYS[1])
+else
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+end
+return 1
+"""
+
+
+# Result of ValidationRegistry.claim(). key and value are None when deduplication is disabled or the validation is
+# skipped
+class Claim(NamedTuple):
+    should_run: bool
+    key: Optional[str] = None
+    value: Optional[str] = None
+
+
+# Registry of the validations in progress and recently completed per (repo, head_sha, validator), shared by all
+# workers through Redis. Pushes, check suite and check run re-requests and redeliveries produce several events for one
+# head SHA; the first one claims the validation and the others are dropped while it runs and for the dedup window
+# after it completed, as the check run it posts on the commit already carries the result. Re-runs requested from the
+# Github UI are only dropped while the validation runs, as the file may have been fixed outside the repository, e.g. a
+# Jira project or Pagerduty schedule created since. Cancelled or failed validations release their claim so a
+# re-request runs the check again
+class ValidationRegistry:
+    def __init__(self, window=None, in_flight_ttl=None):
+        validator_config = ValidatorConfig()
+        self.window = window if window is not None else validator_config.get_dedup_window()
+        self.in_flight_ttl = in_flight_ttl if in_flight_ttl is not None else validator_config.get_dedup_in_flight_ttl()
+        # Used while Redis is unavailable, deduplicating within this worker process only
+        self.local_entries = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def registry_key(repo_name, head_sha, validator):
+        return f"{REGISTRY_KEY_PREFIX}:{validator}:{repo_name.lower()}:{head_sha}"
+
+    def claim(self, repo_name, head_sha, validator, rerun=False):
+        """
+        :param rerun: the event is a re-run requested from the Github UI, which replaces a completed validation
+        :return: Claim to pass to complete() or release() when should_run is set
+        """
+        # With deduplication disabled every caller runs the validation and nothing is recorded
+        if self.window <= 0:
+            return Claim(True)
+
+        key = self.registry_key(repo_name, head_sha, validator)
+        value = f"{IN_PROGRESS}:{uuid.uuid4().hex}"
+        state = self.set_unless_held(key, value, self.in_flight_ttl, COMPLETED if rerun else None)
+        if state is None:
+            return Claim(True, key, value)
+
+        state = COMPLETED if state == COMPLETED else IN_PROGRESS
+        logger.info(f"Skipping duplicate validation of {repo_name}@{head_sha}, validation is {state}")
+        metrics.increment("validation.deduplicated", tags={"state": state, "validator": validator})
+        return Claim(False)
+
+    # Only completes the validation while the claim is still held, an in flight claim that expired may have been taken
+    # by another worker since
+    def complete(self, claim):
+        if claim.key is not None:
+            self.replace_if_equal(claim.key, claim.value, COMPLETED, self.window)
+
+    def release(self, claim):
+        if claim.key is not None:
+            self.replace_if_equal(claim.key, claim.value)
+
+    def set_unless_held(self, key, value, ttl, replaceable=None):
+        """
+        :param replaceable: value that is replaced as if the key was absent
+        :return: None when the value was set, the current value otherwise
+        """
+        client = get_redis_client()
+        if client is not None:
+            try:
+                current = client.eval(CLAIM_SCRIPT, 1, key, value, ttl, replaceable or "")
+                return None if current is None else current.decode()
+            except Exception as e:
+                mark_redis_unavailable(e)
+
+        with self.lock:
+            current = self.get_local(key)
+            if current is not None and current != replaceable:
+                return current
+            self.local_entries[key] = (value, time.monotonic() + ttl)
+            return None
+
+    def replace_if_equal(self, key, expected, value=None, ttl=None):
+        """
+        :param value: new value of the key, the key is deleted when None
+        """
+        with self.lock:
+            if self.get_local(key) == expected:
+                if value is None:
+                    del self.local_entries[key]
+                else:
+                    self.local_entries[key] = (value, time.monotonic() + ttl)
+        client = get_redis_client()
+        if client is not None:
+            try:
+                client.eval(REPLACE_IF_EQUAL_SCRIPT, 1, key, expected, value or "", ttl or 0)
+            except Exception as e:
+                mark_redis_unavailable(e)
+
+    def get_local(self, key):
+        if len(self.local_entries) > MAX_LOCAL_ENTRIES:
+            now = time.monotonic()
+            self.local_entries = {k: entry for k, entry in self.local_entries.items() if entry[1] > now}
+        entry = self.local_entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.monotonic():
+            del self.local_entries[key]
+            return None
+        return entry[0]
+
+
+_validation_registry = None
+
+
+def get_validation_registry():
+    global _validation_registry
+    if _validation_registry is None:
+        _validation_registry = ValidationRegistry()
+    return _validation_registry
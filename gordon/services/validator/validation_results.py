@@ -0,0 +1,66 @@
+from gordon.configurations.cache_config import CacheConfig
+from gordon.services.common.ttl_cache import TwoTierCache
+from celery.utils.log import get_task_logger
+import threading
+import json
+
+logger = get_task_logger(__name__)
+
+# about.yaml properties whose results are cached along with the parsed data
+CACHED_RESULTS = ("is_valid", "is_valid_jira", "is_valid_pagerduty")
+
+_validation_result_cache = None
+
+
+def get_validation_result_cache():
+    global _validation_result_cache
+    if _validation_result_cache is None:
+        _validation_result_cache = TwoTierCache("about-yaml-results", CacheConfig().get_local_cache_size())
+    return _validation_result_cache
+
+
+# Validation results of one about.yaml blob, cached by its git blob SHA and the version of the validator and schema
+# that produced them. Blobs are immutable, so a push that does not touch about.yaml, or a ref carrying the same
+# about.yaml as main, gets the parsed data and results of an earlier check instead of parsing and validating again.
+# Results are only cached for GORDON_VALIDATION_RESULT_TTL seconds as Jira projects and Pagerduty schedules change
+class ValidationResults:
+    def __init__(self, validator_version, blob_sha, cache=None):
+        """
+        :param validator_version: identifies the validator and the schema it checks against
+        :param blob_sha: git blob SHA of the about.yaml, None disables caching
+        """
+        self.key = f"{validator_version}:{blob_sha}" if blob_sha is not None else None
+        self.cache = cache if cache is not None else get_validation_result_cache()
+        self.ttl = CacheConfig().get_validation_result_ttl()
+        self.results = {}
+        self.lock = threading.Lock()
+
+    def load(self):
+        if self.key is None:
+            return None
+        cached = self.cache.get(self.key)
+        if cached is not None:
+            with self.lock:
+                self.results = dict(cached)
+        return cached
+
+    # Hands cached results to an about.yaml object the same way functools.cached_property stores them
+    def restore(self, about_yaml):
+        with self.lock:
+            for name in CACHED_RESULTS:
+                if name in self.results:
+                    about_yaml.__dict__[name] = self.results[name]
+
+    def record(self, name, value, **values):
+        if self.key is None:
+            return value
+        with self.lock:
+            self.results.update(values)
+            self.results[name] = value
+            try:
+                json.dumps(self.results)
+            except (TypeError, ValueError) as e:
+                logger.debug(f"Not caching validation results of {self.key}: {e}")
+                return value
+            self.cache.set(self.key, dict(self.results), self.ttl)
+        return value
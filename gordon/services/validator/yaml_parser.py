@@ -0,0 +1,86 @@
+from gordon.configurations.validator_config import ValidatorConfig
+from gordon.services.common import metrics
+from celery.utils.log import get_task_logger
+import time
+import yaml
+
+logger = get_task_logger(__name__)
+
+# The libyaml safe loader when PyYAML was built with it, the pure Python safe loader otherwise
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+class YamlLimitException(Exception):
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+
+
+# Parses about.yaml files of pull requests, which anyone able to open one controls. Only plain YAML types are
+# constructed, files above GORDON_ABOUT_YAML_MAX_BYTES are not parsed, and documents with more than
+# GORDON_ABOUT_YAML_MAX_NODES nodes or with aliases are rejected before any Python object is built from them, so an
+# alias bomb or a huge file cannot pin a worker. Parse times are reported in about_yaml.parse tagged with the result
+class YamlParser:
+    def __init__(self, max_bytes=None, max_nodes=None):
+        validator_config = ValidatorConfig()
+        self.max_bytes = max_bytes if max_bytes is not None else validator_config.get_about_yaml_max_bytes()
+        self.max_nodes = max_nodes if max_nodes is not None else validator_config.get_about_yaml_max_nodes()
+
+    def parse(self, raw):
+        """
+        :param raw: bytes of the file
+        :return: the parsed document
+        """
+        start = time.perf_counter()
+        result = "error"
+        try:
+            if len(raw) > self.max_bytes:
+                raise YamlLimitException("too_large", f"File of {len(raw)} bytes is larger than {self.max_bytes} bytes")
+            data = self.load(raw.decode())
+            result = "parsed"
+            return data
+        except YamlLimitException as e:
+            result = e.reason
+            logger.info(f"Rejected about.yaml: {e}")
+            raise
+        finally:
+            metrics.histogram("about_yaml.parse", (time.perf_counter() - start) * 1000, tags={"result": result})
+
+    def load(self, text):
+        loader = SafeLoader(text)
+        try:
+            node = loader.get_single_node()
+            if node is None:
+                return None
+            self.check_nodes(node)
+            return loader.construct_document(node)
+        finally:
+            loader.dispose()
+
+    # Walks the composed document, where an alias is the node of its anchor appearing a second time
+    def check_nodes(self, root):
+        seen = set()
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            if id(node) in seen:
+                raise YamlLimitException("alias", "Aliases are not allowed")
+            seen.add(id(node))
+            if len(seen) > self.max_nodes:
+                raise YamlLimitException("too_many_nodes", f"Document has more than {self.max_nodes} nodes")
+            if isinstance(node, yaml.SequenceNode):
+                stack.extend(node.value)
+            elif isinstance(node, yaml.MappingNode):
+                for key, value in node.value:
+                    stack.append(key)
+                    stack.append(value)
+
+
+_yaml_parser = None
+
+
+def get_yaml_parser():
+    global _yaml_parser
+    if _yaml_parser is None:
+        _yaml_parser = YamlParser()
+    return _yaml_parser
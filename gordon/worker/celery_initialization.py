@@ -1,29 +1,17 @@
-from celery import Celery
-from gordon.api_server import create_app
-from celery.signals import after_setup_task_logger
+from celery.signals import after_setup_task_logger, beat_init, worker_process_init
 from pythonjsonlogger import jsonlogger
 from datetime import datetime
 from gordon import celery
+from gordon.services.celery_worker.scheduled_tasks import get_beat_schedule, refresh_jira_index
 import sys
 import logging
-app = create_app()
 
 """
-Setting up the celery worker and logger format
+Setting up the celery worker and logger format. Tasks do not use the Flask app, so the worker configures Celery without
+building one, and task modules are imported by the worker when it starts rather than by every importer of this module
 """
-celery.conf.update(app.config)
-TaskBase = celery.Task
-
-
-class ContextTask(TaskBase):
-    abstract = True
-
-    def __call__(self, *args, **kwargs):
-        with app.app_context():
-            return TaskBase.__call__(self, *args, **kwargs)
-
-
-celery.Task = ContextTask
+celery.conf.imports = ("gordon.services.celery_worker.webhook_async_processor",)
+celery.conf.beat_schedule = get_beat_schedule()
 
 
 class CustomJsonFormatter(jsonlogger.JsonFormatter):
@@ -53,6 +41,21 @@ def setup_task_logger(logger, *args, **kwargs):
     logger.addHandler(handler)
 
 
+# Schemas are compiled when a worker process starts rather than by the first check it runs
+@worker_process_init.connect
+def load_schemas(*args, **kwargs):
+    from gordon.services.validator.schema_registry import VALIDATORS, get_schema_registry
+    for validator in VALIDATORS:
+        get_schema_registry(validator)
+
+
+# Interval schedules first run one interval after beat starts, the project index is loaded right away instead
+@beat_init.connect
+def load_jira_index(*args, **kwargs):
+    if "refresh-jira-index" in celery.conf.beat_schedule:
+        refresh_jira_index.delay()
+
+
 @celery.task
 def example_task():
     print("celery: Web app sync")
@@ -0,0 +1,86 @@
+"""
+Compares check_executor latency with serial and concurrent validation against a stand-in server that delays every
+response. Lookup, contents and validation result caches are cleared before each check so every run pays for all its
+round trips.
+
+    python -m tests.benchmarks.bench_concurrent_validation --latency 0.05 --iterations 50
+"""
+from tests.benchmarks.standin_server import StandinServer, ABOUT_YAML
+from unittest import mock
+import argparse
+import os
+import statistics
+import time
+
+TEST_SECRETS = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "test_secrets")
+REF_SHA = "0123456789abcdef0123456789abcdef01234567"
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def configure_environment(server_url):
+    for name, file_name in [("SECRET_GITHUB_SECRET", "github_secrets.json"), ("SECRET_AD_USER", "ad_user.json"),
+                            ("SECRET_PAGERDUTY_API_TOKEN", "pagerduty.json"),
+                            ("SECRET_SLACK_WEBHOOKS", "slack_webhook.json")]:
+        os.environ.setdefault(name, os.path.join(TEST_SECRETS, file_name))
+    os.environ.update({
+        "GITHUB_API": server_url,
+        "JIRA_API": f"{server_url}/jira/rest/api/2/project/",
+        "PAGERDUTY_URL": f"{server_url}/pagerduty/schedules/",
+        "GORDON_CACHE_REDIS_ENABLED": "false",
+        "GORDON_METRICS_ENABLED": "false"
+    })
+
+
+def run_checks(server, iterations, concurrent):
+    # Imported once the environment points at the stand-in server, as the validator constants are read at import
+    from gordon.services.validator import jira_lookup, pagerduty_lookup, validation_results
+    from gordon.services.github import contents_cache
+    from gordon.services.github.check_run_manager import CheckRunManager
+    from gordon.services.github.github_service import GithubService
+    from gordon.services.validator.default.default_file_validator import DefaultFileValidator
+
+    os.environ["GORDON_CONCURRENT_VALIDATION"] = "true" if concurrent else "false"
+    check_run_url = f"{server.url}/check-runs/1"
+    samples = []
+    with mock.patch.object(DefaultFileValidator, "get_github_token", return_value="token"):
+        for _ in range(iterations):
+            jira_lookup._jira_lookup = None
+            pagerduty_lookup._pagerduty_lookup = None
+            validation_results._validation_result_cache = None
+            contents_cache._contents_cache = None
+            check_run = CheckRunManager(GithubService(server.url, "token"), REF_SHA, server.url, check_run_url)
+            validator = DefaultFileValidator(check_run, "twilio/gordon", REF_SHA, 1, 1)
+            start = time.perf_counter()
+            validator.check_executor()
+            samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every stand-in response")
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    files = {
+        "main": ABOUT_YAML.format(jira_id="GOOD1", pagerduty_id="PGOOD1"),
+        REF_SHA: ABOUT_YAML.format(jira_id="GOOD2", pagerduty_id="PGOOD2")
+    }
+    with StandinServer(latency=args.latency, files=files) as server:
+        configure_environment(server.url)
+        # Warm up so the first measured check does not pay for imports and connection setup
+        run_checks(server, 1, concurrent=False)
+        results = {mode: run_checks(server, args.iterations, concurrent=mode == "concurrent")
+                   for mode in ("serial", "concurrent")}
+
+    print(f"latency per call: {args.latency * 1000:.0f}ms, iterations: {args.iterations}")
+    for mode, samples in results.items():
+        print(f"{mode:>10}: p50 {statistics.median(samples):8.1f}ms  p99 {percentile(samples, 0.99):8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Measures how a check finds out whether a pull request deleted about.yaml on a synthetic 3,000 file pull request,
+against a stand-in server that delays every response: listing every file 30 per page as the validators used to, listing
+100 per page until about.yaml shows up, and reading about.yaml at the merge base of the pull request.
+
+    python -m tests.benchmarks.bench_deletion_detection --latency 0.05 --files 3000
+"""
+from tests.benchmarks.bench_concurrent_validation import configure_environment
+from tests.benchmarks.standin_server import StandinServer, ABOUT_YAML, MERGE_BASE_SHA
+import argparse
+import time
+
+REF_SHA = "0123456789abcdef0123456789abcdef01234567"
+
+
+def measure(server, detect):
+    del server.requests[:]
+    server.bytes_sent = 0
+    start = time.perf_counter()
+    deleted = detect()
+    elapsed = (time.perf_counter() - start) * 1000
+    return deleted, len(server.requests), server.bytes_sent / 1024, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every stand-in response")
+    parser.add_argument("--files", type=int, default=3000, help="files changed by the pull request")
+    args = parser.parse_args()
+
+    main_file = ABOUT_YAML.format(jira_id="GOOD1", pagerduty_id="PGOOD1")
+    # about.yaml is listed last, which is where pagination pays the most
+    pr_files = [f"vendor/module{i}/generated.go" for i in range(args.files - 1)] + ["about.yaml"]
+    with StandinServer(latency=args.latency, files={"main": main_file, MERGE_BASE_SHA: main_file},
+                       pr_files=pr_files) as server:
+        configure_environment(server.url)
+        from github import Github
+        from gordon.services.github import contents_cache
+        from gordon.services.github.github_service import GithubService
+        from gordon.services.github.repository_backend import RestRepositoryBackend
+
+        def full_pagination():
+            legacy_repo = Github(base_url=server.url, login_or_token="token", per_page=30).get_repo(
+                "twilio/gordon", lazy=True)
+            deleted = False
+            for pr_file in legacy_repo.get_pull(1).get_files():
+                if pr_file.filename == "about.yaml":
+                    deleted = True
+            return deleted
+
+        def backend():
+            contents_cache._contents_cache = None
+            repo = GithubService(server.url, "token").get_repository("twilio/gordon")
+            return RestRepositoryBackend(repo, REF_SHA, 1)
+
+        strategies = {
+            "every file, 30 per page": full_pagination,
+            "early exit, 100 per page": lambda: backend().pull_request_touches("about.yaml"),
+            "merge base": lambda: backend().pull_request_deletes("about.yaml")
+        }
+        print(f"latency per call: {args.latency * 1000:.0f}ms, files in pull request: {args.files}")
+        for name, detect in strategies.items():
+            deleted, calls, kilobytes, elapsed = measure(server, detect)
+            print(f"{name:>26}: deleted {deleted!s:>5}  calls {calls:4d}  {kilobytes:9.1f} KB  {elapsed:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Measures cold import times of the worker and API entry points, in fresh interpreters with -X importtime, and lists the
+modules costing the most. Secrets are not mounted, importing either entry point must not need them.
+
+    python -m tests.benchmarks.bench_import_time --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ENTRY_POINTS = {
+    "worker": "gordon.worker.celery_initialization",
+    "api": "gordon.api_server",
+}
+
+
+# Cumulative import time in microseconds of the modules imported at the top two levels of one run
+def import_times(module):
+    env = {name: value for name, value in os.environ.items() if not name.startswith("SECRET_")}
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            env=env, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        # Nested imports are included in the cumulative time of their importer
+        if depth <= 1:
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="interpreters started per entry point")
+    parser.add_argument("--top", type=int, default=5, help="modules listed per entry point")
+    args = parser.parse_args()
+
+    for name, module in ENTRY_POINTS.items():
+        runs = [import_times(module) for _ in range(args.runs)]
+        total = statistics.median(run[module] for run in runs) / 1000
+        print(f"{name:>6}: {module} {total:.0f} ms (median of {args.runs})")
+        modules = {imported: statistics.median(run.get(imported, 0) for run in runs) / 1000 for imported in runs[-1]
+                   if imported != module}
+        for imported, ms in sorted(modules.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"        {imported:<40} {ms:6.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
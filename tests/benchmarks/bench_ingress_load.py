@@ -0,0 +1,180 @@
+"""
+Load test of the webhook ingress, comparing the gunicorn sync workers of GORDON_RUN_MODE=api with the uvicorn ASGI
+ingress of GORDON_RUN_MODE=api-async. Both servers run with the commands of bin/run.sh, publishing to a stand-in
+broker that takes --publish-latency ms per task, and are sent signed pull_request deliveries over --connections
+concurrent connections.
+
+    python -m tests.benchmarks.bench_ingress_load --seconds 5 --connections 64 --publish-latency 2
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+TEST_SECRETS = os.path.join(ROOT, "tests", "test_secrets")
+FIXTURE = os.path.join(ROOT, "tests", "fixtures", "good_pr.json")
+
+
+# Task signature publishing nothing, taking the round trip of a broker publish
+class StandinTask:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def apply_async(self, args, countdown=None):
+        time.sleep(self.latency)
+
+
+def patch_publish():
+    from gordon.blueprints import blueprints
+    blueprints.webhook_async = StandinTask(float(os.environ["BENCH_PUBLISH_LATENCY"]) / 1000)
+
+
+# App factories the servers load in each of their worker processes
+def create_wsgi_app():
+    import gordon
+    patch_publish()
+    return gordon.create_app("test")
+
+
+def create_asgi_app():
+    from gordon.asgi_server import create_asgi_app
+    patch_publish()
+    return create_asgi_app("test")
+
+
+def server_commands(port, args):
+    return {
+        "gunicorn": [sys.executable, "-m", "gunicorn", "-b", f"127.0.0.1:{port}", f"--workers={args.gunicorn_workers}",
+                     "tests.benchmarks.bench_ingress_load:create_wsgi_app()"],
+        "uvicorn": [sys.executable, "-m", "uvicorn", "--factory", "tests.benchmarks.bench_ingress_load:create_asgi_app",
+                    "--host", "127.0.0.1", "--port", str(port), "--workers", str(args.uvicorn_workers),
+                    "--no-access-log", "--log-level", "warning"]
+    }
+
+
+def server_env(args):
+    env = dict(os.environ, GORDON_CONFIG="test", GORDON_METRICS_ENABLED="false", GORDON_SUPERSEDE_ENABLED="false",
+               GORDON_CACHE_REDIS_ENABLED="false", BENCH_PUBLISH_LATENCY=str(args.publish_latency),
+               PYTHONPATH=ROOT)
+    for name, file_name in [("SECRET_GITHUB_SECRET", "github_secrets.json"), ("SECRET_AD_USER", "ad_user.json"),
+                            ("SECRET_PAGERDUTY_API_TOKEN", "pagerduty.json"),
+                            ("SECRET_SLACK_WEBHOOKS", "slack_webhook.json")]:
+        env.setdefault(name, os.path.join(TEST_SECRETS, file_name))
+    return env
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with {process.returncode}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server did not listen on {port} within {timeout}s")
+
+
+def signed_request(env):
+    import json
+    from gordon.services.github.github_service import GithubService
+    with open(FIXTURE) as fixture:
+        payload = json.load(fixture)
+    payload["installation"]["id"] = 1
+    payload["repository"]["private"] = True
+    payload["repository"]["full_name"] = "twilio/gordon"
+    body = json.dumps(payload).encode()
+    with open(env["SECRET_GITHUB_SECRET"]) as secrets_file:
+        secret = json.load(secrets_file)["webhook_secret"]
+    head = (f"POST /api/v1/validate-aboutyaml HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+            f"X-GitHub-Event: pull_request\r\nX-Hub-Signature: {GithubService.get_signature(body, secret)}\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n")
+    return head.encode() + body
+
+
+# Sends the request over one connection until the deadline, recording the latency of each response. Gunicorn sync
+# workers close the connection after every response, a new one is then opened for the next request
+async def connection_loop(port, request, deadline, latencies, errors):
+    writer = None
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            if writer is None:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(request)
+            status = await reader.readline()
+            length = 0
+            close = False
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode().partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+                elif name.lower() == "connection":
+                    close = value.strip().lower() == "close"
+            await reader.readexactly(length)
+            if b" 200 " not in status:
+                errors.append(status)
+            latencies.append(time.perf_counter() - start)
+            if close:
+                writer.close()
+                writer = None
+    except (OSError, asyncio.IncompleteReadError) as e:
+        errors.append(e)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+async def run_load(port, request, connections, seconds):
+    latencies = []
+    errors = []
+    deadline = time.perf_counter() + seconds
+    await asyncio.gather(*[connection_loop(port, request, deadline, latencies, errors) for _ in range(connections)])
+    return latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5, help="duration of the load on each server")
+    parser.add_argument("--connections", type=int, default=64, help="concurrent client connections")
+    parser.add_argument("--publish-latency", type=float, default=2, help="ms each task publish takes")
+    parser.add_argument("--gunicorn-workers", type=int, default=5, help="sync workers, as in GORDON_RUN_MODE=api")
+    parser.add_argument("--uvicorn-workers", type=int, default=1, help="processes of GORDON_RUN_MODE=api-async")
+    args = parser.parse_args()
+
+    env = server_env(args)
+    request = signed_request(env)
+    print(f"{args.connections} connections, {args.publish_latency:g} ms publish, {len(request)} byte requests")
+    for name in ["gunicorn", "uvicorn"]:
+        port = free_port()
+        command = server_commands(port, args)[name]
+        process = subprocess.Popen(command, env=env, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_for_port(port, process)
+            latencies, errors = asyncio.run(run_load(port, request, args.connections, args.seconds))
+        finally:
+            process.terminate()
+            process.wait()
+        latencies.sort()
+        p99 = latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0
+        print(f"{name:>9}: {len(latencies) / args.seconds:8.0f} req/s  p50 {statistics.median(latencies) * 1000:7.1f} ms"
+              f"  p99 {p99:7.1f} ms  errors {len(errors)}")
+
+
+if __name__ == "__main__":
+    main()
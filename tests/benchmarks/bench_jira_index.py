@@ -0,0 +1,53 @@
+"""
+Measures Jira project lookups of checks against a stand-in Jira holding 10,000 projects that delays every response:
+one call per project as the validators made before the project index, against one project listing loaded into the
+index, after which checks look projects up in process memory. Workers would read the same index from Redis, which is
+disabled here so the benchmark needs no Redis server.
+
+    python -m tests.benchmarks.bench_jira_index --latency 0.05 --projects 10000 --lookups 500
+"""
+from tests.benchmarks.bench_concurrent_validation import configure_environment
+from tests.benchmarks.standin_server import StandinServer
+import argparse
+import random
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every stand-in response")
+    parser.add_argument("--projects", type=int, default=10000, help="projects the stand-in Jira holds")
+    parser.add_argument("--lookups", type=int, default=500, help="lookups of distinct projects, one per check")
+    args = parser.parse_args()
+
+    with StandinServer(latency=args.latency, jira_projects=args.projects) as server:
+        configure_environment(server.url)
+        from gordon.configurations.jira_config import JIRAConfig
+        from gordon.services.common.ttl_cache import TwoTierCache
+        from gordon.services.validator.jira_lookup import JiraProjectIndex, JiraProjectLookup
+
+        jira_url = JIRAConfig().get_jira_url()
+        keys = random.Random(1).sample([f"GOOD{i}" for i in range(args.projects)], args.lookups)
+
+        def run(name, index, prepare=None):
+            del server.requests[:]
+            server.bytes_sent = 0
+            start = time.perf_counter()
+            if prepare is not None:
+                prepare()
+            prepared = time.perf_counter()
+            lookup = JiraProjectLookup(cache=TwoTierCache(f"bench-{name}", max_local_entries=args.lookups), index=index)
+            assert all(lookup.is_valid_project(jira_url, key, None) for key in keys)
+            end = time.perf_counter()
+            print(f"{name:>14}: {len(server.requests):5d} Jira calls  {server.bytes_sent / 1024:8.0f} KiB  "
+                  f"load {(prepared - start) * 1000:7.0f} ms  lookups {(end - prepared) * 1000:8.1f} ms  "
+                  f"({(end - prepared) / len(keys) * 1e6:9.1f} us/lookup)")
+
+        print(f"{args.projects} projects, {args.lookups} lookups, {args.latency * 1000:.0f} ms latency")
+        run("live lookups", JiraProjectIndex(enabled=False))
+        index = JiraProjectIndex(enabled=True, check_interval=3600)
+        run("project index", index, prepare=lambda: index.refresh(jira_url, None))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Compares check_executor latency and Github round trips with the REST and GraphQL repository backends against a
+stand-in server that delays every response. Covers a pull request changing about.yaml on both sides and one deleting
+it, where the REST backend also lists the pull request files. Caches are cleared before each check.
+
+    python -m tests.benchmarks.bench_repository_backend --latency 0.05 --iterations 20
+"""
+from tests.benchmarks.bench_concurrent_validation import configure_environment, percentile
+from tests.benchmarks.standin_server import StandinServer, ABOUT_YAML
+from unittest import mock
+import argparse
+import os
+import statistics
+import time
+
+REF_SHA = "0123456789abcdef0123456789abcdef01234567"
+
+
+def run_checks(server, iterations, backend):
+    from gordon.services.validator import jira_lookup, pagerduty_lookup, validation_results
+    from gordon.services.github import contents_cache
+    from gordon.services.github.check_run_manager import CheckRunManager
+    from gordon.services.github.github_service import GithubService
+    from gordon.services.validator.default.default_file_validator import DefaultFileValidator
+
+    os.environ["GORDON_GITHUB_BACKEND"] = backend
+    samples = []
+    with mock.patch.object(DefaultFileValidator, "get_github_token", return_value="token"):
+        for _ in range(iterations):
+            jira_lookup._jira_lookup = None
+            pagerduty_lookup._pagerduty_lookup = None
+            validation_results._validation_result_cache = None
+            contents_cache._contents_cache = None
+            check_run = CheckRunManager(GithubService(server.url, "token"), REF_SHA, server.url,
+                                        f"{server.url}/check-runs/1")
+            validator = DefaultFileValidator(check_run, "twilio/gordon", REF_SHA, 1, 1)
+            del server.requests[:]
+            start = time.perf_counter()
+            validator.check_executor()
+            samples.append((time.perf_counter() - start) * 1000)
+    github_calls = len([path for _, path in server.requests if path.startswith(("/repos", "/graphql"))])
+    return samples, github_calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every stand-in response")
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    scenarios = {
+        "about.yaml changed": {
+            "main": ABOUT_YAML.format(jira_id="GOOD1", pagerduty_id="PGOOD1"),
+            REF_SHA: ABOUT_YAML.format(jira_id="GOOD2", pagerduty_id="PGOOD2")
+        },
+        "about.yaml deleted": {"main": ABOUT_YAML.format(jira_id="GOOD1", pagerduty_id="PGOOD1")}
+    }
+    print(f"latency per call: {args.latency * 1000:.0f}ms, iterations: {args.iterations}")
+    for name, files in scenarios.items():
+        pr_files = [f"src/file{i}.py" for i in range(40)] + ["about.yaml"]
+        with StandinServer(latency=args.latency, files=files, pr_files=pr_files) as server:
+            configure_environment(server.url)
+            run_checks(server, 1, "rest")
+            for backend in ("rest", "graphql"):
+                samples, github_calls = run_checks(server, args.iterations, backend)
+                print(f"{name:>20} {backend:>8}: p50 {statistics.median(samples):8.1f}ms  "
+                      f"p99 {percentile(samples, 0.99):8.1f}ms  github calls {github_calls}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Measures about.yaml schema validations per second one worker thread runs, building a Draft7Validator from the schema
+and reading the help text file of failed checks per validation as the validators did before, against the compiled
+schemas and cached help text of the schema registry.
+
+    python -m tests.benchmarks.bench_schema_validation --seconds 3
+"""
+import argparse
+import json
+import os
+import time
+
+VALID = {"version": 1, "organization": "twilio", "jira_id": "JIRA", "pagerduty_id": "PD"}
+INVALID = {"version": 1, "organization": "twilio", "jira_id": 7}
+
+
+def validations_per_second(validate, data, seconds):
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        validate(data)
+        count += 1
+    return count / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=3, help="duration of each scenario")
+    args = parser.parse_args()
+
+    from jsonschema import Draft7Validator
+    from gordon.configurations.validator_config import ValidatorConfig
+    from gordon.services.validator.schema_registry import SchemaRegistry
+
+    schema_dir = ValidatorConfig().get_schema_dir("default")
+    with open(os.path.join(schema_dir, "default_schema.json")) as schema_file:
+        schema = json.load(schema_file)
+
+    def validate_per_call(data):
+        if Draft7Validator(schema).is_valid(data):
+            return ""
+        with open(os.path.join(schema_dir, "valid_scehmas", "default_v1.txt")) as help_file:
+            return help_file.read()
+
+    registry = SchemaRegistry("default", schema_dir)
+
+    def validate_registry(data):
+        return "" if registry.is_valid(data) else registry.get_help_text(data)
+
+    for name, data in [("valid", VALID), ("invalid", INVALID)]:
+        per_call = validations_per_second(validate_per_call, data, args.seconds)
+        compiled = validations_per_second(validate_registry, data, args.seconds)
+        print(f"{name:>8}: per call {per_call:9.0f}/s  registry {compiled:9.0f}/s  ({compiled / per_call:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Compares the Celery message body enqueued per webhook when the full payload is sent as json with the WebhookEvent
+record sent as msgpack: bytes per task, which is what each queued task holds in Redis and sends over the network,
+and serialization time per event including building the record.
+
+    python -m tests.benchmarks.bench_task_envelope --fixture tests/fixtures/good_pr.json
+"""
+from kombu import serialization
+import argparse
+import json
+import os
+import time
+
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "fixtures", "good_pr.json")
+EMBED = {"callbacks": None, "errbacks": None, "chain": None, "chord": None}
+
+
+def time_per_call(function, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixture", default=FIXTURE, help="pull_request webhook payload to enqueue")
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    from gordon.services.github.webhook_processor import WebhookProcessor
+
+    with open(args.fixture) as fixture:
+        payload = json.load(fixture)
+    payload.setdefault("installation", {})["id"] = 1
+
+    # Celery protocol 2 task bodies are (args, kwargs, embed)
+    def full_payload():
+        return serialization.dumps(((payload, "pull_request"), {}, EMBED), serializer="json")[2]
+
+    def event_record():
+        event = WebhookProcessor(payload).get_event("pull_request")
+        return serialization.dumps(((event.to_task(),), {}, EMBED), serializer="msgpack")[2]
+
+    for name, function in [("full payload, json", full_payload), ("event record, msgpack", event_record)]:
+        size = len(function())
+        print(f"{name:>22}: {size:7d} bytes per task  {time_per_call(function, args.iterations):7.1f}us per event")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Measures requests per second one API worker handles on /validate-aboutyaml for signed, forged and unsupported
+deliveries, with the Celery publish stubbed out. Requests go through the WSGI app in process, which is the work a
+gunicorn sync worker does per request minus the socket handling and log output.
+
+    python -m tests.benchmarks.bench_webhook_ingress --seconds 3
+"""
+from unittest import mock
+import argparse
+import json
+import logging
+import os
+import time
+
+TEST_SECRETS = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "test_secrets")
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "fixtures", "good_pr.json")
+
+
+def requests_per_second(client, body, headers, seconds):
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        client.post("/api/v1/validate-aboutyaml", data=body, headers=headers, content_type="application/json")
+        count += 1
+    return count / seconds
+
+
+def decode_rate(loads, body, seconds):
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        loads(body)
+        count += 1
+    return count / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=3, help="duration of each scenario")
+    args = parser.parse_args()
+
+    for name, file_name in [("SECRET_GITHUB_SECRET", "github_secrets.json"), ("SECRET_AD_USER", "ad_user.json"),
+                            ("SECRET_PAGERDUTY_API_TOKEN", "pagerduty.json"),
+                            ("SECRET_SLACK_WEBHOOKS", "slack_webhook.json")]:
+        os.environ.setdefault(name, os.path.join(TEST_SECRETS, file_name))
+    os.environ.setdefault("GORDON_METRICS_ENABLED", "false")
+
+    import gordon
+    from gordon.configurations.github_config import GithubConfig
+    from gordon.services.common import json_codec
+    from gordon.services.github.github_service import GithubService
+
+    with open(FIXTURE, "rb") as fixture:
+        body = fixture.read()
+    signature = GithubService.get_signature(body, GithubConfig().get_github_webhook_secret())
+    scenarios = {
+        "signed pull_request": {"X-GitHub-Event": "pull_request", "X-Hub-Signature": signature},
+        "forged signature": {"X-GitHub-Event": "pull_request", "X-Hub-Signature": "sha1=" + "0" * 40},
+        "unsupported event": {"X-GitHub-Event": "issue_comment", "X-Hub-Signature": signature}
+    }
+
+    app = gordon.create_app("test")
+    logging.disable(logging.CRITICAL)
+    print(f"payload: {len(body)} bytes")
+    with mock.patch("gordon.blueprints.blueprints.handle_webhook"), app.test_client() as client:
+        for name, headers in scenarios.items():
+            print(f"{name:>20}: {requests_per_second(client, body, headers, args.seconds):8.0f} req/s")
+
+    print(f"{'json.loads':>20}: {decode_rate(json.loads, body, args.seconds):8.0f} decodes/s")
+    print(f"{'json_codec.loads':>20}: {decode_rate(json_codec.loads, body, args.seconds):8.0f} decodes/s")
+
+
+if __name__ == "__main__":
+    main()
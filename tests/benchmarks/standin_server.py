@@ -0,0 +1,160 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import base64
+import hashlib
+import json
+import threading
+import time
+
+ABOUT_YAML = "version: 1\norganization: twilio\njira_id: {jira_id}\npagerduty_id: {pagerduty_id}\n"
+# Commit every pull request branched off from, its about.yaml is served from files[MERGE_BASE_SHA]
+BASE_SHA = "ba5e" * 10
+MERGE_BASE_SHA = "3e26e" * 8
+
+
+# Stand-in for the Github, Jira and Pagerduty APIs Gordon calls, answering every request after a fixed delay so
+# benchmarks measure round trips instead of the machine they run on
+class StandinServer:
+    def __init__(self, latency=0.05, files=None, pr_files=None, jira_projects=0):
+        """
+        :param latency: seconds every response is delayed by
+        :param files: about.yaml contents keyed by ref, "main" for the default branch. Refs not listed return 404
+        :param pr_files: paths changed by every pull request
+        :param jira_projects: number of GOOD<n> projects the Jira project listing returns
+        """
+        self.latency = latency
+        self.files = files if files is not None else {
+            "main": ABOUT_YAML.format(jira_id="GOOD", pagerduty_id="PGOOD")
+        }
+        self.pr_files = pr_files if pr_files is not None else ["about.yaml"]
+        self.jira_projects = jira_projects
+        self.requests = []
+        self.bytes_sent = 0
+        self.requests_lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.server.shutdown()
+        self.server.server_close()
+
+    @staticmethod
+    def blob(data):
+        blob = data.encode()
+        return hashlib.sha1(b"blob %d\0" % len(blob) + blob).hexdigest()
+
+    def page(self, items, start, per_page):
+        return items[start:start + per_page], start + per_page < len(items)
+
+    def graphql(self, variables):
+        start = int(variables.get("cursor") or 0)
+        paths, has_next_page = self.page(self.pr_files, start, 100)
+        repository = {"pullRequest": {"files": {
+            "nodes": [{"path": path} for path in paths],
+            "pageInfo": {"hasNextPage": has_next_page, "endCursor": str(start + 100)}}}}
+        for name in ("main", "ref"):
+            if name in variables:
+                data = self.files.get(variables[name].split(":")[0].replace("HEAD", "main"))
+                repository[name] = {"oid": self.blob(data), "text": data} if data is not None else None
+        return 200, {"data": {"repository": repository}}
+
+    def route(self, method, path, query, body=None):
+        parts = [part for part in path.split("/") if part]
+        if parts == ["graphql"]:
+            return self.graphql(json.loads(body)["variables"])
+        if parts[:1] == ["jira"] and parts[-1] == "project":
+            return 200, [{"id": str(i), "key": f"GOOD{i}", "name": f"Project {i}",
+                          "projectCategory": {"name": "Engineering"}} for i in range(self.jira_projects)]
+        if parts[:1] == ["jira"]:
+            if parts[-1].startswith("GOOD"):
+                return 200, {"key": parts[-1], "projectCategory": {"name": "Engineering"}}
+            return 404, {"errorMessages": ["No project could be found"]}
+
+        if parts[:1] == ["pagerduty"]:
+            if parts[-1].startswith("PGOOD"):
+                return 200, {"schedule": {"id": parts[-1]}}
+            return 404, {"error": {"message": "Not Found"}}
+
+        if parts[:1] == ["check-runs"]:
+            return 200, {"id": parts[-1], "url": f"{self.url}{path}"}
+
+        if parts[:1] == ["repos"] and len(parts) == 3:
+            full_name = f"{parts[1]}/{parts[2]}"
+            return 200, {"id": 1, "name": parts[2], "full_name": full_name, "url": f"{self.url}/repos/{full_name}"}
+
+        if parts[:1] == ["repos"] and parts[3:] == ["contents", "about.yaml"]:
+            data = self.files.get(query.get("ref", ["main"])[0])
+            if data is None:
+                return 404, {"message": "Not Found"}
+            return 200, {"type": "file", "encoding": "base64", "name": "about.yaml", "path": "about.yaml",
+                         "sha": self.blob(data), "content": base64.b64encode(data.encode()).decode()}
+
+        if parts[:1] == ["repos"] and parts[3:4] == ["pulls"] and len(parts) == 5:
+            return 200, {"number": int(parts[4]), "url": f"{self.url}{path}",
+                         "base": {"ref": "main", "sha": BASE_SHA}, "changed_files": len(self.pr_files)}
+
+        if parts[:1] == ["repos"] and parts[3:4] == ["compare"]:
+            # Github lists up to 300 files on every comparison, whatever the page size of its commits
+            return 200, {"merge_base_commit": {"sha": MERGE_BASE_SHA}, "commits": [{"sha": parts[4][-40:]}],
+                         "files": [{"filename": path, "status": "modified", "patch": "@@ -1 +1 @@\n-a\n+b"}
+                                   for path in self.pr_files[:300]]}
+
+        if parts[:1] == ["repos"] and parts[3:4] == ["pulls"] and parts[5:] == ["files"]:
+            per_page = int(query.get("per_page", ["30"])[0])
+            page = int(query.get("page", ["1"])[0])
+            paths, has_next_page = self.page(self.pr_files, (page - 1) * per_page, per_page)
+            headers = {"Link": f'<{self.url}{path}?per_page={per_page}&page={page + 1}>; rel="next"'} \
+                if has_next_page else {}
+            return 200, [{"filename": path, "status": "modified"} for path in paths], headers
+
+        return 404, {"message": "Not Found"}
+
+    def handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def respond(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length) if length else None
+                parsed = urlparse(self.path)
+                with standin.requests_lock:
+                    standin.requests.append((self.command, parsed.path))
+                time.sleep(standin.latency)
+                status, body, *headers = standin.route(self.command, parsed.path, parse_qs(parsed.query), body)
+                # Contents carry the blob SHA as their ETag, so conditional requests get a 304 like from Github
+                etag = f'"{body["sha"]}"' if status == 200 and "sha" in body else None
+                data = json.dumps(body).encode()
+                if etag is not None and self.headers.get("If-None-Match") == etag:
+                    status, data = 304, b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                if etag is not None:
+                    self.send_header("ETag", etag)
+                for name, value in (headers[0] if headers else {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+                with standin.requests_lock:
+                    standin.bytes_sent += len(data)
+
+            do_GET = respond
+            do_PATCH = respond
+            do_POST = respond
+
+            def log_message(self, format, *args):
+                return
+
+        return Handler
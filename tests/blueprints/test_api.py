@@ -1,9 +1,16 @@
 import json
+import os
 import unittest
 import gordon
 from unittest import mock
+from gordon.blueprints.blueprints import handle_webhook
+from gordon.configurations.github_config import GithubConfig
+from gordon.services.common.ingress_journal import JournalException
+from gordon.services.github.github_service import GithubService
 from gordon.services.github.webhook_processor import WebhookProcessorException
 
+DELIVERY_ID = "72d3162e-cc78-11e3-81ab-4c9367dc0958"
+
 with open("tests/fixtures/good_pr.json") as good_pr_file:
     pr_string = good_pr_file.read()
 with open("tests/fixtures/bad_pr.json") as bad_pr_file:
@@ -52,3 +59,91 @@ class TestParsing(unittest.TestCase):
                               content_type='application/json')
             # print(json.dumps(response.json, indent=2))
             self.assertRaises(WebhookProcessorException)
+
+
+@mock.patch('gordon.blueprints.blueprints.handle_webhook')
+class TestWebhookIngress(unittest.TestCase):
+    def setUp(self):
+        self.app = gordon.create_app('test', config_dict={"MAX_CONTENT_LENGTH": 1024})
+        self.secret = GithubConfig().get_github_webhook_secret()
+
+    def post(self, body, event="pull_request", signature=None):
+        if signature is None:
+            signature = GithubService.get_signature(body, self.secret)
+        with self.app.test_client() as c:
+            return c.post("/api/v1/validate-aboutyaml", data=body,
+                          headers={'X-GitHub-Event': event, 'X-Hub-Signature': signature,
+                                   'X-GitHub-Delivery': DELIVERY_ID},
+                          content_type='application/json')
+
+    def test_signed_payload_is_queued(self, mock_handle_webhook):
+        response = self.post(b'{"action": "opened"}')
+        self.assertEqual(response.status_code, 200)
+        mock_handle_webhook.assert_called_once_with({"action": "opened"}, "pull_request", DELIVERY_ID)
+
+    @mock.patch('gordon.blueprints.blueprints.SenderVerificationProcessor.verify_sender')
+    def test_unsupported_event_is_rejected_before_verification(self, mock_verify_sender, mock_handle_webhook):
+        response = self.post(b'{"action": "created"}', event="issue_comment")
+        self.assertEqual(response.status_code, 400)
+        mock_verify_sender.assert_not_called()
+        mock_handle_webhook.assert_not_called()
+
+    @mock.patch('gordon.blueprints.blueprints.json_codec.loads')
+    def test_forged_payload_is_not_parsed(self, mock_loads, mock_handle_webhook):
+        response = self.post(b'{"action": "opened"}', signature="sha1=0000000000000000000000000000000000000000")
+        self.assertEqual(response.status_code, 400)
+        mock_loads.assert_not_called()
+        mock_handle_webhook.assert_not_called()
+
+    @mock.patch('gordon.blueprints.blueprints.SenderVerificationProcessor.verify_sender')
+    def test_oversized_payload_is_rejected(self, mock_verify_sender, mock_handle_webhook):
+        response = self.post(b'{"action": "opened", "padding": "' + b'x' * 2048 + b'"}')
+        self.assertEqual(response.status_code, 413)
+        mock_verify_sender.assert_not_called()
+
+    def test_signed_invalid_json_is_rejected(self, mock_handle_webhook):
+        response = self.post(b'{"action": ')
+        self.assertEqual(response.status_code, 400)
+        mock_handle_webhook.assert_not_called()
+
+
+@mock.patch('gordon.blueprints.blueprints.get_pull_request_heads')
+@mock.patch('gordon.blueprints.blueprints.webhook_async')
+class TestHandleWebhook(unittest.TestCase):
+    def setUp(self):
+        with open("tests/fixtures/good_pr.json") as fixture:
+            self.payload = json.load(fixture)
+        self.payload["installation"]["id"] = 1
+        self.payload["repository"]["private"] = True
+        self.payload["repository"]["full_name"] = "twilio/gordon"
+
+    def test_pull_request_head_is_recorded_and_debounced(self, mock_webhook_async, mock_heads):
+        self.payload["pull_request"]["updated_at"] = "2021-06-01T10:00:00Z"
+        with mock.patch.dict(os.environ, {"GORDON_SUPERSEDE_DEBOUNCE": "5"}):
+            handle_webhook(self.payload, "pull_request")
+        mock_heads.return_value.record_head.assert_called_once_with(
+            "twilio/gordon", self.payload["number"], self.payload["pull_request"]["head"]["sha"],
+            "2021-06-01T10:00:00Z")
+        self.assertEqual(mock_webhook_async.apply_async.call_args.kwargs["countdown"], 5)
+
+    def test_events_are_not_debounced_by_default(self, mock_webhook_async, mock_heads):
+        handle_webhook(self.payload, "pull_request")
+        self.assertIsNone(mock_webhook_async.apply_async.call_args.kwargs["countdown"])
+
+    def test_unpublished_event_is_journaled(self, mock_webhook_async, mock_heads):
+        mock_webhook_async.apply_async.side_effect = ConnectionError("broker down")
+        with mock.patch('gordon.blueprints.blueprints.get_ingress_journal') as mock_journal:
+            handle_webhook(self.payload, "pull_request", DELIVERY_ID)
+        task = mock_webhook_async.apply_async.call_args.args[0][0]
+        mock_journal.return_value.append.assert_called_once_with(DELIVERY_ID, task, None)
+        mock_journal.return_value.start_drainer.assert_called_once()
+
+    def test_delivery_is_rejected_when_it_cannot_be_journaled(self, mock_webhook_async, mock_heads):
+        app = gordon.create_app('test')
+        body = b'{"action": "opened"}'
+        signature = GithubService.get_signature(body, GithubConfig().get_github_webhook_secret())
+        with mock.patch('gordon.blueprints.blueprints.handle_webhook',
+                        side_effect=JournalException("disk full")), app.test_client() as c:
+            response = c.post("/api/v1/validate-aboutyaml", data=body, content_type='application/json',
+                              headers={'X-GitHub-Event': 'pull_request', 'X-Hub-Signature': signature})
+        self.assertEqual(response.status_code, 503)
@@ -0,0 +1,50 @@
+import os
+import unittest
+from unittest import mock
+from celery import Celery
+from celery.contrib.testing.worker import start_worker
+from gordon import celery
+from gordon.services.celery_worker import task_routing
+from gordon.services.celery_worker.scheduled_tasks import refresh_jira_index
+
+
+def route(event_fields, *args, **kwargs):
+    options = celery.amqp.router.route({}, task_routing.WEBHOOK_TASK, (event_fields,) + args, kwargs)
+    return options["queue"].name, options.get("priority")
+
+
+class TestTaskRouting(unittest.TestCase):
+    def test_event_classes_have_their_own_queues(self):
+        self.assertEqual(route({"event_type": "pull_request", "action": "opened"}), ("gordon.pull_request", 0))
+        self.assertEqual(route({"event_type": "pull_request", "action": "closed"}), ("gordon.closed", 6))
+        self.assertEqual(route({"event_type": "check_suite", "action": "rerequested"}), ("gordon.rerequest", 3))
+        self.assertEqual(route({"event_type": "check_run", "action": "rerequested"}), ("gordon.rerequest", 3))
+        options = celery.amqp.router.route({}, refresh_jira_index.name, (), {})
+        self.assertEqual((options["queue"].name, options["priority"]), ("gordon.bulk", 9))
+
+    def test_tasks_of_earlier_releases_are_routed_by_payload_event(self):
+        self.assertEqual(route({"action": "synchronize"}, "pull_request"), ("gordon.pull_request", 0))
+        self.assertEqual(route({"action": "requested"}, payload_event="check_suite"), ("gordon.rerequest", 3))
+
+    def test_queues_and_priorities_are_configurable(self):
+        with mock.patch.dict(os.environ, {"GORDON_QUEUE_REREQUEST": "backfill",
+                                          "GORDON_QUEUE_REREQUEST_PRIORITY": "8"}):
+            self.assertEqual(route({"event_type": "check_suite", "action": "rerequested"}), ("backfill", 8))
+
+    @mock.patch('gordon.services.celery_worker.task_routing.metrics.histogram')
+    def test_queue_wait_is_reported_per_queue(self, mock_histogram):
+        app = Celery("test_task_routing", broker="memory://", backend="cache+memory://")
+        app.conf.task_routes = (task_routing.route_task,)
+
+        @app.task(name=task_routing.WEBHOOK_TASK, shared=False, lazy=False)
+        def webhook_async(event_fields):
+            return event_fields["action"]
+
+        with start_worker(app, perform_ping_check=False, queues=["gordon.pull_request"]):
+            result = webhook_async.apply_async(({"event_type": "pull_request", "action": "opened"},))
+            self.assertEqual(result.get(timeout=10), "opened")
+
+        metric, wait = mock_histogram.call_args.args
+        self.assertEqual(metric, "queue.wait")
+        self.assertGreaterEqual(wait, 0)
+        self.assertEqual(mock_histogram.call_args.kwargs["tags"], {"queue": "gordon.pull_request"})
@@ -0,0 +1,55 @@
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from gordon.services.common import http_client
+from gordon.services.github.pooled_connection import get_github_connection
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = json.dumps({"full_name": "twilio-labs/gordon", "name": "gordon",
+                           "url": f"http://{self.headers['Host']}/repos/twilio-labs/gordon"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestHttpClient(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        self.host = http_client.HttpClientRegistry.host_key(self.base_url)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connections_are_reused(self):
+        for _ in range(5):
+            response = http_client.get(f"{self.base_url}/healthcheck")
+            self.assertEqual(response.status_code, 200)
+
+        stats = http_client.get_connection_stats()[self.host]
+        self.assertEqual(stats["requests"], 5)
+        self.assertEqual(stats["new_connections"], 1)
+        self.assertEqual(stats["reused_connections"], 4)
+
+    def test_pygithub_uses_pooled_sessions(self):
+        first = get_github_connection(self.base_url, "token")
+        self.assertIs(first, get_github_connection(self.base_url, "token"))
+
+        first.get_repo("twilio-labs/gordon")
+        get_github_connection(self.base_url, "other-token").get_repo("twilio-labs/gordon")
+
+        stats = http_client.get_connection_stats()[self.host]
+        self.assertEqual(stats["requests"], 2)
+        self.assertEqual(stats["new_connections"], 1)
@@ -0,0 +1,124 @@
+import fcntl
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+from gordon.services.common.ingress_journal import IngressJournal, read_records
+
+
+@mock.patch('gordon.services.common.ingress_journal.get_redis_client', return_value=None)
+class TestIngressJournal(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.journal = IngressJournal(directory=self.directory, segment_bytes=1024, enabled=True)
+        self.published = []
+
+    def publish(self, task, countdown):
+        self.published.append((task["pr_number"], countdown))
+
+    def segments(self):
+        return sorted(name for name in os.listdir(self.directory) if name != "drain.lock")
+
+    def test_records_are_replayed_in_order_and_segments_removed(self, mock_redis):
+        for number in range(30):
+            self.journal.append(f"delivery-{number}", {"pr_number": number}, countdown=number % 2 or None)
+        self.assertGreater(len(self.segments()), 1)
+
+        self.assertEqual(self.journal.drain(self.publish), 30)
+        self.assertEqual(self.published, [(number, number % 2 or None) for number in range(30)])
+        self.assertEqual(self.segments(), [])
+
+    def test_failed_publish_is_retried_without_duplicates(self, mock_redis):
+        for number in range(3):
+            self.journal.append(f"delivery-{number}", {"pr_number": number})
+        calls = []
+
+        def flaky_publish(task, countdown):
+            calls.append(task["pr_number"])
+            if len(calls) == 2:
+                raise ConnectionError("broker down")
+            self.publish(task, countdown)
+
+        with self.assertRaises(ConnectionError):
+            self.journal.drain(flaky_publish)
+        self.assertEqual(len(self.segments()), 1)
+        self.assertEqual(self.journal.drain(flaky_publish), 2)
+        self.assertEqual(self.published, [(0, None), (1, None), (2, None)])
+
+    def test_redelivered_webhooks_are_published_once(self, mock_redis):
+        self.journal.append("delivery-1", {"pr_number": 1})
+        self.journal.append("delivery-1", {"pr_number": 1})
+        self.journal.drain(self.publish)
+        self.journal.append("delivery-1", {"pr_number": 1})
+        self.journal.drain(self.publish)
+        self.assertEqual(self.published, [(1, None)])
+
+    def test_torn_record_and_orphaned_segment(self, mock_redis):
+        # Segment left open by a process that died while appending its second record
+        orphan = IngressJournal(directory=self.directory, enabled=True)
+        orphan.append("delivery-1", {"pr_number": 1})
+        orphan.append("delivery-2", {"pr_number": 2})
+        orphan.segment.truncate(orphan.segment.tell() - 3)
+        orphan.segment.close()
+        self.assertEqual(len(read_records(os.path.join(self.directory, self.segments()[0]))), 1)
+
+        self.assertEqual(self.journal.drain(self.publish), 1)
+        self.assertEqual(self.published, [(1, None)])
+        self.assertEqual(self.segments(), [])
+
+    def test_open_segments_of_other_processes_are_left_alone(self, mock_redis):
+        other = IngressJournal(directory=self.directory, enabled=True)
+        other.append("delivery-1", {"pr_number": 1})
+        self.assertEqual(self.journal.drain(self.publish), 0)
+        other.drain(self.publish)
+        self.assertEqual(self.published, [(1, None)])
+
+    def test_segment_is_not_drained_before_it_is_locked(self, mock_redis):
+        flock = fcntl.flock
+        drained = []
+
+        # Drains in another journal between the creation of the segment and its lock
+        def drain_then_flock(fd, operation):
+            if not drained:
+                drained.append(None)
+                drained[0] = self.journal.drain(self.publish)
+            flock(fd, operation)
+
+        writer = IngressJournal(directory=self.directory, enabled=True)
+        with mock.patch("gordon.services.common.ingress_journal.fcntl.flock", side_effect=drain_then_flock):
+            writer.open_segment()
+        self.assertEqual(drained, [0])
+        self.assertTrue(writer.segment_path.endswith(".open"))
+        self.assertEqual(self.segments(), [os.path.basename(writer.segment_path)])
+
+        writer.append("delivery-1", {"pr_number": 1})
+        self.assertEqual(self.journal.drain(self.publish), 0)
+        self.assertEqual(writer.drain(self.publish), 1)
+
+    def test_concurrent_appends_share_fsyncs(self, mock_redis):
+        journal = IngressJournal(directory=self.directory, segment_bytes=1024 * 1024, enabled=True)
+        journal.append("delivery-first", {"pr_number": 0})
+        barrier = threading.Barrier(50)
+
+        def append(number):
+            barrier.wait()
+            journal.append(f"delivery-{number}", {"pr_number": number})
+
+        fsync = os.fsync
+
+        def slow_fsync(fd):
+            time.sleep(0.02)
+            fsync(fd)
+
+        with mock.patch("gordon.services.common.ingress_journal.os.fsync", side_effect=slow_fsync) as mock_fsync:
+            threads = [threading.Thread(target=append, args=(number,)) for number in range(1, 51)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertLess(mock_fsync.call_count, 10)
+        self.assertEqual(journal.drain(self.publish), 51)
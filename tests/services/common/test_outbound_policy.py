@@ -0,0 +1,58 @@
+import unittest
+import uuid
+import requests
+from unittest import mock
+from gordon.services.common.outbound_policy import OutboundCallPolicy, CircuitOpenException, OutboundCallException
+
+
+def response(status_code, headers=None):
+    mock_response = mock.Mock(status_code=status_code)
+    mock_response.headers = headers or {}
+    return mock_response
+
+
+@mock.patch('gordon.services.common.outbound_policy.time.sleep')
+@mock.patch('gordon.services.common.outbound_policy.get_redis_client', return_value=None)
+@mock.patch('gordon.services.common.outbound_policy.http_client.request')
+class TestOutboundCallPolicy(unittest.TestCase):
+    def setUp(self):
+        self.policy = OutboundCallPolicy(f"test-{uuid.uuid4()}")
+        self.policy.max_retries = 2
+        self.policy.circuit_breaker.failure_threshold = 2
+
+    def test_timeouts_are_always_set(self, mock_request, mock_redis, mock_sleep):
+        mock_request.return_value = response(200)
+        self.policy.request("GET", "https://jira/project/ABC")
+        self.assertEqual(mock_request.call_args.kwargs["timeout"], self.policy.timeout)
+
+    def test_retries_server_errors(self, mock_request, mock_redis, mock_sleep):
+        mock_request.side_effect = [response(503), response(429, {"Retry-After": "1"}), response(200)]
+        self.assertEqual(self.policy.request("GET", "https://jira/project/ABC").status_code, 200)
+        self.assertEqual(mock_request.call_count, 3)
+        mock_sleep.assert_called_with(1.0)
+
+    def test_post_not_retried_on_server_error(self, mock_request, mock_redis, mock_sleep):
+        mock_request.return_value = response(502)
+        self.assertEqual(self.policy.request("POST", "https://github/check-runs").status_code, 502)
+        self.assertEqual(mock_request.call_count, 1)
+
+    def test_circuit_opens_and_fails_fast(self, mock_request, mock_redis, mock_sleep):
+        mock_request.side_effect = requests.ConnectionError("connection refused")
+        for _ in range(2):
+            with self.assertRaises(OutboundCallException):
+                self.policy.request("GET", "https://jira/project/ABC")
+        calls = mock_request.call_count
+
+        with self.assertRaises(CircuitOpenException):
+            self.policy.request("GET", "https://jira/project/ABC")
+        self.assertEqual(mock_request.call_count, calls)
+
+    def test_single_probe_when_half_open(self, mock_request, mock_redis, mock_sleep):
+        breaker = self.policy.circuit_breaker
+        breaker.run(lambda store: store.set_flag(breaker.half_open_key, 60))
+
+        self.assertEqual(breaker.allow_request(), breaker.PROBE)
+        self.assertIsNone(breaker.allow_request())
+
+        breaker.record_success(breaker.PROBE)
+        self.assertEqual(breaker.allow_request(), breaker.CLOSED)
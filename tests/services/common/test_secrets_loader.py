@@ -0,0 +1,89 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import jwt
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from gordon.services.common.secrets_loader import SecretsProvider, SecretsLoaderException
+from gordon.services.github.github_service import GithubAppService
+
+
+def generate_pem():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048, backend=default_backend())
+    pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                            serialization.NoEncryption()).decode()
+    return key, pem
+
+
+class TestSecretsProvider(unittest.TestCase):
+    def setUp(self):
+        self.secrets_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.secrets_dir)
+        self.path = os.path.join(self.secrets_dir, "secrets.json")
+        patch = mock.patch.dict(os.environ, {"SECRET_TEST": self.path})
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.provider = SecretsProvider()
+
+    def write(self, secrets, path=None):
+        with open(path or self.path, "w") as secrets_file:
+            secrets_file.write(secrets if isinstance(secrets, str) else json.dumps(secrets))
+
+    def test_file_is_read_once_until_it_changes(self):
+        self.write({"hook": "first"})
+        with mock.patch("builtins.open", wraps=open) as mock_open:
+            for _ in range(3):
+                self.assertEqual(self.provider.get_secrets("SECRET_TEST"), {"hook": "first"})
+            self.assertEqual(mock_open.call_count, 1)
+
+            self.write({"hook": "rotated"})
+            self.assertEqual(self.provider.get_secrets("SECRET_TEST"), {"hook": "rotated"})
+
+    def test_symlink_swap_is_picked_up(self):
+        # Kubernetes mounts secrets as symlinks into a directory it replaces on rotation
+        for version, hook in enumerate(["first", "rotated"]):
+            target = os.path.join(self.secrets_dir, f"version{version}.json")
+            self.write({"hook": hook}, target)
+            link = self.path + ".tmp"
+            os.symlink(target, link)
+            os.replace(link, self.path)
+            self.assertEqual(self.provider.get_secrets("SECRET_TEST"), {"hook": hook})
+
+    def test_broken_rotation_keeps_last_version(self):
+        self.write({"hook": "first"})
+        self.provider.get_secrets("SECRET_TEST")
+        self.write("{partial")
+        self.assertEqual(self.provider.get_secrets("SECRET_TEST"), {"hook": "first"})
+        os.remove(self.path)
+        self.assertEqual(self.provider.get_secrets("SECRET_TEST"), {"hook": "first"})
+
+    def test_missing_secrets(self):
+        with self.assertRaises(SecretsLoaderException):
+            self.provider.get_secrets("SECRET_TEST")
+        with self.assertRaises(SecretsLoaderException):
+            self.provider.get_secrets("SECRET_UNDEFINED")
+
+    def test_derived_objects_are_built_once_per_version(self):
+        build = mock.Mock(side_effect=lambda secrets: secrets["hook"].upper())
+        self.write({"hook": "first"})
+        self.assertEqual(self.provider.get_derived("SECRET_TEST", "upper", build), "FIRST")
+        self.assertEqual(self.provider.get_derived("SECRET_TEST", "upper", build), "FIRST")
+        self.write({"hook": "rotated"})
+        self.assertEqual(self.provider.get_derived("SECRET_TEST", "upper", build), "ROTATED")
+        self.assertEqual(build.call_count, 2)
+
+    def test_app_jwt_is_signed_with_the_parsed_key(self):
+        key, pem = generate_pem()
+        self.write({"webhook_secret": "test", "github_app_integration_id": "42", "github_app_pem_key": pem})
+        with mock.patch.dict(os.environ, {"SECRET_GITHUB_SECRET": self.path}), \
+                mock.patch("gordon.configurations.github_config.get_derived_secret", self.provider.get_derived), \
+                mock.patch("gordon.configurations.github_config.serialization.load_pem_private_key",
+                           wraps=serialization.load_pem_private_key) as load_pem:
+            tokens = [GithubAppService.create_jwt() for _ in range(3)]
+        self.assertEqual(load_pem.call_count, 1)
+        claims = jwt.decode(tokens[0], key.public_key(), algorithms=["RS256"])
+        self.assertEqual(claims["iss"], "42")
@@ -0,0 +1,143 @@
+import base64
+import json
+import os
+import unittest
+from unittest import mock
+from gordon.services.celery_worker import webhook_async_processor
+from gordon.services.common import call_counter
+from gordon.services.github.check_run_manager import CheckRunManager
+from gordon.services.github.github_service import GithubService
+from gordon.services.github.rate_limit import RateLimitedException
+from gordon.services.github.webhook_event import WebhookEvent
+from gordon.services.validator.concurrent_validation import ConcurrentValidation
+from tests.services.validator.test_concurrent_validation import INVALID_FILE
+
+API = "https://api.github.com"
+HEAD_SHA = "0123456789abcdef"
+CHECK_URL = f"{API}/repos/org/repo"
+CHECK_RUN_URL = f"{CHECK_URL}/check-runs/7"
+# Github calls of one event per backend: the calls driving its check run, plus the main and head about.yaml read with
+# one contents call each through REST or together in one GraphQL query
+EVENT_CALLS = {
+    "pull_request": {"rest": 4, "graphql": 3},
+    "check_run": {"rest": 3, "graphql": 2},
+    "check_suite": {"rest": 4, "graphql": 3}
+}
+
+
+def json_response(status_code, body):
+    text = json.dumps(body)
+    return mock.Mock(status_code=status_code, headers={"etag": f'"{hash(text)}"'}, text=text, content=text.encode(),
+                     json=mock.Mock(return_value=body))
+
+
+def blob():
+    return {"oid": "oid", "text": INVALID_FILE, "isBinary": False, "isTruncated": False}
+
+
+def github_response(method, url, **kwargs):
+    if "/contents/about.yaml" in url:
+        return json_response(200, {"type": "file", "sha": "sha",
+                                   "content": base64.b64encode(INVALID_FILE.encode()).decode()})
+    if url.endswith("/graphql"):
+        files = {"nodes": [], "pageInfo": {"hasNextPage": False, "endCursor": None}}
+        return json_response(200, {"data": {"repository": {"main": blob(), "ref": blob(),
+                                                           "pullRequest": {"files": files}}}})
+    if method == "POST":
+        return json_response(201, {"url": f"{CHECK_URL}/check-runs/8",
+                                   "html_url": "https://github.com/org/repo/runs/8"})
+    if method == "GET":
+        return json_response(200, {"check_runs": [{"url": CHECK_RUN_URL}]})
+    return json_response(200, {"url": url})
+
+
+def make_event(event_type, source_url=None):
+    return WebhookEvent(event_type=event_type, action="rerequested", organization="org", repo_name="org/repo",
+                        repo_html_url="https://github.com/org/repo", private=True, installation_id=1,
+                        head_sha=HEAD_SHA, pr_number=1, check_url=CHECK_URL, source_url=source_url)
+
+
+@mock.patch('gordon.services.common.outbound_policy.get_redis_client', return_value=None)
+@mock.patch('gordon.services.common.ttl_cache.get_redis_client', return_value=None)
+@mock.patch('gordon.services.validator.pull_request_heads.get_redis_client', return_value=None)
+class TestCheckRunManager(unittest.TestCase):
+    def setUp(self):
+        self.http_request = mock.Mock(side_effect=github_response)
+        patches = [
+            mock.patch("gordon.services.common.outbound_policy.http_client.request", self.http_request),
+            mock.patch("gordon.services.github.github_service.GithubAppService.get_github_app_token",
+                       return_value="token"),
+            mock.patch.dict(os.environ, {"GITHUB_API": API, "GORDON_CHECK_IN_PROGRESS_DELAY": "60"})
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    # Runs the event on both backends, with the about.yaml files read through the real repository backend, and returns
+    # the check run calls
+    def run_setup(self, setup, event):
+        check_run_calls = []
+        for backend in ["rest", "graphql"]:
+            self.http_request.reset_mock()
+            with mock.patch.dict(os.environ, {"GORDON_GITHUB_BACKEND": backend}), \
+                    call_counter.count_calls() as calls:
+                file_handler = setup(event, "org")
+            self.assertFalse(file_handler.cancelled)
+            self.assertEqual(calls["github"], EVENT_CALLS[event.event_type][backend])
+            self.assertEqual(calls["github"], self.http_request.call_count)
+            check_run_calls.append([(call.args[0], call.args[1]) for call in self.http_request.call_args_list
+                                    if "/contents/" not in call.args[1] and not call.args[1].endswith("/graphql")])
+        self.assertEqual(check_run_calls[0], check_run_calls[1])
+        return check_run_calls[0]
+
+    def test_pull_request_creates_run_in_progress(self, *mocks):
+        calls = self.run_setup(webhook_async_processor.open_pull_request_setup,
+                               make_event("pull_request", "https://github.com/org/repo/pull/1"))
+        self.assertEqual(calls, [("POST", f"{CHECK_URL}/check-runs"), ("PATCH", f"{CHECK_URL}/check-runs/8")])
+        self.assertIn('"status": "in_progress"', self.http_request.call_args_list[0].kwargs["data"])
+
+    def test_check_run_rerequest_reuses_run(self, *mocks):
+        calls = self.run_setup(webhook_async_processor.checkrun_setup, make_event("check_run", CHECK_RUN_URL))
+        self.assertEqual(calls, [("PATCH", CHECK_RUN_URL)])
+
+    def test_check_suite_rerequest_reuses_run_of_commit(self, *mocks):
+        calls = self.run_setup(webhook_async_processor.checksuite_setup,
+                               make_event("check_suite", f"{CHECK_URL}/check-suites/3"))
+        self.assertEqual(calls, [("GET", f"{CHECK_URL}/commits/{HEAD_SHA}/check-runs"), ("PATCH", CHECK_RUN_URL)])
+
+    def test_slow_check_is_moved_back_to_in_progress(self, *mocks):
+        check_run = CheckRunManager(GithubService(API, "token"), HEAD_SHA, CHECK_URL, CHECK_RUN_URL,
+                                    in_progress_delay=0).start()
+        check_run.timer.join()
+        check_run.complete("All checks Passed", conclusion="success")
+
+        statuses = [call.kwargs["data"] for call in self.http_request.call_args_list]
+        self.assertEqual(len(statuses), 2)
+        self.assertIn('"status": "in_progress"', statuses[0])
+        self.assertIn('"conclusion": "success"', statuses[1])
+
+    @mock.patch("gordon.services.github.check_run_manager.metrics.increment")
+    def test_failed_in_progress_update_is_reported(self, mock_increment, *mocks):
+        github_service = GithubService(API, "token")
+        with mock.patch.object(github_service, "update_check_run", side_effect=RateLimitedException(1, 300)), \
+                mock.patch("threading.excepthook") as mock_excepthook:
+            check_run = CheckRunManager(github_service, HEAD_SHA, CHECK_URL, CHECK_RUN_URL, in_progress_delay=0).start()
+            check_run.timer.join()
+        mock_excepthook.assert_not_called()
+        mock_increment.assert_called_once_with("check_run.in_progress_failed")
+
+    def test_only_first_conclusion_is_sent(self, *mocks):
+        check_run = CheckRunManager(GithubService(API, "token"), HEAD_SHA, CHECK_URL, CHECK_RUN_URL).start()
+        check_run.complete("All checks Passed", conclusion="success")
+        self.assertIsNone(check_run.complete("Check cancelled", conclusion="cancelled"))
+        self.assertEqual(self.http_request.call_count, 1)
+        self.assertEqual(check_run.payload, {"url": CHECK_RUN_URL})
+
+    def test_calls_on_validation_threads_are_counted(self, *mocks):
+        github_service = GithubService(API, "token")
+        with call_counter.count_calls() as calls, ConcurrentValidation(max_workers=2) as concurrent_validation:
+            futures = [concurrent_validation.submit(github_service.find_check_run, HEAD_SHA, CHECK_URL)
+                       for _ in range(4)]
+            [future.result() for future in futures]
+        self.assertEqual(calls["github"], 4)
+        self.assertEqual(calls[("github", "GET")], 4)
@@ -0,0 +1,63 @@
+import base64
+import unittest
+from unittest import mock
+from github import GithubException
+from gordon.services.common.ttl_cache import TwoTierCache
+from gordon.services.github.contents_cache import ContentsCache
+from tests.services.validator.test_concurrent_validation import FakeRepo
+
+COMMIT_SHA = "0123456789abcdef0123456789abcdef01234567"
+
+
+@mock.patch('gordon.services.common.ttl_cache.get_redis_client', return_value=None)
+class TestContentsCache(unittest.TestCase):
+    def setUp(self):
+        self.repo = FakeRepo({"main": "version: 1\n", "ref": "version: 2\n"})
+        self.requests = mock.Mock(wraps=self.repo.requestJson)
+        self.repo._requester = mock.Mock(requestJson=self.requests)
+        self.cache = ContentsCache(TwoTierCache("test-github-contents", max_local_entries=10))
+
+    def read(self, ref=None):
+        contents = self.cache.get_contents(self.repo, "about.yaml", *([ref] if ref else []))
+        return base64.b64decode(contents.content).decode()
+
+    def test_branch_contents_are_revalidated(self, mock_redis):
+        self.assertEqual(self.read(), "version: 1\n")
+        self.assertEqual(self.read(), "version: 1\n")
+        self.assertEqual(self.requests.call_count, 2)
+        self.assertIn("If-None-Match", self.requests.call_args.kwargs["headers"])
+
+        self.repo.files["main"] = "version: 3\n"
+        self.assertEqual(self.read(), "version: 3\n")
+
+    def test_commit_contents_are_served_from_cache(self, mock_redis):
+        self.assertEqual(self.read(COMMIT_SHA), "version: 2\n")
+        self.assertEqual(self.read(COMMIT_SHA), "version: 2\n")
+        self.assertEqual(self.requests.call_count, 1)
+
+    def test_missing_file_at_commit_is_cached(self, mock_redis):
+        self.repo.files["ref"] = None
+        for _ in range(2):
+            with self.assertRaises(GithubException) as context:
+                self.read(COMMIT_SHA)
+            self.assertEqual(context.exception.status, 404)
+        self.assertEqual(self.requests.call_count, 1)
+
+    def test_missing_file_on_branch_is_not_cached(self, mock_redis):
+        self.repo.files["main"] = None
+        with self.assertRaises(GithubException):
+            self.read()
+        self.repo.files["main"] = "version: 1\n"
+        self.assertEqual(self.read(), "version: 1\n")
+
+    def test_large_files_are_not_cached(self, mock_redis):
+        self.cache.max_bytes = 4
+        self.read(COMMIT_SHA)
+        self.read(COMMIT_SHA)
+        self.assertEqual(self.requests.call_count, 2)
+
+    @mock.patch('gordon.services.github.contents_cache.metrics.get_counter')
+    def test_hit_ratio(self, mock_counter, mock_redis):
+        mock_counter.side_effect = lambda metric, tags: {"immutable": 2, "not_modified": 1, "fetched": 1}[
+            tags["result"]]
+        self.assertEqual(ContentsCache.get_hit_ratio(), 0.75)
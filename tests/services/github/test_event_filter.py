@@ -0,0 +1,73 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from gordon.services.common import metrics
+from gordon.services.github.event_filter import EventFilter, SharedRepos, SKIP_PUBLIC_REPO, SKIP_SHARED_REPO
+from gordon.services.github.webhook_event import WebhookEvent
+
+
+def make_event(repo_html_url="https://github.com/twilio/gordon", private=True, organization="twilio"):
+    return WebhookEvent(event_type="pull_request", action="opened", organization=organization,
+                        repo_name="twilio/gordon", repo_html_url=repo_html_url, private=private, installation_id=1,
+                        head_sha="abc", pr_number=1, check_url="https://api.github.com/repos/twilio/gordon")
+
+
+class TestEventFilter(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.files = {}
+        for validator in ["default", "acquisition"]:
+            self.files[validator] = os.path.join(self.directory.name, f"{validator}_shared_repos.json")
+            self.write(validator, {})
+        environment = mock.patch.dict(os.environ, {
+            "GORDON_DEFAULT_SHARED_REPOS": self.files["default"],
+            "GORDON_ACQUISITION_SHARED_REPOS": self.files["acquisition"]
+        })
+        environment.start()
+        self.addCleanup(environment.stop)
+
+    def write(self, validator, shared_repos):
+        with open(self.files[validator], "w") as shared_file:
+            json.dump(shared_repos, shared_file)
+        # Make the change visible even on file systems with coarse modification times
+        stat = os.stat(self.files[validator])
+        os.utime(self.files[validator], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    def test_public_repos_are_skipped(self):
+        self.assertEqual(EventFilter().get_skip_reason(make_event(private=False)), SKIP_PUBLIC_REPO)
+
+    def test_shared_repo_urls_are_normalized(self):
+        self.write("default", {"gordon": "https://github.com/Twilio/Gordon/"})
+        event_filter = EventFilter()
+        for url in ["https://github.com/twilio/gordon", "https://github.com/twilio/gordon/",
+                    "https://github.com/twilio/gordon.git"]:
+            self.assertEqual(event_filter.get_skip_reason(make_event(url)), SKIP_SHARED_REPO)
+        self.assertIsNone(event_filter.get_skip_reason(make_event("https://github.com/twilio/gordon-ui")))
+
+    def test_shared_repos_are_per_validator(self):
+        self.write("acquisition", {"gordon": "https://github.com/twilio/gordon"})
+        event_filter = EventFilter()
+        self.assertIsNone(event_filter.get_skip_reason(make_event()))
+        self.assertEqual(event_filter.get_skip_reason(make_event(organization="acquisition1")), SKIP_SHARED_REPO)
+
+    def test_shared_repos_file_is_reloaded_when_changed(self):
+        shared_repos = SharedRepos(self.files["default"])
+        self.assertNotIn("https://github.com/twilio/gordon", shared_repos)
+
+        self.write("default", {"gordon": "https://github.com/twilio/gordon"})
+        self.assertIn("https://github.com/twilio/gordon", shared_repos)
+
+        with open(self.files["default"], "w") as shared_file:
+            shared_file.write("{not json")
+        self.assertIn("https://github.com/twilio/gordon", shared_repos)
+
+    def test_skips_are_counted_per_reason(self):
+        tags = {"reason": SKIP_PUBLIC_REPO, "event": "pull_request"}
+        before = metrics.get_counter("webhook.filtered", tags)
+        event_filter = EventFilter()
+        self.assertTrue(event_filter.should_skip(make_event(private=False)))
+        self.assertFalse(event_filter.should_skip(make_event()))
+        self.assertEqual(metrics.get_counter("webhook.filtered", tags), before + 1)
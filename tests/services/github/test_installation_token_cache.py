@@ -0,0 +1,52 @@
+import threading
+import time
+import unittest
+from unittest import mock
+from gordon.services.github.installation_token_cache import InstallationTokenCache, InstallationTokenCacheException
+
+
+@mock.patch('gordon.services.github.installation_token_cache.get_redis_client', return_value=None)
+class TestInstallationTokenCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = InstallationTokenCache(refresh_margin=300, lock_timeout=1)
+        self.mint_calls = 0
+
+    def mint(self, lifetime=3600):
+        self.mint_calls += 1
+        time.sleep(0.05)
+        return f"token-{self.mint_calls}", time.time() + lifetime
+
+    def test_token_is_reused(self, mock_redis):
+        first = self.cache.get_token("https://api.github.com", 1, self.mint)
+        second = self.cache.get_token("https://api.github.com", "1", self.mint)
+        self.assertEqual(first, second)
+        self.assertEqual(self.mint_calls, 1)
+
+    def test_installations_are_cached_separately(self, mock_redis):
+        self.cache.get_token("https://api.github.com", 1, self.mint)
+        self.cache.get_token("https://api.github.com", 2, self.mint)
+        self.cache.get_token("https://github.example.com/api/v3", 1, self.mint)
+        self.assertEqual(self.mint_calls, 3)
+
+    def test_token_refreshed_ahead_of_expiry(self, mock_redis):
+        first = self.cache.get_token("https://api.github.com", 1, lambda: self.mint(lifetime=200))
+        second = self.cache.get_token("https://api.github.com", 1, self.mint)
+        self.assertNotEqual(first, second)
+        self.assertEqual(self.mint_calls, 2)
+
+    def test_concurrent_requests_mint_once(self, mock_redis):
+        tokens = []
+        threads = [threading.Thread(target=lambda: tokens.append(
+            self.cache.get_token("https://api.github.com", 1, self.mint))) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.mint_calls, 1)
+        self.assertEqual(set(tokens), {"token-1"})
+
+    def test_mint_failure_raises(self, mock_redis):
+        def failing_mint():
+            raise ValueError("bad credentials")
+        with self.assertRaises(InstallationTokenCacheException):
+            self.cache.get_token("https://api.github.com", 1, failing_mint)
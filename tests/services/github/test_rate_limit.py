@@ -0,0 +1,145 @@
+import time
+import unittest
+from unittest import mock
+from celery.exceptions import Retry
+from gordon.services.celery_worker import webhook_async_processor
+from gordon.services.github import rate_limit
+from gordon.services.github.rate_limit import RateLimitScheduler, RateLimitedException
+from tests.services.github.test_event_filter import make_event
+
+
+def github_response(status_code=200, remaining=None, reset=None, retry_after=None):
+    headers = {}
+    if remaining is not None:
+        headers.update({"X-RateLimit-Remaining": str(remaining), "X-RateLimit-Reset": str(int(reset))})
+    if retry_after is not None:
+        headers["Retry-After"] = str(retry_after)
+    return mock.Mock(status_code=status_code, headers=headers)
+
+
+@mock.patch('gordon.services.github.rate_limit.get_redis_client', return_value=None)
+class TestRateLimitScheduler(unittest.TestCase):
+    def setUp(self):
+        patch = mock.patch.object(rate_limit, "_local_store", rate_limit.LocalQuotaStore())
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.scheduler = RateLimitScheduler()
+        self.scheduler.reserve = 5
+
+    def test_bucket_is_drawn_down_between_responses(self, mock_redis):
+        reset = time.time() + 600
+        self.scheduler.observe(1, github_response(remaining=2, reset=reset))
+        self.scheduler.acquire(1)
+        self.scheduler.acquire(1)
+        with self.assertRaises(RateLimitedException) as context:
+            self.scheduler.acquire(1)
+        self.assertAlmostEqual(context.exception.retry_after, 600, delta=5)
+
+        # Other installations and a refilled bucket are not throttled
+        self.scheduler.acquire(2)
+        self.scheduler.observe(1, github_response(remaining=5000, reset=reset + 3600))
+        self.scheduler.acquire(1)
+
+    def test_unknown_installations_are_not_throttled(self, mock_redis):
+        self.scheduler.check_quota(1)
+        self.scheduler.acquire(1)
+
+    def test_secondary_rate_limit_blocks_installation(self, mock_redis):
+        with self.assertRaises(RateLimitedException) as context:
+            self.scheduler.observe(1, github_response(403, remaining=4000, reset=time.time() + 600, retry_after=60))
+        self.assertEqual(context.exception.retry_after, 60)
+        with self.assertRaises(RateLimitedException):
+            self.scheduler.acquire(1)
+
+    def test_exhausted_quota_response_raises(self, mock_redis):
+        with self.assertRaises(RateLimitedException):
+            self.scheduler.observe(1, github_response(403, remaining=0, reset=time.time() + 120))
+
+    def test_checks_only_start_above_reserve(self, mock_redis):
+        self.scheduler.observe(1, github_response(remaining=5, reset=time.time() + 600))
+        with self.assertRaises(RateLimitedException):
+            self.scheduler.check_quota(1)
+        # Calls of checks that already started may use the reserve
+        self.scheduler.acquire(1)
+
+    def test_expired_quota_is_ignored(self, mock_redis):
+        self.scheduler.observe(1, github_response(remaining=0, reset=time.time() - 1))
+        self.scheduler.check_quota(1)
+        self.scheduler.acquire(1)
+
+    @mock.patch('gordon.services.github.rate_limit.outbound_policy.request')
+    def test_only_calls_of_an_installation_are_scheduled(self, mock_request, mock_redis):
+        mock_request.return_value = github_response(remaining=0, reset=time.time() + 600)
+        rate_limit.request("POST", "https://api.github.com/app/installations/1/access_tokens")
+        with rate_limit.installation(1):
+            rate_limit.request("GET", "https://api.github.com/repos/org/repo")
+            with self.assertRaises(RateLimitedException):
+                rate_limit.request("GET", "https://api.github.com/repos/org/repo")
+        self.assertEqual(mock_request.call_count, 2)
+
+
+@mock.patch.object(webhook_async_processor, "get_event_filter")
+@mock.patch.object(webhook_async_processor, "get_rate_limit_scheduler")
+@mock.patch.object(webhook_async_processor, "processor")
+class TestRateLimitedTask(unittest.TestCase):
+    def rate_limited(self, check_run_url=None):
+        exception = RateLimitedException(1, 300)
+        exception.check_run_url = check_run_url
+        return exception
+
+    def test_task_is_retried_on_the_same_check_run(self, mock_processor, mock_scheduler, mock_filter):
+        mock_filter.return_value.should_skip.return_value = False
+        mock_processor.side_effect = self.rate_limited("https://api.github.com/repos/org/repo/check-runs/7")
+        event = make_event()
+        with mock.patch.object(webhook_async_processor.webhook_async, "retry", side_effect=Retry()) as mock_retry:
+            with self.assertRaises(Retry):
+                webhook_async_processor.webhook_async(event.to_task())
+
+        retried = mock_retry.call_args.kwargs
+        self.assertGreaterEqual(retried["countdown"], 300)
+        self.assertEqual(retried["args"][0]["check_run_url"], "https://api.github.com/repos/org/repo/check-runs/7")
+
+    def test_check_is_not_started_below_reserve(self, mock_processor, mock_scheduler, mock_filter):
+        mock_filter.return_value.should_skip.return_value = False
+        mock_scheduler.return_value.check_quota.side_effect = self.rate_limited()
+        with mock.patch.object(webhook_async_processor.webhook_async, "retry", side_effect=Retry()):
+            with self.assertRaises(Retry):
+                webhook_async_processor.webhook_async(make_event().to_task())
+        mock_processor.assert_not_called()
+
+    def test_task_is_dropped_after_max_retries(self, mock_processor, mock_scheduler, mock_filter):
+        mock_filter.return_value.should_skip.return_value = False
+        mock_processor.side_effect = self.rate_limited()
+        webhook_async_processor.webhook_async.push_request(retries=12)
+        try:
+            with mock.patch.object(webhook_async_processor.webhook_async, "retry") as mock_retry:
+                webhook_async_processor.webhook_async.run(make_event().to_task())
+        finally:
+            webhook_async_processor.webhook_async.pop_request()
+        mock_retry.assert_not_called()
+
+        # The check run opened before the quota ran out is cancelled
+        mock_processor.side_effect = self.rate_limited("https://api.github.com/repos/org/repo/check-runs/7")
+        with mock.patch.object(webhook_async_processor, "cancel_rate_limited_check") as mock_cancel:
+            webhook_async_processor.webhook_async.push_request(retries=12)
+            try:
+                webhook_async_processor.webhook_async.run(make_event().to_task())
+            finally:
+                webhook_async_processor.webhook_async.pop_request()
+        mock_cancel.assert_called_once_with(make_event(), "https://api.github.com/repos/org/repo/check-runs/7")
+
+    @mock.patch.object(webhook_async_processor, "GithubAppService")
+    @mock.patch.object(webhook_async_processor, "GithubService")
+    def test_dropped_check_run_is_cancelled(self, mock_github_service, mock_app_service, *mocks):
+        event = make_event()
+        webhook_async_processor.cancel_rate_limited_check(event, "https://api.github.com/repos/org/repo/check-runs/7")
+        mock_github_service.return_value.update_check_run.assert_called_once_with(
+            {"url": "https://api.github.com/repos/org/repo/check-runs/7"},
+            webhook_async_processor.RATE_LIMITED_MESSAGE, conclusion="cancelled")
+
+        # Cancelling is best effort, and checks dropped before their run was opened have nothing to cancel
+        mock_github_service.return_value.update_check_run.side_effect = RateLimitedException(1, 300)
+        webhook_async_processor.cancel_rate_limited_check(event, "https://api.github.com/repos/org/repo/check-runs/7")
+        mock_github_service.reset_mock()
+        webhook_async_processor.cancel_rate_limited_check(event, None)
+        mock_github_service.assert_not_called()
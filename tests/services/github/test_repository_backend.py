@@ -0,0 +1,155 @@
+import itertools
+import json
+import os
+import unittest
+from unittest import mock
+from github import GithubException
+from gordon.services.common.ttl_cache import TwoTierCache
+from gordon.services.github.github_service import GithubService
+from gordon.services.github.repository_backend import GraphqlRepositoryBackend, RestRepositoryBackend, \
+    get_repository_backend
+from gordon.services.validator.default.default_file_validator import DefaultFileValidator
+from tests.services.validator.test_concurrent_validation import FakeRepo, INVALID_FILE, VALID_FILE, REF_SHA
+
+BINARY_FILE = "\0\x01\x02"
+# Valid once read whole, the padding is all GraphQL returns of it
+LARGE_FILE = "# " + "padding " * 200 + "\n" + VALID_FILE.format(jira_id="JIRA", pagerduty_id="PD")
+
+
+# Answers the GraphQL queries of the backend from the same files a FakeRepo serves, with no text for binary files and
+# the text of files larger than max_text cut
+class FakeGraphql:
+    def __init__(self, files, pr_files, page_size=2, max_text=1024):
+        self.files = files
+        self.pr_files = pr_files
+        self.page_size = page_size
+        self.max_text = max_text
+        self.queries = []
+
+    def blob(self, name):
+        data = self.files.get(name)
+        if data is None:
+            return None
+        binary = "\0" in data
+        return {"oid": f"oid-{name}-{hash(data)}", "text": None if binary else data[:self.max_text],
+                "isBinary": binary, "isTruncated": not binary and len(data) > self.max_text}
+
+    def request(self, method, url, headers=None, data=None):
+        variables = json.loads(data)["variables"]
+        self.queries.append(variables)
+        start = int(variables.get("cursor") or 0)
+        page = self.pr_files[start:start + self.page_size]
+        files = {"nodes": [{"path": path} for path in page], "pageInfo": {
+            "hasNextPage": start + self.page_size < len(self.pr_files), "endCursor": str(start + self.page_size)}}
+        repository = {"pullRequest": {"files": files}}
+        if "main" in variables:
+            repository.update(main=self.blob("main"), ref=self.blob("ref"))
+        body = json.dumps({"data": {"repository": repository}}).encode()
+        return mock.Mock(status_code=200, content=body)
+
+
+class TestRepositoryBackend(unittest.TestCase):
+    def graphql_backend(self, fake_graphql):
+        patch = mock.patch("gordon.services.github.repository_backend.rate_limit.request", fake_graphql.request)
+        patch.start()
+        self.addCleanup(patch.stop)
+        return GraphqlRepositoryBackend(GithubService("https://github.example.com/api/v3", "token"), "org/repo",
+                                        REF_SHA, 1)
+
+    def test_one_query_answers_a_check(self):
+        fake_graphql = FakeGraphql({"main": "version: 1\n"}, ["README.md", "about.yaml"])
+        backend = self.graphql_backend(fake_graphql)
+        self.assertEqual(backend.get_contents("about.yaml").sha, fake_graphql.blob("main")["oid"])
+        with self.assertRaises(GithubException):
+            backend.get_contents("about.yaml", ref=REF_SHA)
+        self.assertTrue(backend.pull_request_touches("about.yaml"))
+        self.assertEqual(len(fake_graphql.queries), 1)
+
+    def test_files_are_paginated_until_found(self):
+        fake_graphql = FakeGraphql({}, [f"file{i}" for i in range(7)] + ["about.yaml"] + ["other"] * 10)
+        backend = self.graphql_backend(fake_graphql)
+        self.assertTrue(backend.pull_request_touches("about.yaml"))
+        self.assertEqual(len(fake_graphql.queries), 4)
+        self.assertFalse(backend.pull_request_touches("missing.yaml"))
+
+    @mock.patch('gordon.services.common.ttl_cache.get_redis_client', return_value=None)
+    def test_deletion_is_detected_in_constant_calls(self, mock_redis):
+        for base, deleted in [("version: 1\n", True), (None, False)]:
+            with self.subTest(base=base):
+                repo = FakeRepo({"main": "version: 1\n", "ref": None, "base": base})
+                repo.get_pull = mock.Mock()
+                repo.requestJson = mock.Mock(wraps=repo.requestJson)
+                repo.requestJsonAndCheck = mock.Mock(wraps=repo.requestJsonAndCheck)
+                self.assertEqual(RestRepositoryBackend(repo, REF_SHA, 1).pull_request_deletes("about.yaml"), deleted)
+                repo.get_pull.return_value.get_files.assert_not_called()
+                # Contents at the head and the merge base, the pull request and the comparison
+                calls = repo.requestJson.call_count + repo.requestJsonAndCheck.call_count + repo.get_pull.call_count
+                self.assertEqual(calls, 4)
+
+    @mock.patch('gordon.services.common.ttl_cache.get_redis_client', return_value=None)
+    def test_deletion_falls_back_to_listing_files(self, mock_redis):
+        repo = FakeRepo({"main": "version: 1\n", "ref": None})
+        repo.requestJsonAndCheck = mock.Mock(side_effect=GithubException(404, {"message": "Not Found"}))
+        pr_files = mock.MagicMock()
+        pr_files.__iter__.return_value = iter([mock.Mock(filename="README.md"), mock.Mock(filename="about.yaml")])
+        repo.get_pull = mock.Mock(return_value=mock.Mock(get_files=mock.Mock(return_value=pr_files)))
+        self.assertTrue(RestRepositoryBackend(repo, REF_SHA, 1).pull_request_deletes("about.yaml"))
+
+    @mock.patch('gordon.services.common.ttl_cache.get_redis_client', return_value=None)
+    def test_file_kept_at_head_is_not_deleted(self, mock_redis):
+        repo = FakeRepo({"main": "version: 1\n", "ref": "version: 2\n"})
+        repo.get_pull = mock.Mock()
+        self.assertFalse(RestRepositoryBackend(repo, REF_SHA, 1).pull_request_deletes("about.yaml"))
+        repo.get_pull.assert_not_called()
+
+    def test_graphql_url(self):
+        self.assertEqual(GraphqlRepositoryBackend.get_graphql_url("https://api.github.com"),
+                         "https://api.github.com/graphql")
+        self.assertEqual(GraphqlRepositoryBackend.get_graphql_url("https://github.example.com/api/v3"),
+                         "https://github.example.com/api/graphql")
+
+    @mock.patch.dict(os.environ, {"GORDON_GITHUB_BACKEND": "graphql"})
+    def test_backend_is_selected_by_deployment(self):
+        backend = get_repository_backend(GithubService("https://api.github.com", "token"), "org/repo", REF_SHA, 1)
+        self.assertIsInstance(backend, GraphqlRepositoryBackend)
+
+
+@mock.patch('gordon.services.common.ttl_cache.get_redis_client', return_value=None)
+class TestBackendEquivalence(unittest.TestCase):
+    def run_validator(self, backend):
+        jira_lookup = mock.Mock()
+        jira_lookup.is_valid_project.return_value = True
+        pagerduty_lookup = mock.Mock()
+        pagerduty_lookup.is_valid_schedule.return_value = True
+        check_run = mock.Mock()
+        with mock.patch("gordon.services.validator.validation_results.get_validation_result_cache",
+                        return_value=TwoTierCache("test-about-yaml-results", max_local_entries=10)), \
+                mock.patch("gordon.services.validator.default.default_file_validator.GithubAppService"), \
+                mock.patch("gordon.services.validator.default.default_file_validator.GithubService"), \
+                mock.patch("gordon.services.validator.default.default_file_validator.get_repository_backend",
+                           return_value=backend), \
+                mock.patch("gordon.services.validator.default.default_about_yaml.get_auth",
+                           return_value=("user", "password")), \
+                mock.patch("gordon.services.validator.default.default_about_yaml.get_jira_lookup",
+                           return_value=jira_lookup), \
+                mock.patch("gordon.services.validator.default.default_about_yaml.get_pagerduty_lookup",
+                           return_value=pagerduty_lookup):
+            DefaultFileValidator(check_run, "org/repo", REF_SHA, 1, 1).check_executor()
+        return check_run.complete.call_args_list
+
+    def test_rest_and_graphql_conclude_alike(self, mock_redis):
+        versions = [None, INVALID_FILE, VALID_FILE.format(jira_id="JIRA", pagerduty_id="PD"), BINARY_FILE, LARGE_FILE]
+        for main, ref, pr_files in itertools.product(versions, versions, [["about.yaml"], ["README.md"]]):
+            with self.subTest(main=main, ref=ref, pr_files=pr_files):
+                files = {"main": main, "ref": ref}
+                repo = FakeRepo(dict(files, base=main if "about.yaml" in pr_files else None))
+                repo.get_pull = mock.Mock(return_value=mock.Mock(get_files=mock.Mock(
+                    return_value=[mock.Mock(filename=path) for path in pr_files])))
+                fake_graphql = FakeGraphql(files, pr_files)
+                with mock.patch("gordon.services.github.repository_backend.rate_limit.request", fake_graphql.request), \
+                        mock.patch.object(GithubService, "get_repository", return_value=repo):
+                    graphql_backend = GraphqlRepositoryBackend(GithubService("https://api.github.com", "token"),
+                                                               "org/repo", REF_SHA, 1)
+                    self.assertEqual(self.run_validator(RestRepositoryBackend(repo, REF_SHA, 1)),
+                                     self.run_validator(graphql_backend))
+                self.assertEqual(len(fake_graphql.queries), 1)
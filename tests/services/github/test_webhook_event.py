@@ -0,0 +1,69 @@
+import copy
+import json
+import unittest
+from unittest import mock
+from kombu import serialization
+from gordon.services.celery_worker import webhook_async_processor
+from gordon.services.github.webhook_event import WebhookEvent
+from gordon.services.github.webhook_processor import WebhookProcessor, WebhookProcessorException
+
+
+def load_fixture(name):
+    with open(f"tests/fixtures/{name}.json") as fixture:
+        payload = json.load(fixture)
+    payload["installation"]["id"] = 42
+    payload["repository"]["owner"]["login"] = "twilio"
+    payload["repository"]["full_name"] = "twilio/gordon"
+    payload["repository"]["private"] = True
+    return payload
+
+
+class TestWebhookEvent(unittest.TestCase):
+    def test_pull_request_event(self):
+        payload = load_fixture("good_pr")
+        event = WebhookProcessor(payload).get_event("pull_request")
+        self.assertEqual(event.event_type, "pull_request")
+        self.assertEqual(event.action, "synchronize")
+        self.assertEqual(event.organization, "twilio")
+        self.assertEqual(event.repo_name, "twilio/gordon")
+        self.assertEqual(event.installation_id, 42)
+        self.assertEqual(event.head_sha, payload["pull_request"]["head"]["sha"])
+        self.assertEqual(event.pr_number, payload["number"])
+        self.assertEqual(event.check_url, payload["pull_request"]["base"]["repo"]["url"])
+
+    def test_check_run_event(self):
+        payload = load_fixture("good_check_run")
+        event = WebhookProcessor(payload).get_event("check_run")
+        self.assertEqual(event.head_sha, payload["check_run"]["head_sha"])
+        self.assertEqual(event.pr_number, payload["check_run"]["pull_requests"][0]["number"])
+        self.assertEqual(event.check_url, payload["repository"]["url"])
+
+    def test_ignored_actions_have_no_event(self):
+        payload = load_fixture("good_pr")
+        payload["action"] = "labeled"
+        self.assertIsNone(WebhookProcessor(payload).get_event("pull_request"))
+        # check_suite "requested" events are created by Github itself, only re-requests run a check
+        self.assertIsNone(WebhookProcessor(load_fixture("good_check_suite")).get_event("check_suite"))
+
+    def test_missing_fields_raise(self):
+        payload = load_fixture("good_pr")
+        del payload["pull_request"]["head"]
+        with self.assertRaises(WebhookProcessorException):
+            WebhookProcessor(payload).get_event("pull_request")
+
+    def test_task_envelope_round_trip(self):
+        payload = load_fixture("good_pr")
+        event = WebhookProcessor(payload).get_event("pull_request")
+        content_type, encoding, body = serialization.dumps(event.to_task(), serializer="msgpack")
+        fields = serialization.loads(body, content_type, encoding, accept=[content_type])
+        self.assertEqual(WebhookEvent.from_task(fields), event)
+        self.assertLess(len(body) * 10, len(json.dumps(payload)))
+
+    @mock.patch.object(webhook_async_processor, "processor")
+    def test_worker_accepts_events_and_full_payloads(self, mock_processor):
+        payload = load_fixture("good_pr")
+        event = WebhookProcessor(payload).get_event("pull_request")
+        with mock.patch("builtins.open", mock.mock_open(read_data="{}")):
+            webhook_async_processor.webhook_async(event.to_task())
+            webhook_async_processor.webhook_async(copy.deepcopy(payload), "pull_request")
+        self.assertEqual(mock_processor.call_args_list, [mock.call(event, "twilio"), mock.call(event, "twilio")])
@@ -0,0 +1,107 @@
+import base64
+import hashlib
+import itertools
+import json
+import os
+import unittest
+from unittest import mock
+from gordon.services.common.outbound_policy import CircuitOpenException
+from gordon.services.common.ttl_cache import TwoTierCache
+from gordon.services.validator.default.default_file_validator import DefaultFileValidator
+
+REF_SHA = "0123456789abcdef"
+MERGE_BASE_SHA = "fedcba9876543210"
+VALID_FILE = "version: 1\norganization: twilio\njira_id: {jira_id}\npagerduty_id: {pagerduty_id}\n"
+INVALID_FILE = "version: 1\norganization: twilio\n"
+
+
+# Repository serving about.yaml from "main", "ref" and the "base" the pull request branched off through its
+# requester, the way the contents cache reads it
+class FakeRepo:
+    url = "/repos/org/repo"
+
+    def __init__(self, files):
+        self.files = files
+        self._requester = self
+
+    def requestJsonAndCheck(self, verb, url, parameters=None, headers=None):
+        assert "/compare/" in url
+        return {}, {"merge_base_commit": {"sha": MERGE_BASE_SHA}}
+
+    def requestJson(self, verb, url, parameters=None, headers=None):
+        ref = (parameters or {}).get("ref")
+        data = self.files.get("main" if ref is None else "base" if ref == MERGE_BASE_SHA else "ref")
+        if data is None:
+            return 404, {}, '{"message": "Not Found"}'
+        blob = data.encode()
+        sha = hashlib.sha1(b"blob %d\0" % len(blob) + blob).hexdigest()
+        if (headers or {}).get("If-None-Match") == f'"{sha}"':
+            return 304, {"etag": f'"{sha}"'}, ""
+        return 200, {"etag": f'"{sha}"'}, json.dumps(
+            {"type": "file", "sha": sha, "content": base64.b64encode(blob).decode()})
+
+    def get_pull(self, number):
+        return mock.Mock(get_files=mock.Mock(return_value=[]))
+
+
+def lookup_result(value):
+    if value == "error":
+        raise Exception("lookup failed")
+    if value == "circuit":
+        raise CircuitOpenException("jira")
+    return value == "ok"
+
+
+@mock.patch('gordon.services.common.ttl_cache.get_redis_client', return_value=None)
+class TestConcurrentValidation(unittest.TestCase):
+    def run_validator(self, files, concurrent):
+        repo = FakeRepo(files)
+        jira_lookup = mock.Mock()
+        jira_lookup.is_valid_project.side_effect = lambda base_url, key, auth: lookup_result(key)
+        pagerduty_lookup = mock.Mock()
+        pagerduty_lookup.is_valid_schedule.side_effect = lambda url, schedule_id, token: lookup_result(schedule_id)
+
+        with mock.patch.dict(os.environ, {"GORDON_CONCURRENT_VALIDATION": "true" if concurrent else "false"}), \
+                mock.patch("gordon.services.validator.validation_results.get_validation_result_cache",
+                           return_value=TwoTierCache("test-about-yaml-results", max_local_entries=10)), \
+                mock.patch("gordon.services.validator.default.default_file_validator.GithubAppService"), \
+                mock.patch("gordon.services.validator.default.default_file_validator.GithubService") as github_service, \
+                mock.patch("gordon.services.validator.default.default_about_yaml.get_auth",
+                           return_value=("user", "password")), \
+                mock.patch("gordon.services.validator.default.default_about_yaml.get_jira_lookup",
+                           return_value=jira_lookup), \
+                mock.patch("gordon.services.validator.default.default_about_yaml.get_pagerduty_lookup",
+                           return_value=pagerduty_lookup):
+            github_service.return_value.get_repository.return_value = repo
+            check_run = mock.Mock()
+            validator = DefaultFileValidator(check_run, "org/repo", REF_SHA, 1, 1)
+            self.assertEqual(validator.concurrent_validation, concurrent)
+            validator.check_executor()
+
+        return check_run.complete.call_args_list
+
+    def assert_equivalent(self, files):
+        self.assertEqual(self.run_validator(files, concurrent=False), self.run_validator(files, concurrent=True))
+
+    def test_file_versions(self, mock_redis):
+        versions = [None, INVALID_FILE, VALID_FILE.format(jira_id="ok", pagerduty_id="ok")]
+        for main, ref in itertools.product(versions, versions):
+            with self.subTest(main=main, ref=ref):
+                self.assert_equivalent({"main": main, "ref": ref})
+
+    def test_lookup_results(self, mock_redis):
+        results = ["ok", "missing", "error", "circuit"]
+        for main_jira, main_pagerduty, ref_jira, ref_pagerduty in itertools.product(results, repeat=4):
+            with self.subTest(main=(main_jira, main_pagerduty), ref=(ref_jira, ref_pagerduty)):
+                self.assert_equivalent({
+                    "main": VALID_FILE.format(jira_id=main_jira, pagerduty_id=main_pagerduty),
+                    "ref": VALID_FILE.format(jira_id=ref_jira, pagerduty_id=ref_pagerduty)
+                })
+
+    def test_ref_only_lookup_results(self, mock_redis):
+        for ref_jira, ref_pagerduty in itertools.product(["ok", "missing", "circuit"], repeat=2):
+            with self.subTest(ref=(ref_jira, ref_pagerduty)):
+                self.assert_equivalent({
+                    "main": INVALID_FILE,
+                    "ref": VALID_FILE.format(jira_id=ref_jira, pagerduty_id=ref_pagerduty)
+                })
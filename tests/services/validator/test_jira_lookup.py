@@ -0,0 +1,150 @@
+import unittest
+from unittest import mock
+from gordon.services.common.ttl_cache import TwoTierCache
+from gordon.services.validator.jira_lookup import JiraProjectLookup, JiraLookupException, JiraProjectIndex, \
+    PROJECT_VALID, PROJECT_DEFUNCT, PROJECT_NOT_FOUND
+
+JIRA_URL = "https://mock-test-server/jira/"
+
+
+def jira_response(status_code, category="Engineering"):
+    response = mock.Mock(status_code=status_code, text="")
+    response.json.return_value = {"key": "GORDON", "projectCategory": {"name": category}}
+    return response
+
+
+@mock.patch('gordon.services.common.ttl_cache.get_redis_client', return_value=None)
+@mock.patch('gordon.services.validator.jira_lookup.outbound_policy.request')
+class TestJiraProjectLookup(unittest.TestCase):
+    def setUp(self):
+        self.lookup = JiraProjectLookup(cache=TwoTierCache("test-jira-project", max_local_entries=2),
+                                        index=JiraProjectIndex(enabled=False))
+
+    def test_valid_project_is_cached(self, mock_request, mock_redis):
+        mock_request.return_value = jira_response(200)
+        self.assertTrue(self.lookup.is_valid_project(JIRA_URL, "gordon", ("user", "pass")))
+        self.assertTrue(self.lookup.is_valid_project(JIRA_URL, "GORDON ", ("user", "pass")))
+        mock_request.assert_called_once_with("jira", "GET", f"{JIRA_URL}GORDON", auth=("user", "pass"))
+
+    def test_defunct_and_missing_projects_are_cached(self, mock_request, mock_redis):
+        mock_request.side_effect = [jira_response(200, "Defunct"), jira_response(404)]
+        self.assertEqual(self.lookup.get_project_status(JIRA_URL, "OLD", None), PROJECT_DEFUNCT)
+        self.assertEqual(self.lookup.get_project_status(JIRA_URL, "NOPE", None), PROJECT_NOT_FOUND)
+        self.assertFalse(self.lookup.is_valid_project(JIRA_URL, "OLD", None))
+        self.assertFalse(self.lookup.is_valid_project(JIRA_URL, "NOPE", None))
+        self.assertEqual(mock_request.call_count, 2)
+
+    def test_ttl_per_result(self, mock_request, mock_redis):
+        self.lookup.ttls[PROJECT_NOT_FOUND] = 0
+        mock_request.side_effect = [jira_response(404), jira_response(200)]
+        self.assertFalse(self.lookup.is_valid_project(JIRA_URL, "NEW", None))
+        self.assertTrue(self.lookup.is_valid_project(JIRA_URL, "NEW", None))
+        self.assertEqual(self.lookup.get_project_status(JIRA_URL, "NEW", None), PROJECT_VALID)
+        self.assertEqual(mock_request.call_count, 2)
+
+    def test_errors_are_not_cached(self, mock_request, mock_redis):
+        mock_request.side_effect = [jira_response(500), jira_response(200)]
+        with self.assertRaises(JiraLookupException):
+            self.lookup.is_valid_project(JIRA_URL, "GORDON", None)
+        self.assertTrue(self.lookup.is_valid_project(JIRA_URL, "GORDON", None))
+
+    def test_local_tier_is_bounded(self, mock_request, mock_redis):
+        mock_request.return_value = jira_response(200)
+        for key in ["A", "B", "C"]:
+            self.lookup.is_valid_project(JIRA_URL, key, None)
+        self.assertEqual(list(self.lookup.cache.local_entries), ["B", "C"])
+
+
+def project_listing(*projects):
+    response = mock.Mock(status_code=200, text="")
+    response.json.return_value = [{"key": key, "projectCategory": {"name": category}} if category else {"key": key}
+                                  for key, category in projects]
+    return response
+
+
+# Keeps strings, hashes and their expiry times the way the index uses Redis
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+        self.expiry = {}
+
+    def get(self, key):
+        value = self.values.get(key)
+        return value.encode() if isinstance(value, str) else value
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value
+        self.expiry[key] = ex
+
+    def hset(self, key, mapping):
+        self.values.setdefault(key, {}).update(mapping)
+
+    def hgetall(self, key):
+        return {field.encode(): value.encode() for field, value in self.values.get(key, {}).items()}
+
+    def expire(self, key, ttl):
+        self.expiry[key] = ttl
+
+    def pipeline(self):
+        pipeline = mock.Mock(wraps=self)
+        pipeline.execute = mock.Mock()
+        return pipeline
+
+
+@mock.patch('gordon.services.validator.jira_lookup.outbound_policy.request')
+class TestJiraProjectIndex(unittest.TestCase):
+    def setUp(self):
+        self.redis = FakeRedis()
+        patch = mock.patch('gordon.services.validator.jira_lookup.get_redis_client', return_value=self.redis)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.index = JiraProjectIndex(enabled=True, check_interval=0, ttl=3600)
+        self.lookup = JiraProjectLookup(cache=TwoTierCache("test-jira-project", max_local_entries=2), index=self.index)
+
+    @mock.patch('gordon.services.common.ttl_cache.get_redis_client', return_value=None)
+    def test_indexed_projects_are_not_looked_up(self, mock_redis, mock_request):
+        mock_request.return_value = project_listing(("GORDON", "Engineering"), ("OLD", "Defunct"), ("NOCAT", None))
+        self.assertEqual(self.index.refresh(JIRA_URL, None), 3)
+        mock_request.assert_called_once_with("jira", "GET", "https://mock-test-server/jira", auth=None)
+
+        self.assertTrue(self.lookup.is_valid_project(JIRA_URL, "gordon ", None))
+        self.assertTrue(self.lookup.is_valid_project(JIRA_URL, "NOCAT", None))
+        self.assertEqual(self.lookup.get_project_status(JIRA_URL, "OLD", None), PROJECT_DEFUNCT)
+        self.assertEqual(mock_request.call_count, 1)
+
+        # Projects created after the index was loaded are looked up live
+        mock_request.return_value = jira_response(200)
+        self.assertTrue(self.lookup.is_valid_project(JIRA_URL, "NEW", None))
+        self.assertEqual(mock_request.call_count, 2)
+
+    def test_workers_load_the_published_index(self, mock_request):
+        mock_request.return_value = project_listing(("GORDON", "Engineering"))
+        self.index.refresh(JIRA_URL, None)
+        first_generation = self.redis.get("gordon:jira-projects").decode()
+        self.assertEqual(self.redis.expiry["gordon:jira-projects"], 3600)
+
+        worker_index = JiraProjectIndex(enabled=True, check_interval=0)
+        self.assertEqual(worker_index.get_status("GORDON"), PROJECT_VALID)
+        with mock.patch.object(self.redis, "hgetall", wraps=self.redis.hgetall) as hgetall:
+            worker_index.get_status("GORDON")
+            hgetall.assert_not_called()
+
+        mock_request.return_value = project_listing(("GORDON", "Defunct"))
+        self.index.refresh(JIRA_URL, None)
+        self.assertEqual(worker_index.get_status("GORDON"), PROJECT_DEFUNCT)
+        self.assertEqual(self.redis.expiry[f"gordon:jira-projects:{first_generation}"], 60)
+
+    def test_failed_listing_keeps_previous_index(self, mock_request):
+        mock_request.return_value = project_listing(("GORDON", "Engineering"))
+        self.index.refresh(JIRA_URL, None)
+        for response in [jira_response(500), project_listing()]:
+            mock_request.return_value = response
+            with self.assertRaises(JiraLookupException):
+                self.index.refresh(JIRA_URL, None)
+        self.assertEqual(JiraProjectIndex(enabled=True, check_interval=0).get_status("GORDON"), PROJECT_VALID)
+
+    def test_expired_index_is_not_used(self, mock_request):
+        mock_request.return_value = project_listing(("GORDON", "Engineering"))
+        self.index.refresh(JIRA_URL, None)
+        del self.redis.values["gordon:jira-projects"]
+        self.assertIsNone(self.index.get_status("GORDON"))
@@ -0,0 +1,75 @@
+import threading
+import time
+import unittest
+from unittest import mock
+from gordon.services.common import call_counter
+from gordon.services.common.ttl_cache import TwoTierCache
+from gordon.services.validator.pagerduty_lookup import PagerDutyScheduleLookup, PagerDutyLookupException, \
+    SCHEDULE_VALID, SCHEDULE_NOT_FOUND
+
+PAGERDUTY_URL = "https://api.pagerduty.com/schedules/"
+
+
+def slow_response(status_code):
+    def request(*args, **kwargs):
+        time.sleep(0.05)
+        return mock.Mock(status_code=status_code, text="")
+    return request
+
+
+@mock.patch('gordon.services.common.ttl_cache.get_redis_client', return_value=None)
+@mock.patch('gordon.services.validator.pagerduty_lookup.outbound_policy.request')
+class TestPagerDutyScheduleLookup(unittest.TestCase):
+    def setUp(self):
+        self.lookup = PagerDutyScheduleLookup(cache=TwoTierCache("test-pagerduty-schedule", max_local_entries=10))
+
+    def test_uses_schedule_endpoint(self, mock_request, mock_redis):
+        mock_request.side_effect = slow_response(200)
+        self.assertTrue(self.lookup.is_valid_schedule(PAGERDUTY_URL, " P123 ", "token"))
+        self.assertTrue(self.lookup.is_valid_schedule(PAGERDUTY_URL, "P123", "token"))
+        self.assertEqual(mock_request.call_count, 1)
+        self.assertEqual(mock_request.call_args.args[2], "https://api.pagerduty.com/schedules/P123")
+
+    def test_identical_ids_are_deduplicated(self, mock_request, mock_redis):
+        mock_request.side_effect = slow_response(404)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(
+            self.lookup.is_valid_schedule(PAGERDUTY_URL, "P404", "token"))) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [False] * 6)
+        self.assertEqual(mock_request.call_count, 1)
+
+    def test_stale_entry_served_while_revalidating(self, mock_request, mock_redis):
+        self.lookup.cache.set("P123", SCHEDULE_VALID, ttl=0, stale_ttl=60)
+
+        # Counted like outbound_policy.request counts it
+        def counted_request(service, method, url, **kwargs):
+            call_counter.record_call(service, method)
+            return slow_response(404)()
+        mock_request.side_effect = counted_request
+
+        with call_counter.count_calls() as calls:
+            self.assertTrue(self.lookup.is_valid_schedule(PAGERDUTY_URL, "P123", "token"))
+            for _ in range(50):
+                if mock_request.call_count and not self.lookup.single_flight.in_flight("P123"):
+                    break
+                time.sleep(0.01)
+        self.assertFalse(self.lookup.is_valid_schedule(PAGERDUTY_URL, "P123", "token"))
+        self.assertEqual(mock_request.call_count, 1)
+        self.assertEqual(calls["pagerduty"], 1)
+
+    def test_unknown_schedules_are_not_served_stale(self, mock_request, mock_redis):
+        self.lookup.ttls[SCHEDULE_NOT_FOUND] = 0
+        self.lookup.stale_ttl = 60
+        mock_request.side_effect = [slow_response(404)(), slow_response(200)()]
+        self.assertFalse(self.lookup.is_valid_schedule(PAGERDUTY_URL, "PNEW", "token"))
+        self.assertTrue(self.lookup.is_valid_schedule(PAGERDUTY_URL, "PNEW", "token"))
+        self.assertEqual(mock_request.call_count, 2)
+
+    def test_errors_raise(self, mock_request, mock_redis):
+        mock_request.side_effect = slow_response(401)
+        with self.assertRaises(PagerDutyLookupException):
+            self.lookup.is_valid_schedule(PAGERDUTY_URL, "P123", "token")
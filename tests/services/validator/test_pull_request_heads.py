@@ -0,0 +1,68 @@
+import os
+import unittest
+from unittest import mock
+from gordon.services.common import metrics
+from gordon.services.validator.pull_request_heads import PullRequestHeads
+
+
+class DictRedis:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value.encode()
+
+    # Runs RECORD_HEAD_SCRIPT
+    def eval(self, script, numkeys, key, head_sha, updated_at, ttl):
+        current = self.values.get(key)
+        if current is not None and b" " in current and current.decode().split(" ", 1)[1] > updated_at:
+            return 0
+        self.set(key, f"{head_sha} {updated_at}", ex=ttl)
+        return 1
+
+
+class TestPullRequestHeads(unittest.TestCase):
+    def setUp(self):
+        self.redis = DictRedis()
+        patch = mock.patch('gordon.services.validator.pull_request_heads.get_redis_client', return_value=self.redis)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.heads = PullRequestHeads()
+
+    def test_older_head_is_superseded(self):
+        self.heads.record_head("twilio/gordon", 1, "first")
+        self.heads.record_head("Twilio/Gordon", 1, "second")
+        before = metrics.get_counter("validation.superseded", {"stage": "queued"})
+        self.assertTrue(self.heads.is_superseded("twilio/gordon", 1, "first", "queued"))
+        self.assertFalse(self.heads.is_superseded("twilio/gordon", 1, "second", "queued"))
+        self.assertEqual(metrics.get_counter("validation.superseded", {"stage": "queued"}), before + 1)
+
+    def test_heads_delivered_out_of_order(self):
+        self.heads.record_head("twilio/gordon", 1, "second", "2021-06-01T10:05:00Z")
+        self.heads.record_head("twilio/gordon", 1, "first", "2021-06-01T10:00:00Z")
+        self.assertFalse(self.heads.is_superseded("twilio/gordon", 1, "second", "queued"))
+        self.assertTrue(self.heads.is_superseded("twilio/gordon", 1, "first", "queued"))
+
+        self.heads.record_head("twilio/gordon", 1, "third", "2021-06-01T10:10:00Z")
+        self.assertTrue(self.heads.is_superseded("twilio/gordon", 1, "second", "queued"))
+        self.assertFalse(self.heads.is_superseded("twilio/gordon", 1, "third", "queued"))
+
+    def test_pull_requests_are_tracked_separately(self):
+        self.heads.record_head("twilio/gordon", 1, "first")
+        self.heads.record_head("twilio/gordon", 2, "second")
+        self.assertFalse(self.heads.is_superseded("twilio/gordon", 1, "first", "queued"))
+        # Heads never recorded, e.g. check run re-requests, are not superseded
+        self.assertFalse(self.heads.is_superseded("twilio/gordon", 3, "third", "queued"))
+
+    def test_nothing_is_superseded_without_redis(self):
+        self.heads.record_head("twilio/gordon", 1, "second")
+        with mock.patch('gordon.services.validator.pull_request_heads.get_redis_client', return_value=None):
+            self.assertFalse(self.heads.is_superseded("twilio/gordon", 1, "first", "queued"))
+
+    def test_supersession_can_be_disabled(self):
+        self.heads.record_head("twilio/gordon", 1, "second")
+        with mock.patch.dict(os.environ, {"GORDON_SUPERSEDE_ENABLED": "false"}):
+            self.assertFalse(PullRequestHeads().is_superseded("twilio/gordon", 1, "first", "queued"))
@@ -0,0 +1,85 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from gordon.services.validator.default import default_constants
+from gordon.services.validator.schema_registry import SchemaRegistry, get_schema_registry
+
+V1 = {"version": 1, "organization": "twilio", "jira_id": "JIRA", "pagerduty_id": "PD"}
+
+
+def schema(version, organizations=None, required=("version", "organization")):
+    properties = {"version": {"type": "integer", "const": version}, "organization": {"type": "string"},
+                  "owner": {"type": "string"}}
+    if organizations:
+        properties["organization"]["enum"] = organizations
+    return {"$schema": "http://json-schema.org/draft-07/schema#", "type": "object", "properties": properties,
+            "required": list(required)}
+
+
+class TestSchemaRegistry(unittest.TestCase):
+    def setUp(self):
+        self.schema_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.schema_dir)
+        os.mkdir(os.path.join(self.schema_dir, "valid_scehmas"))
+        self.write("v1.json", schema(1, ["twilio"]))
+        self.registry = SchemaRegistry("default", self.schema_dir, reload_interval=0)
+
+    def write(self, file_name, contents):
+        with open(os.path.join(self.schema_dir, file_name), "w") as schema_file:
+            schema_file.write(contents if isinstance(contents, str) else json.dumps(contents))
+
+    def test_schemas_are_keyed_by_organization_and_version(self):
+        self.write("v2.json", schema(2, ["twilio"], required=("version", "organization", "owner")))
+        self.write("v2-any.json", schema(2))
+        self.registry.reload_if_changed()
+
+        self.assertTrue(self.registry.is_valid({"version": 1, "organization": "twilio"}))
+        self.assertFalse(self.registry.is_valid({"version": 1, "organization": "other"}))
+        self.assertFalse(self.registry.is_valid({"version": 2, "organization": "twilio"}))
+        self.assertTrue(self.registry.is_valid({"version": 2, "organization": "twilio", "owner": "team"}))
+        # Schemas without an organization enum apply to every other organization
+        self.assertTrue(self.registry.is_valid({"version": 2, "organization": "other"}))
+        self.assertFalse(self.registry.is_valid({"version": 3, "organization": "twilio"}))
+        self.assertFalse(self.registry.is_valid({"version": [1], "organization": "twilio"}))
+
+    def test_new_versions_are_used_without_restart(self):
+        fingerprint = self.registry.get_fingerprint()
+        self.assertFalse(self.registry.is_valid({"version": 2, "organization": "twilio"}))
+
+        self.write("v2.json", schema(2, ["twilio"]))
+        self.assertTrue(self.registry.is_valid({"version": 2, "organization": "twilio"}))
+        self.assertNotEqual(self.registry.get_fingerprint(), fingerprint)
+
+    def test_schemas_are_compiled_once(self):
+        with mock.patch.object(self.registry, "load_file", wraps=self.registry.load_file) as load_file:
+            for _ in range(3):
+                self.registry.is_valid({"version": 1, "organization": "twilio"})
+        load_file.assert_not_called()
+
+    def test_broken_schema_file_keeps_its_last_version(self):
+        self.write("v1.json", "{not json")
+        self.write("v2.json", schema(2, ["twilio"]))
+        self.registry.reload_if_changed()
+        self.assertTrue(self.registry.is_valid({"version": 1, "organization": "twilio"}))
+        self.assertTrue(self.registry.is_valid({"version": 2, "organization": "twilio"}))
+
+    def test_help_text_of_declared_or_latest_version(self):
+        self.write("valid_scehmas/default_v1.txt", "version: 1\norganization: org-name")
+        self.write("v2.json", schema(2, ["twilio"]))
+        self.registry.reload_if_changed()
+
+        self.assertEqual(self.registry.get_help_text({"version": 1, "organization": "twilio"}),
+                         "version: 1\norganization: org-name")
+        rendered = "version: 2\norganization: twilio\nowner: owner"
+        self.assertEqual(self.registry.get_help_text({"version": 2, "organization": "twilio"}), rendered)
+        self.assertEqual(self.registry.get_help_text("not a mapping"), rendered)
+
+    def test_default_schema_is_registered(self):
+        registry = get_schema_registry("default")
+        self.assertTrue(registry.is_valid(V1))
+        self.assertFalse(registry.is_valid(dict(V1, version=2)))
+        self.assertTrue(registry.get_help_text(V1).startswith("version: 1\norganization: org-name"))
+        self.assertTrue(default_constants.get_validator_version().endswith(registry.get_fingerprint()))
@@ -0,0 +1,148 @@
+import unittest
+from unittest import mock
+from gordon.services.celery_worker import webhook_async_processor
+from gordon.services.validator import validation_registry
+from gordon.services.validator.validation_registry import ValidationRegistry
+from tests.services.github.test_event_filter import make_event
+
+
+@mock.patch('gordon.services.validator.validation_registry.get_redis_client', return_value=None)
+class TestValidationRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = ValidationRegistry(window=300, in_flight_ttl=900)
+
+    def test_duplicates_are_dropped_while_in_progress_and_after_completion(self, mock_redis):
+        claim = self.registry.claim("twilio/gordon", "abc", "default")
+        self.assertTrue(claim.should_run)
+        self.assertFalse(self.registry.claim("Twilio/Gordon", "abc", "default").should_run)
+
+        self.registry.complete(claim)
+        self.assertFalse(self.registry.claim("twilio/gordon", "abc", "default").should_run)
+
+    def test_reruns_only_wait_for_validations_in_progress(self, mock_redis):
+        claim = self.registry.claim("twilio/gordon", "abc", "default")
+        self.assertFalse(self.registry.claim("twilio/gordon", "abc", "default", rerun=True).should_run)
+
+        self.registry.complete(claim)
+        rerun = self.registry.claim("twilio/gordon", "abc", "default", rerun=True)
+        self.assertTrue(rerun.should_run)
+        self.assertFalse(self.registry.claim("twilio/gordon", "abc", "default", rerun=True).should_run)
+        self.registry.complete(rerun)
+        self.assertFalse(self.registry.claim("twilio/gordon", "abc", "default").should_run)
+
+    def test_expired_claim_does_not_complete_the_claim_of_another_worker(self, mock_redis):
+        with mock.patch("gordon.services.validator.validation_registry.time.monotonic", return_value=0):
+            expired = self.registry.claim("twilio/gordon", "abc", "default")
+        current = self.registry.claim("twilio/gordon", "abc", "default")
+        self.assertTrue(current.should_run)
+
+        self.registry.complete(expired)
+        self.registry.release(expired)
+        self.assertFalse(self.registry.claim("twilio/gordon", "abc", "default", rerun=True).should_run)
+        self.registry.release(current)
+        self.assertTrue(self.registry.claim("twilio/gordon", "abc", "default").should_run)
+
+    def test_keys_include_head_sha_and_validator(self, mock_redis):
+        self.assertTrue(self.registry.claim("twilio/gordon", "abc", "default").should_run)
+        self.assertTrue(self.registry.claim("twilio/gordon", "def", "default").should_run)
+        self.assertTrue(self.registry.claim("twilio/gordon", "abc", "acquisition").should_run)
+
+    def test_released_claims_run_again(self, mock_redis):
+        claim = self.registry.claim("twilio/gordon", "abc", "default")
+        self.registry.release(claim)
+        self.assertTrue(self.registry.claim("twilio/gordon", "abc", "default").should_run)
+
+    def test_completed_validations_expire_after_window(self, mock_redis):
+        registry = ValidationRegistry(window=1, in_flight_ttl=900)
+        claim = registry.claim("twilio/gordon", "abc", "default")
+        with mock.patch("gordon.services.validator.validation_registry.time.monotonic", return_value=0):
+            registry.complete(claim)
+        self.assertTrue(registry.claim("twilio/gordon", "abc", "default").should_run)
+
+    def test_disabled_window_runs_every_event(self, mock_redis):
+        registry = ValidationRegistry(window=0, in_flight_ttl=900)
+        for _ in range(2):
+            claim = registry.claim("twilio/gordon", "abc", "default")
+            self.assertTrue(claim.should_run)
+            registry.complete(claim)
+
+
+# Runs the registry scripts the way Redis would
+class ScriptedRedis:
+    def __init__(self):
+        self.values = {}
+
+    def eval(self, script, numkeys, key, *args):
+        current = self.values.get(key)
+        if script == validation_registry.CLAIM_SCRIPT:
+            value, ttl, replaceable = args
+            if current is not None and current != replaceable.encode():
+                return current
+            self.values[key] = value.encode()
+            return None
+        expected, value, ttl = args
+        if current != expected.encode():
+            return 0
+        if value:
+            self.values[key] = value.encode()
+        else:
+            del self.values[key]
+        return 1
+
+
+class TestRedisValidationRegistry(unittest.TestCase):
+    def setUp(self):
+        self.redis = ScriptedRedis()
+        patch = mock.patch('gordon.services.validator.validation_registry.get_redis_client', return_value=self.redis)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.registry = ValidationRegistry(window=300, in_flight_ttl=900)
+
+    def test_claims_are_shared_through_redis(self):
+        claim = self.registry.claim("twilio/gordon", "abc", "default")
+        other_worker = ValidationRegistry(window=300, in_flight_ttl=900)
+        self.assertFalse(other_worker.claim("twilio/gordon", "abc", "default", rerun=True).should_run)
+
+        self.registry.complete(claim)
+        self.assertEqual(self.redis.values[claim.key], b"completed")
+        self.assertFalse(other_worker.claim("twilio/gordon", "abc", "default").should_run)
+        rerun = other_worker.claim("twilio/gordon", "abc", "default", rerun=True)
+        self.assertTrue(rerun.should_run)
+
+        # The first claim no longer holds the key and leaves the re-run alone
+        self.registry.release(claim)
+        self.registry.complete(claim)
+        self.assertEqual(self.redis.values[claim.key], rerun.value.encode())
+        other_worker.release(rerun)
+        self.assertNotIn(claim.key, self.redis.values)
+
+
+@mock.patch('gordon.services.validator.validation_registry.get_redis_client', return_value=None)
+class TestDeduplicatedSetup(unittest.TestCase):
+    def setUp(self):
+        patch = mock.patch.object(webhook_async_processor, "get_validation_registry",
+                                  return_value=ValidationRegistry(window=300, in_flight_ttl=900))
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_second_event_for_head_sha_reuses_first_check(self, mock_redis):
+        setup = mock.Mock(return_value=mock.Mock(cancelled=False))
+        webhook_async_processor.deduplicated_setup(setup, make_event(), "twilio")
+        webhook_async_processor.deduplicated_setup(setup, make_event()._replace(event_type="check_suite"), "twilio")
+        self.assertEqual(setup.call_count, 1)
+
+    def test_rerequested_checks_run_again_once_completed(self, mock_redis):
+        setup = mock.Mock(return_value=mock.Mock(cancelled=False))
+        webhook_async_processor.deduplicated_setup(setup, make_event(), "twilio")
+        rerequested = make_event()._replace(event_type="check_run", action="rerequested")
+        webhook_async_processor.deduplicated_setup(setup, rerequested, "twilio")
+        webhook_async_processor.deduplicated_setup(setup, make_event(), "twilio")
+        self.assertEqual(setup.call_count, 2)
+
+    def test_cancelled_and_failed_checks_are_not_reused(self, mock_redis):
+        setup = mock.Mock(side_effect=[mock.Mock(cancelled=True), Exception("Github down"), mock.Mock(cancelled=False)])
+        webhook_async_processor.deduplicated_setup(setup, make_event(), "twilio")
+        with self.assertRaises(Exception):
+            webhook_async_processor.deduplicated_setup(setup, make_event(), "twilio")
+        webhook_async_processor.deduplicated_setup(setup, make_event(), "twilio")
+        self.assertEqual(setup.call_count, 3)
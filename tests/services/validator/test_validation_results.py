@@ -0,0 +1,78 @@
+import unittest
+from unittest import mock
+from gordon.services.common.ttl_cache import TwoTierCache
+from gordon.services.github.repository_backend import RestRepositoryBackend
+from gordon.services.validator.concurrent_validation import ConcurrentValidation
+from gordon.services.validator.default import default_constants
+from gordon.services.validator.default.default_about_yaml import AboutYaml, AboutYamlException
+from gordon.services.validator.yaml_parser import YamlParser
+from tests.services.validator.test_concurrent_validation import FakeRepo, VALID_FILE, REF_SHA
+
+ABOUT_YAML = VALID_FILE.format(jira_id="JIRA", pagerduty_id="PD")
+
+
+@mock.patch('gordon.services.common.ttl_cache.get_redis_client', return_value=None)
+class TestValidationResults(unittest.TestCase):
+    def setUp(self):
+        self.jira_lookup = mock.Mock()
+        self.jira_lookup.is_valid_project.return_value = True
+        self.pagerduty_lookup = mock.Mock()
+        self.pagerduty_lookup.is_valid_schedule.return_value = True
+        patches = [
+            mock.patch("gordon.services.validator.validation_results.get_validation_result_cache",
+                       return_value=TwoTierCache("test-about-yaml-results", max_local_entries=10)),
+            mock.patch("gordon.services.validator.default.default_about_yaml.get_auth", return_value=("user", "pass")),
+            mock.patch("gordon.services.validator.default.default_about_yaml.get_jira_lookup",
+                       return_value=self.jira_lookup),
+            mock.patch("gordon.services.validator.default.default_about_yaml.get_pagerduty_lookup",
+                       return_value=self.pagerduty_lookup),
+            mock.patch.object(YamlParser, "load", autospec=True, side_effect=YamlParser.load)
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.yaml_load = YamlParser.load
+
+    @staticmethod
+    def validate(about_yaml):
+        return about_yaml.is_valid, about_yaml.is_valid_jira, about_yaml.is_valid_pagerduty
+
+    def test_validated_blob_is_not_parsed_or_validated_again(self, mock_redis):
+        repo = RestRepositoryBackend(FakeRepo({"main": ABOUT_YAML}), REF_SHA, 1)
+        first = AboutYaml(repo)
+        self.assertEqual(self.validate(first), (True, True, True))
+
+        second = AboutYaml(repo)
+        self.assertEqual(self.validate(second), (True, True, True))
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second.version, 1)
+        self.assertEqual(self.yaml_load.call_count, 1)
+        self.assertEqual(self.jira_lookup.is_valid_project.call_count, 1)
+        self.assertEqual(self.pagerduty_lookup.is_valid_schedule.call_count, 1)
+
+    def test_same_blob_on_main_and_ref_is_validated_once(self, mock_redis):
+        repo = RestRepositoryBackend(FakeRepo({"main": ABOUT_YAML, "ref": ABOUT_YAML}), REF_SHA, 1)
+        with ConcurrentValidation(max_workers=2) as concurrent_validation:
+            main_file, ref_file = concurrent_validation.load_files(AboutYaml, repo, REF_SHA)
+            concurrent_validation.prefetch([(main_file, "is_valid_jira"), (ref_file, "is_valid_jira")])
+
+        self.assertIs(main_file, ref_file)
+        self.assertEqual(self.jira_lookup.is_valid_project.call_count, 1)
+
+    def test_validator_version_change_invalidates_results(self, mock_redis):
+        repo = RestRepositoryBackend(FakeRepo({"main": ABOUT_YAML}), REF_SHA, 1)
+        self.validate(AboutYaml(repo))
+        with mock.patch.object(default_constants, "get_validator_version", return_value="default:2:schema"):
+            self.validate(AboutYaml(repo))
+        self.assertEqual(self.yaml_load.call_count, 2)
+        self.assertEqual(self.jira_lookup.is_valid_project.call_count, 2)
+
+    def test_failed_lookups_are_not_cached(self, mock_redis):
+        repo = RestRepositoryBackend(FakeRepo({"main": ABOUT_YAML}), REF_SHA, 1)
+        self.jira_lookup.is_valid_project.side_effect = [Exception("Jira down"), True]
+        with self.assertRaises(AboutYamlException):
+            AboutYaml(repo).is_valid_jira
+
+        self.assertTrue(AboutYaml(repo).is_valid_jira)
+        self.assertEqual(self.jira_lookup.is_valid_project.call_count, 2)
+        self.assertEqual(self.yaml_load.call_count, 1)
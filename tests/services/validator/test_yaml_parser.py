@@ -0,0 +1,39 @@
+import unittest
+from unittest import mock
+import yaml
+from gordon.services.validator.yaml_parser import SafeLoader, YamlLimitException, YamlParser
+
+ABOUT_YAML = b"version: 1\norganization: twilio\njira_id: JIRA\npagerduty_id: PD\n"
+ALIAS_BOMB = b"\n".join([b'a: &a ["lol","lol","lol","lol","lol","lol","lol","lol","lol"]'] +
+                        [b"%c: &%c [%s]" % (ord("a") + i, ord("a") + i, b",".join([b"*%c" % (ord("a") + i - 1)] * 9))
+                         for i in range(1, 9)])
+
+
+class TestYamlParser(unittest.TestCase):
+    def setUp(self):
+        self.parser = YamlParser(max_bytes=1024, max_nodes=50)
+
+    def test_about_yaml_is_parsed(self):
+        self.assertEqual(self.parser.parse(ABOUT_YAML),
+                         {"version": 1, "organization": "twilio", "jira_id": "JIRA", "pagerduty_id": "PD"})
+        self.assertIsNone(self.parser.parse(b""))
+
+    def test_alias_bomb_is_rejected_before_it_is_expanded(self):
+        with mock.patch.object(SafeLoader, "construct_document") as construct_document, \
+                self.assertRaises(YamlLimitException) as context:
+            YamlParser(max_bytes=4096, max_nodes=10000).parse(ALIAS_BOMB)
+        self.assertEqual(context.exception.reason, "alias")
+        construct_document.assert_not_called()
+
+    def test_size_and_node_limits(self):
+        with self.assertRaises(YamlLimitException) as context:
+            self.parser.parse(ABOUT_YAML + b"#" * 1024)
+        self.assertEqual(context.exception.reason, "too_large")
+
+        with self.assertRaises(YamlLimitException) as context:
+            self.parser.parse(b"[" + b",".join([b"1"] * 50) + b"]")
+        self.assertEqual(context.exception.reason, "too_many_nodes")
+
+    def test_only_plain_types_are_constructed(self):
+        with self.assertRaises(yaml.YAMLError):
+            self.parser.parse(b"!!python/object/apply:os.system ['true']")
@@ -0,0 +1,77 @@
+import asyncio
+import json
+import threading
+import unittest
+from unittest import mock
+from gordon.asgi_server import create_asgi_app
+from gordon.configurations.github_config import GithubConfig
+from gordon.services.github.github_service import GithubService
+
+DELIVERY_ID = "72d3162e-cc78-11e3-81ab-4c9367dc0958"
+
+
+# Sends one request through the ASGI app, with the body split in chunks of chunk_size bytes
+def call(app, method, path, body=b"", headers=None, chunk_size=None):
+    chunk_size = chunk_size or max(len(body), 1)
+    messages = [{"type": "http.request", "body": body[i:i + chunk_size], "more_body": i + chunk_size < len(body)}
+                for i in range(0, max(len(body), 1), chunk_size)]
+    scope = {"type": "http", "method": method, "path": path,
+             "headers": [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]}
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return sent[0]["status"], json.loads(sent[1]["body"])
+
+
+@mock.patch('gordon.blueprints.blueprints.handle_webhook')
+class TestAsgiServer(unittest.TestCase):
+    def setUp(self):
+        self.app = create_asgi_app('test', config_dict={"MAX_CONTENT_LENGTH": 1024})
+        self.secret = GithubConfig().get_github_webhook_secret()
+
+    def post(self, body, event="pull_request", signature=None, content_length=True, chunk_size=None):
+        if signature is None:
+            signature = GithubService.get_signature(body, self.secret)
+        headers = {'X-GitHub-Event': event, 'X-Hub-Signature': signature, 'X-GitHub-Delivery': DELIVERY_ID}
+        if content_length:
+            headers['Content-Length'] = str(len(body))
+        return call(self.app, "POST", "/api/v1/validate-aboutyaml", body, headers, chunk_size)
+
+    def test_healthcheck(self, mock_handle_webhook):
+        self.assertEqual(call(self.app, "GET", "/api/v1/healthcheck"), (200, {"healthcheck": "ready"}))
+        self.assertEqual(call(self.app, "GET", "/api/v1/validate-aboutyaml")[0], 405)
+        self.assertEqual(call(self.app, "GET", "/api/v1/unknown")[0], 404)
+
+    def test_signed_payload_is_published_off_the_event_loop(self, mock_handle_webhook):
+        threads = []
+        mock_handle_webhook.side_effect = lambda *args: threads.append(threading.current_thread().name)
+        self.assertEqual(self.post(b'{"action": "opened"}', chunk_size=5), (200, {"Status": 200}))
+        mock_handle_webhook.assert_called_once_with({"action": "opened"}, "pull_request", DELIVERY_ID)
+        self.assertTrue(threads[0].startswith("gordon-publish"))
+
+    def test_publish_failure_is_logged(self, mock_handle_webhook):
+        mock_handle_webhook.side_effect = ConnectionError("broker down")
+        self.assertEqual(self.post(b'{"action": "opened"}')[0], 200)
+
+    @mock.patch('gordon.blueprints.blueprints.SenderVerificationProcessor.verify_sender')
+    def test_rejected_deliveries(self, mock_verify_sender, mock_handle_webhook):
+        mock_verify_sender.return_value = False, "pull_request"
+        self.assertEqual(self.post(b'{"action": "opened"}', signature="sha1=" + "0" * 40)[0], 400)
+        mock_verify_sender.reset_mock()
+
+        self.assertEqual(self.post(b'{"action": "created"}', event="issue_comment")[0], 400)
+        large = b'{"padding": "' + b'x' * 2048 + b'"}'
+        self.assertEqual(self.post(large)[0], 413)
+        self.assertEqual(self.post(large, content_length=False, chunk_size=256)[0], 413)
+        mock_verify_sender.assert_not_called()
+        mock_handle_webhook.assert_not_called()
+
+    def test_signed_invalid_json_is_rejected(self, mock_handle_webhook):
+        self.assertEqual(self.post(b'{"action": '), (400, {"code": 400, "message": "Invalid payload"}))
+        mock_handle_webhook.assert_not_called()
@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+import unittest
+
+WORKER = "gordon.worker.celery_initialization"
+API = "gordon.api_server"
+
+
+# Imports a module in a fresh interpreter without any secrets mounted, returning the modules -X importtime reports
+def import_modules(module):
+    env = {name: value for name, value in os.environ.items() if not name.startswith("SECRET_")}
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise AssertionError(f"Importing {module} failed:\n{result.stderr}")
+    modules = set()
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            modules.add(line.rsplit("|", 1)[1].strip().split(".")[0])
+    return modules
+
+
+class TestStartup(unittest.TestCase):
+    def test_worker_does_not_load_flask_or_secrets(self):
+        modules = import_modules(WORKER)
+        self.assertIn("celery", modules)
+        for module in ["flask", "redis", "requests", "github", "jsonschema"]:
+            self.assertNotIn(module, modules)
+
+    def test_api_does_not_load_validators(self):
+        modules = import_modules(API)
+        self.assertIn("flask", modules)
+        for module in ["github", "jsonschema", "jwt", "redis"]:
+            self.assertNotIn(module, modules)
+
+    def test_webhook_task_name(self):
+        from gordon.blueprints.blueprints import WEBHOOK_TASK
+        from gordon.services.celery_worker.webhook_async_processor import webhook_async
+        self.assertEqual(WEBHOOK_TASK, webhook_async.name)